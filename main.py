@@ -12,8 +12,18 @@ Fase 1 - MVP:
 Uso:
     python main.py
     sudo python main.py  (para herramientas que requieren privilegios)
+    python main.py --bench-startup [--budget-ms 3000]  (benchmark de arranque)
+    python main.py --batch consultas.txt [--workers 4]  (lote no interactivo)
+    python main.py --serve [--host 127.0.0.1] [--port 8080] [--insecure]  (API HTTP/JSON local)
 """
 
+import time
+_START = time.perf_counter()
+
+import argparse
+import contextlib
+import io
+import json
 import sys
 import os
 
@@ -29,92 +39,47 @@ from src.ui.prompts import UserPrompts
 from src.ui.custom_terminal import run_custom_cai_terminal
 from src.ui.terminal_commands import create_cybersecurity_commands
 from src.models.conversation_memory import ConversationMemory
-
-# Importar herramientas personalizadas
-from src.tools.cai_tools_wrapper import network_sniffer_tool
-from src.tools.nmap_tool import nmap_scan_tool, nmap_ping_sweep
-from src.tools.whois_tool import whois_lookup_tool, dns_lookup_tool, reverse_dns_lookup_tool
-from src.tools.log_analyzer_tool import analyze_log_tool, tail_log_tool
-
-from src.tools.report_generator_tool import generate_report_tool
+from src.core.startup_bench import StartupTimer, run_startup_benchmark, BENCH_MARKER
+from src.core.batch_runner import run_batch
+from src.ui.api_server import run_api_server, check_bind_address, DEFAULT_HOST, DEFAULT_PORT, ALLOW_INSECURE
 
 from cai.agents.network_traffic_analyzer import network_security_analyzer_agent
-from cai.cli import run_cai_cli
 
+_IMPORTS_DONE = time.perf_counter()
 
-def setup_agent():
+
+def setup_agent(timer: StartupTimer = None):
     """
     Configura el agente con todas las herramientas y extensiones.
     
+    Args:
+        timer: Medidor de fases del arranque (para --bench-startup)
+    
     Returns:
         Tupla (agent_controller, tool_manager, interpreter, memory)
     """
+    timer = timer or StartupTimer()
+    
     CLI.print_step(1, 4, "Inicializando controlador del agente...")
-    controller = CybersecurityAgent(agent=network_security_analyzer_agent)
+    with timer.phase("setup.controlador"):
+        controller = CybersecurityAgent(agent=network_security_analyzer_agent)
     
     CLI.print_step(2, 4, "Cargando herramientas personalizadas...")
-    tool_manager = ToolManager(network_security_analyzer_agent)
-    
-    # Registrar herramientas personalizadas con metadatos
-    tool_manager.register_tool(network_sniffer_tool, {
-        "category": "network",
-        "is_sensitive": True,
-        "requires_root": True
-    })
-    
-    tool_manager.register_tool(nmap_scan_tool, {
-        "category": "network",
-        "is_sensitive": True,
-        "requires_root": False
-    })
-    
-    tool_manager.register_tool(nmap_ping_sweep, {
-        "category": "network",
-        "is_sensitive": True,
-        "requires_root": False
-    })
-    
-    tool_manager.register_tool(whois_lookup_tool, {
-        "category": "reconnaissance",
-        "is_sensitive": False,
-        "requires_root": False
-    })
-    
-    tool_manager.register_tool(dns_lookup_tool, {
-        "category": "reconnaissance",
-        "is_sensitive": False,
-        "requires_root": False
-    })
-    
-    tool_manager.register_tool(reverse_dns_lookup_tool, {
-        "category": "reconnaissance",
-        "is_sensitive": False,
-        "requires_root": False
-    })
-    
-    tool_manager.register_tool(analyze_log_tool, {
-        "category": "analysis",
-        "is_sensitive": False,
-        "requires_root": False
-    })
-    
-    tool_manager.register_tool(tail_log_tool, {
-        "category": "analysis",
-        "is_sensitive": False,
-        "requires_root": False
-    })
-    
-    tool_manager.register_tool(generate_report_tool, {
-        "category": "utility",
-        "is_sensitive": False,
-        "requires_root": False
-    })
+    with timer.phase("setup.herramientas"):
+        tool_manager = ToolManager(network_security_analyzer_agent)
+        
+        # Registrar herramientas desde el manifiesto (src/core/tool_manifest.py):
+        # sus módulos se importan recién cuando el agente las usa
+        tool_manager.register_from_manifest()
 
     CLI.print_step(3, 4, "Inicializando intérprete de resultados...")
-    interpreter = ResultInterpreter()
+    with timer.phase("setup.interprete"):
+        interpreter = ResultInterpreter()
     
     CLI.print_step(4, 4, "Configurando memoria conversacional...")
-    memory = ConversationMemory(controller.session_id)
+    with timer.phase("setup.memoria"):
+        # La memoria es una vista sobre el registro de eventos del controlador
+        memory = ConversationMemory(controller.session_id, store=controller.events)
     
     CLI.print_success("Sistema inicializado correctamente\n")
     
@@ -247,10 +212,17 @@ INSTRUCCIONES ADICIONALES - Fase 1 MVP:
    - nmap_scan_tool: Escanea puertos y servicios
    - nmap_ping_sweep: Descubre hosts activos
    - whois_lookup_tool: Consulta información de dominios
+   - bulk_whois_lookup_tool: WHOIS de varios dominios/IPs en paralelo
    - dns_lookup_tool: Resuelve nombres de dominio
    - reverse_dns_lookup_tool: DNS inverso
+   - bulk_dns_lookup_tool: Resuelve muchos dominios a la vez (A/AAAA)
+   - bulk_reverse_dns_lookup_tool: DNS inverso de muchas IPs o de una red CIDR
+   - recon_pipeline_tool: Perfila una red completa (hosts, DNS inverso, WHOIS y puertos) en UNA sola llamada.
+     Prefiérela a encadenar nmap_ping_sweep + reverse_dns_lookup_tool + nmap_scan_tool host por host.
    - analyze_log_tool: Analiza archivos de log
    - tail_log_tool: Muestra últimas líneas de log
+   - read_artifact_tool: Lee por páginas el output completo de un resultado compactado.
+     Los resultados grandes llegan resumidos con un ID de artefacto; úsala solo si necesitas más detalle.
 
 5. **GENERACIÓN AUTOMÁTICA DE REPORTES (CRÍTICO: FORMATO)**:
    - Si detectas el marcador `---REPORTE_REQUERIDO:ANALYSIS---`, debes hacer dos cosas:
@@ -350,8 +322,142 @@ RECUERDA: Tu objetivo es hacer la ciberseguridad accesible para usuarios sin con
         print()
 
 
+def parse_args(argv=None) -> argparse.Namespace:
+    """Argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Agente inteligente de ciberseguridad")
+    parser.add_argument("--bench-startup", action="store_true",
+                        help="Medir el tiempo de arranque (frío y caliente) por fase")
+    parser.add_argument("--bench-runs", type=int, default=5,
+                        help="Ejecuciones en caliente del benchmark (por defecto: 5)")
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.getenv("STARTUP_BUDGET_MS")) if os.getenv("STARTUP_BUDGET_MS") else None,
+                        help="Presupuesto del tiempo hasta el prompt en caliente (env: STARTUP_BUDGET_MS)")
+    parser.add_argument("--phase-budget", action="append", default=[], metavar="FASE=MS",
+                        help="Presupuesto de una fase, ej: imports=1500 (repetible)")
+    parser.add_argument("--bench-output", help="Archivo JSON de resultados")
+    parser.add_argument("--batch", metavar="ARCHIVO",
+                        help="Ejecutar sin interacción las consultas del archivo (una por línea o JSONL)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BATCH_WORKERS", "4")),
+                        help="Consultas del lote en paralelo (env: BATCH_WORKERS, por defecto: 4)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="Reintentos por consulta fallida (por defecto: 2)")
+    parser.add_argument("--query-timeout", type=float, default=600,
+                        help="Segundos máximos por intento de consulta (por defecto: 600)")
+    parser.add_argument("--template", help="Plantilla con {item} aplicada a cada línea del lote")
+    parser.add_argument("--batch-output", help="Archivo JSONL de resultados (por defecto: logs/batch/)")
+    parser.add_argument("--allow-sensitive", action="store_true",
+                        help="Permitir herramientas sensibles en el lote sin confirmación (nmap, sniffer...)")
+    parser.add_argument("--serve", action="store_true",
+                        help="Levantar la API HTTP/JSON local (herramientas, sesiones y consultas)")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help="Dirección de la API (env: SERVE_HOST, por defecto: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help="Puerto de la API (env: SERVE_PORT, por defecto: 8080)")
+    parser.add_argument("--insecure", action="store_true", default=ALLOW_INSECURE,
+                        help="Permitir la API fuera de loopback sin SERVE_TOKEN (env: SERVE_INSECURE=1)")
+    # Proceso hijo del benchmark (uso interno)
+    parser.add_argument("--bench-startup-child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def run_startup_bench_child():
+    """Arranca hasta el prompt midiendo cada fase e imprime el resultado en JSON"""
+    timer = StartupTimer()
+    timer.record("imports", (_IMPORTS_DONE - _START) * 1000)
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        with timer.phase("permisos"):
+            PermissionChecker.check_and_warn()
+        controller, tool_manager, interpreter, memory = setup_agent(timer)
+    
+    print(BENCH_MARKER + json.dumps(timer.to_dict()))
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        memory.close()
+        controller.close()
+
+
+def run_batch_mode(args: argparse.Namespace) -> int:
+    """
+    Modo por lotes: ejecuta el archivo de consultas sin interacción.
+    
+    Las herramientas sensibles solo están disponibles con --allow-sensitive.
+    
+    Returns:
+        Código de salida de run_batch
+    """
+    PermissionChecker.check_and_warn()
+    controller, tool_manager, interpreter, memory = setup_agent()
+    try:
+        return run_batch(
+            network_security_analyzer_agent, tool_manager, args.batch, workers=args.workers,
+            retries=args.retries, timeout=args.query_timeout,
+            output=args.batch_output, template=args.template,
+            allow_sensitive=args.allow_sensitive
+        )
+    finally:
+        memory.close()
+        controller.close()
+
+
+def run_serve_mode(args: argparse.Namespace) -> int:
+    """
+    Modo servidor: expone herramientas, sesiones y consultas por HTTP.
+    
+    Fuera de loopback exige SERVE_TOKEN (o --insecure).
+    
+    Returns:
+        Código de salida (2 si la dirección de escucha se rechaza)
+    """
+    try:
+        check_bind_address(args.host, os.getenv("SERVE_TOKEN"), args.insecure)
+    except ValueError as e:
+        CLI.print_error(str(e))
+        return 2
+    
+    PermissionChecker.check_and_warn()
+    controller, tool_manager, interpreter, memory = setup_agent()
+    try:
+        run_api_server(network_security_analyzer_agent, tool_manager, host=args.host, port=args.port,
+                       insecure=args.insecure)
+        return 0
+    finally:
+        memory.close()
+        controller.close()
+
+
 def main():
     """Función principal del programa - Inicia directamente en modo interactivo"""
+    args = parse_args()
+    
+    if args.bench_startup_child:
+        run_startup_bench_child()
+        return
+    
+    if args.bench_startup:
+        try:
+            phase_budgets = {
+                name.strip(): float(ms)
+                for name, ms in (item.split("=", 1) for item in args.phase_budget)
+            }
+        except ValueError:
+            CLI.print_error("Formato de --phase-budget inválido (usa FASE=MS)")
+            sys.exit(2)
+        try:
+            sys.exit(run_startup_benchmark(
+                os.path.abspath(__file__), runs=args.bench_runs, budget_ms=args.budget_ms,
+                phase_budgets=phase_budgets, output=args.bench_output
+            ))
+        except RuntimeError as e:
+            CLI.print_error(str(e))
+            sys.exit(1)
+    
+    if args.batch:
+        sys.exit(run_batch_mode(args))
+    
+    if args.serve:
+        sys.exit(run_serve_mode(args))
+    
     try:
         # Mostrar banner principal
         CLI.print_banner()
@@ -385,6 +491,7 @@ def main():
         print("  /examples       - Ver ejemplos de uso")
         print("  /status         - Estado del sistema y sesión")
         print("  /cost           - Ver costos de API")
+        print("  /metrics        - Telemetría de herramientas")
         print("  /exit, /quit    - Salir\n")
         
         # Mostrar advertencias si es necesario
@@ -427,10 +534,17 @@ INSTRUCCIONES ADICIONALES - Fase 1 MVP:
    - nmap_scan_tool: Escanea puertos y servicios
    - nmap_ping_sweep: Descubre hosts activos
    - whois_lookup_tool: Consulta información de dominios
+   - bulk_whois_lookup_tool: WHOIS de varios dominios/IPs en paralelo
    - dns_lookup_tool: Resuelve nombres de dominio
    - reverse_dns_lookup_tool: DNS inverso
+   - bulk_dns_lookup_tool: Resuelve muchos dominios a la vez (A/AAAA)
+   - bulk_reverse_dns_lookup_tool: DNS inverso de muchas IPs o de una red CIDR
+   - recon_pipeline_tool: Perfila una red completa (hosts, DNS inverso, WHOIS y puertos) en UNA sola llamada.
+     Prefiérela a encadenar nmap_ping_sweep + reverse_dns_lookup_tool + nmap_scan_tool host por host.
    - analyze_log_tool: Analiza archivos de log
    - tail_log_tool: Muestra últimas líneas de log
+   - read_artifact_tool: Lee por páginas el output completo de un resultado compactado.
+     Los resultados grandes llegan resumidos con un ID de artefacto; úsala solo si necesitas más detalle.
 
 5. **GENERACIÓN AUTOMÁTICA DE REPORTES (CRÍTICO: FORMATO)**:
    - Si detectas el marcador `---REPORTE_REQUERIDO:ANALYSIS---`, debes hacer dos cosas:
@@ -525,6 +639,10 @@ RECUERDA: Tu objetivo es hacer la ciberseguridad accesible para usuarios sin con
             print("\n")
             CLI.print_info("Sesión interrumpida por el usuario")
         
+        # Volcar el diario de memoria y las acciones pendientes
+        memory.close()
+        controller.close()
+        
         # Mostrar resumen final al salir
         summary = controller.get_session_summary()
         if summary['total_actions'] > 0:
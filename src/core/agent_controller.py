@@ -6,9 +6,10 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 from cai.sdk.agents import Agent
 from cai.agents.network_traffic_analyzer import network_security_analyzer_agent
-import json
 import os
 
+from ..models.event_store import EventStore, EventKind
+
 
 class CybersecurityAgent:
     """
@@ -41,9 +42,14 @@ class CybersecurityAgent:
         # Crear directorio de logs si no existe
         os.makedirs(log_dir, exist_ok=True)
         
+        # Registro único de eventos de la sesión (acciones y memoria conversacional),
+        # escrito en segundo plano por un solo hilo
+        self.log_file = os.path.join(log_dir, f"{self.session_id}.jsonl")
+        self.events = EventStore(self.log_file, self.session_id)
+        
         print(f"[*] Agente de Ciberseguridad iniciado")
         print(f"[*] Session ID: {self.session_id}")
-        print(f"[*] Logs: {self.log_dir}/{self.session_id}.json\n")
+        print(f"[*] Logs: {self.log_file}\n")
     
     def _generate_session_id(self) -> str:
         """Genera un ID único para la sesión actual"""
@@ -142,19 +148,19 @@ class CybersecurityAgent:
     
     def _log_action(self, action_type: str, data: Dict[str, Any]):
         """Registra una acción en el historial de la sesión"""
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
+        # Solo se encola: el hilo escritor del registro lo agrega al JSONL
+        event = self.events.append(EventKind.ACTION, {"action_type": action_type, "data": data})
+        
+        self.action_history.append({
+            "timestamp": event["timestamp"],
             "session_id": self.session_id,
             "action_type": action_type,
             "data": data
-        }
-        
-        self.action_history.append(log_entry)
-        
-        # Guardar en archivo
-        log_file = os.path.join(self.log_dir, f"{self.session_id}.json")
-        with open(log_file, 'w') as f:
-            json.dump(self.action_history, f, indent=2)
+        })
+    
+    def close(self):
+        """Escribe los eventos pendientes y cierra el registro de la sesión"""
+        self.events.close()
     
     def get_session_summary(self) -> Dict[str, Any]:
         """Obtiene un resumen de la sesión actual"""
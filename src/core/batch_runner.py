@@ -0,0 +1,322 @@
+"""
+BatchRunner: Ejecución no interactiva de un archivo de consultas
+
+`python main.py --batch consultas.txt --workers N` ejecuta cada consulta en
+un contexto de agente propio (clon del agente con su propio historial), con
+hasta N consultas a la vez sobre un mismo event loop. Cada resultado se
+agrega a un JSONL apenas termina, con su duración, los intentos y el error
+si falló tras los reintentos.
+
+Como nadie puede confirmar acciones durante un lote, las herramientas
+sensibles (nmap, sniffer, pipeline de reconocimiento) no se le ofrecen al
+agente salvo con --allow-sensitive.
+
+Formato del archivo de consultas:
+- Una consulta por línea (las vacías y las que empiezan con '#' se ignoran).
+- O líneas JSON {"id": "...", "query": "..."}.
+- Con --template, cada línea es un elemento (p. ej. un host del inventario)
+  que se inserta en la plantilla: --template "escanea los puertos de {item}".
+"""
+
+import asyncio
+import copy
+import json
+import os
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from cai.sdk.agents import Runner
+
+
+class BatchQuery:
+    """Consulta del lote"""
+
+    def __init__(self, query_id: str, query: str, line: int):
+        self.query_id = query_id
+        self.query = query
+        self.line = line
+
+
+def load_queries(path: str, template: Optional[str] = None) -> List[BatchQuery]:
+    """
+    Lee el archivo de consultas.
+
+    Args:
+        path: Archivo de consultas (texto o JSONL)
+        template: Plantilla con '{item}' para armar la consulta de cada línea
+
+    Returns:
+        Lista de consultas en el orden del archivo
+    """
+    queries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, raw in enumerate(f, 1):
+            line = raw.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            query_id = str(len(queries) + 1)
+            if line.startswith('{'):
+                try:
+                    data = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"Línea {line_number}: JSON inválido ({e})")
+                query_id = str(data.get("id", query_id))
+                line = data.get("query") or data.get("item") or ""
+                if not line:
+                    raise ValueError(f"Línea {line_number}: falta 'query'")
+
+            query = template.replace("{item}", line) if template else line
+            queries.append(BatchQuery(query_id, query, line_number))
+    return queries
+
+
+def isolated_agent(agent: Any, model: Any = None, **overrides) -> Any:
+    """
+    Copia del agente con su propio historial de mensajes.
+
+    Las herramientas, instrucciones y el cliente del modelo se comparten; lo
+    que no se comparte es agent.model.message_history, donde CAI guarda la
+    conversación.
+
+    Args:
+        agent: Agente base
+        model: Modelo a usar (por defecto, una copia del modelo del agente con
+               el historial vacío); pasar el de otra copia comparte su historial
+        **overrides: Atributos a reemplazar en la copia (tools, instructions...)
+    """
+    if model is None:
+        model = getattr(agent, 'model', None)
+        if model is not None and not isinstance(model, str):
+            model = copy.copy(model)
+            if hasattr(model, 'message_history'):
+                model.message_history = []
+
+    if hasattr(agent, 'clone'):
+        return agent.clone(model=model, **overrides)
+
+    clone = copy.copy(agent)
+    clone.model = model
+    for name, value in overrides.items():
+        setattr(clone, name, value)
+    return clone
+
+
+UNATTENDED_INSTRUCTIONS = """
+
+MODO NO INTERACTIVO:
+- No hay un usuario que pueda responder preguntas ni confirmar acciones: no
+  pidas confirmación, responde con lo que puedas hacer con las herramientas
+  disponibles.
+{sensitive}
+"""
+
+
+def unattended_agent(agent: Any, tool_manager: Any, allow_sensitive: bool = False,
+                     model: Any = None) -> Any:
+    """
+    Copia aislada del agente para ejecutar sin un usuario presente (lotes, API).
+
+    Sin autorización explícita (allow_sensitive) las herramientas sensibles
+    no se le ofrecen al modelo, porque nadie puede confirmar su ejecución
+    (ver ToolManager.partition_unattended).
+
+    Args:
+        agent: Agente base
+        tool_manager: ToolManager con los metadatos de las herramientas
+        allow_sensitive: Ofrecer también las herramientas sensibles
+        model: Modelo a usar (ver isolated_agent)
+    """
+    tools, blocked = tool_manager.partition_unattended(list(getattr(agent, 'tools', [])), allow_sensitive)
+    if blocked:
+        sensitive = ("- Estas herramientas sensibles NO están disponibles en este modo: "
+                     f"{', '.join(blocked)}. Si la tarea las necesita, explica que requieren "
+                     "autorización explícita.")
+    else:
+        sensitive = "- La ejecución de herramientas sensibles ya fue autorizada al lanzar esta tarea."
+    note = UNATTENDED_INSTRUCTIONS.format(sensitive=sensitive)
+
+    original = getattr(agent, 'instructions', None)
+
+    def instructions(context, current_agent):
+        base = original(context, current_agent) if callable(original) else str(original or "")
+        return base + note
+
+    return isolated_agent(agent, model=model, tools=tools, instructions=instructions)
+
+
+class BatchRunner:
+    """
+    Ejecuta un lote de consultas con un pool de workers asíncronos.
+    """
+
+    def __init__(self, agent: Any, tool_manager: Any, workers: int = 4, retries: int = 2,
+                 timeout: float = 600.0, max_turns: int = 20, allow_sensitive: bool = False):
+        """
+        Inicializa el ejecutor.
+
+        Args:
+            agent: Agente base (cada consulta usa un clon aislado)
+            tool_manager: ToolManager con los metadatos de las herramientas
+            workers: Consultas simultáneas
+            retries: Reintentos por consulta tras un fallo (con espera exponencial)
+            timeout: Segundos máximos por intento
+            max_turns: Turnos máximos del Runner por consulta
+            allow_sensitive: Permitir herramientas sensibles (sin confirmación por consulta)
+        """
+        self.agent = agent
+        self.tool_manager = tool_manager
+        self.allow_sensitive = allow_sensitive
+        self.workers = max(1, workers)
+        self.retries = max(0, retries)
+        self.timeout = timeout
+        self.max_turns = max_turns
+
+    async def run_query(self, item: BatchQuery) -> Dict[str, Any]:
+        """
+        Ejecuta una consulta con reintentos.
+
+        Returns:
+            Registro del resultado (ver run())
+        """
+        started_at = datetime.now().isoformat()
+        start = time.perf_counter()
+        attempts = []
+
+        for attempt in range(1, self.retries + 2):
+            attempt_start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(
+                    Runner.run(starting_agent=unattended_agent(self.agent, self.tool_manager, self.allow_sensitive),
+                               input=item.query, max_turns=self.max_turns),
+                    timeout=self.timeout
+                )
+                attempts.append({"attempt": attempt, "duration_s": round(time.perf_counter() - attempt_start, 3)})
+                return {
+                    "id": item.query_id,
+                    "query": item.query,
+                    "status": "ok",
+                    "output": str(getattr(result, 'final_output', '') or ''),
+                    "attempts": attempts,
+                    "started_at": started_at,
+                    "duration_s": round(time.perf_counter() - start, 3)
+                }
+            except asyncio.TimeoutError:
+                error = f"Tiempo agotado ({self.timeout:g}s)"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+
+            attempts.append({"attempt": attempt, "duration_s": round(time.perf_counter() - attempt_start, 3),
+                             "error": error})
+            if attempt <= self.retries:
+                await asyncio.sleep(min(30, 2 ** (attempt - 1)))
+
+        return {
+            "id": item.query_id,
+            "query": item.query,
+            "status": "error",
+            "error": attempts[-1]["error"],
+            "attempts": attempts,
+            "started_at": started_at,
+            "duration_s": round(time.perf_counter() - start, 3)
+        }
+
+    async def run(self, queries: List[BatchQuery], output: str) -> Dict[str, Any]:
+        """
+        Ejecuta todas las consultas y escribe un registro JSONL por cada una.
+
+        Args:
+            queries: Consultas del lote
+            output: Archivo JSONL de resultados
+
+        Returns:
+            Resumen {'total', 'ok', 'failed', 'wall_s', 'query_s', 'output'}
+        """
+        directory = os.path.dirname(output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        pending: asyncio.Queue = asyncio.Queue()
+        for item in queries:
+            pending.put_nowait(item)
+
+        summary = {"total": len(queries), "ok": 0, "failed": 0, "output": output}
+        durations: List[float] = []
+        start = time.perf_counter()
+
+        with open(output, 'a', encoding='utf-8') as out:
+            async def worker():
+                while True:
+                    try:
+                        item = pending.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    record = await self.run_query(item)
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+
+                    durations.append(record["duration_s"])
+                    summary["ok" if record["status"] == "ok" else "failed"] += 1
+                    icon = "✅" if record["status"] == "ok" else "❌"
+                    done = summary["ok"] + summary["failed"]
+                    print(f"[{done}/{summary['total']}] {icon} #{record['id']} "
+                          f"({record['duration_s']:.1f}s, {len(record['attempts'])} intento(s)) "
+                          f"{item.query[:60]}")
+
+            await asyncio.gather(*(worker() for _ in range(min(self.workers, len(queries)) or 1)))
+
+        summary["wall_s"] = round(time.perf_counter() - start, 3)
+        summary["query_s"] = round(sum(durations), 3)
+        return summary
+
+
+def run_batch(agent: Any, tool_manager: Any, path: str, workers: int = 4, retries: int = 2,
+              timeout: float = 600.0, output: Optional[str] = None,
+              template: Optional[str] = None, allow_sensitive: bool = False) -> int:
+    """
+    Punto de entrada de `main.py --batch`.
+
+    Las herramientas sensibles solo se ofrecen al agente con allow_sensitive
+    (`--allow-sensitive`): en un lote nadie puede confirmarlas.
+
+    Returns:
+        Código de salida: 0 si todas las consultas terminaron bien, 1 si alguna falló
+    """
+    try:
+        queries = load_queries(path, template)
+    except (OSError, ValueError) as e:
+        print(f"❌ No se pudo leer el archivo de consultas: {e}")
+        return 2
+
+    if not queries:
+        print(f"⚠️  {path} no tiene consultas")
+        return 0
+
+    output = output or os.path.join(
+        "logs", "batch", f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    )
+    print(f"[*] Lote: {len(queries)} consultas, {workers} workers, {retries} reintentos → {output}")
+    _, blocked = tool_manager.partition_unattended(list(getattr(agent, 'tools', [])))
+    if allow_sensitive:
+        print("⚠️  --allow-sensitive: el agente puede ejecutar herramientas sensibles sin confirmación\n")
+    elif blocked:
+        print(f"[*] Herramientas sensibles deshabilitadas (usa --allow-sensitive): {', '.join(blocked)}\n")
+    else:
+        print()
+
+    runner = BatchRunner(agent, tool_manager, workers=workers, retries=retries, timeout=timeout,
+                         allow_sensitive=allow_sensitive)
+    summary = asyncio.run(runner.run(queries, output))
+
+    print("\n" + "=" * 70)
+    print("📋 RESUMEN DEL LOTE")
+    print("=" * 70)
+    print(f"✅ Correctas: {summary['ok']}   ❌ Fallidas: {summary['failed']}   Total: {summary['total']}")
+    print(f"⏱️  Tiempo total: {summary['wall_s']:.1f}s (suma de consultas: {summary['query_s']:.1f}s)")
+    print(f"📁 Resultados: {summary['output']}")
+    print("=" * 70 + "\n")
+    return 0 if not summary["failed"] else 1
+
+
+__all__ = ['BatchRunner', 'BatchQuery', 'load_queries', 'isolated_agent', 'unattended_agent', 'run_batch']
@@ -0,0 +1,247 @@
+"""
+ContextWindowManager: Historial de una sesión reanudada ajustado a un presupuesto de tokens
+
+Al reanudar una sesión no se reinyecta la transcripción completa: los últimos
+K turnos se mantienen literales y los turnos anteriores se reemplazan por
+resúmenes extractivos de bloques fijos (checkpoints). Los resúmenes se
+guardan junto a la sesión en `memory/{session_id}_memory_summaries.json`,
+así que cada bloque se resume una sola vez aunque la sesión se cargue muchas.
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Iterable, List, Dict, Any
+
+from .output_compactor import estimate_tokens
+
+
+# Datos que vale la pena conservar en los resúmenes (IPs, puertos, CVEs, dominios)
+_KEY_FACTS = re.compile(
+    r'\b(?:\d{1,3}\.){3}\d{1,3}(?:/\d{1,2})?\b'
+    r'|\b\d{1,5}/(?:tcp|udp)\b'
+    r'|\bCVE-\d{4}-\d{4,}\b'
+    r'|\b(?:[a-z0-9-]+\.)+(?:com|net|org|io|local|lan|edu|gov)\b',
+    re.IGNORECASE
+)
+
+_SUMMARY_HEADER = "📋 Resumen de la conversación anterior"
+
+
+def _first_line(text: str, limit: int) -> str:
+    """Primera línea con contenido, truncada"""
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if line:
+            return line[:limit] + ("..." if len(line) > limit else "")
+    return ""
+
+
+class ContextWindowManager:
+    """
+    Construye el historial que se inyecta al agente al reanudar una sesión.
+    """
+
+    def __init__(self, memory_dir: str = "memory", keep_turns: int = 10,
+                 token_budget: int = 8000, span_turns: int = 10):
+        """
+        Inicializa el gestor.
+
+        Args:
+            memory_dir: Directorio donde se guardan los resúmenes
+            keep_turns: Turnos recientes que se inyectan literalmente
+            token_budget: Tokens máximos del historial inyectado (0 desactiva los resúmenes)
+            span_turns: Turnos que cubre cada bloque resumido
+        """
+        self.memory_dir = memory_dir
+        self.keep_turns = max(1, keep_turns)
+        self.token_budget = token_budget
+        self.span_turns = max(1, span_turns)
+        self.last_stats: Dict[str, Any] = {}
+
+    def _get_summaries_file(self, session_id: str) -> str:
+        """Archivo de resúmenes de la sesión"""
+        return os.path.join(self.memory_dir, f"{session_id}_memory_summaries.json")
+
+    # ------------------------------------------------------------------
+    # Construcción del contexto
+    # ------------------------------------------------------------------
+
+    def build_context(self, session_id: str, messages: Iterable[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """
+        Arma el historial a inyectar: resúmenes de los bloques antiguos + turnos recientes.
+
+        Args:
+            session_id: ID de la sesión (clave de la caché de resúmenes)
+            messages: Mensajes de la sesión en orden (puede ser un generador)
+
+        Returns:
+            Lista de mensajes {'role', 'content'} lista para message_history
+        """
+        turns = self._group_turns(messages)
+        full_tokens = sum(self._turn_tokens(turn) for turn in turns)
+
+        # Si la transcripción completa cabe en el presupuesto, no se resume nada
+        if not self.token_budget or full_tokens <= self.token_budget:
+            history = [message for turn in turns for message in turn]
+            self._set_stats(len(turns), 0, full_tokens, full_tokens)
+            return history
+
+        # Solo se resumen bloques completos que queden fuera de los K turnos recientes
+        summarized_spans = max(0, len(turns) - self.keep_turns) // self.span_turns
+        split = summarized_spans * self.span_turns
+
+        cache = self._load_cache(session_id)
+        summaries = [self._get_span_summary(cache, turns, index) for index in range(summarized_spans)]
+        if cache.pop('_dirty', False):
+            self._save_cache(session_id, cache)
+
+        recent = turns[split:]
+        extra: List[str] = []
+
+        # Ajustar al presupuesto: los turnos literales más antiguos pasan a resumen
+        while len(recent) > 1 and self._estimate(summaries, extra, recent) > self.token_budget:
+            extra.append(self._summarize_turn(recent.pop(0)))
+
+        # Si aún no cabe, se omiten los bloques resumidos más antiguos
+        omitted = 0
+        while summaries and self._estimate(summaries, extra, recent) > self.token_budget:
+            summaries.pop(0)
+            omitted += 1
+
+        history: List[Dict[str, str]] = []
+        summary_text = self._format_summary(summaries, extra, omitted, len(turns) - len(recent))
+        if summary_text:
+            history.append({'role': 'user', 'content': summary_text})
+        for turn in recent:
+            history.extend(turn)
+
+        injected_tokens = sum(estimate_tokens(m['content']) for m in history)
+        self._set_stats(len(turns), len(turns) - len(recent), full_tokens, injected_tokens)
+        return history
+
+    def _group_turns(self, messages: Iterable[Dict[str, Any]]) -> List[List[Dict[str, str]]]:
+        """Agrupa los mensajes en turnos (cada mensaje de usuario abre uno)"""
+        turns: List[List[Dict[str, str]]] = []
+        for msg in messages:
+            content = msg.get('content')
+            if content is None or msg.get('role') not in ('user', 'assistant'):
+                continue
+            entry = {'role': msg['role'], 'content': content}
+            if msg['role'] == 'user' or not turns:
+                turns.append([entry])
+            else:
+                turns[-1].append(entry)
+        return turns
+
+    def _turn_tokens(self, turn: List[Dict[str, str]]) -> int:
+        """Tokens estimados de un turno"""
+        return sum(estimate_tokens(m['content']) for m in turn)
+
+    def _estimate(self, summaries: List[str], extra: List[str], recent: List[List[Dict[str, str]]]) -> int:
+        """Tokens estimados del contexto resultante"""
+        return (sum(estimate_tokens(s) for s in summaries + extra)
+                + sum(self._turn_tokens(turn) for turn in recent))
+
+    def _set_stats(self, total_turns: int, summarized_turns: int, full_tokens: int, injected_tokens: int):
+        """Guarda las métricas de la última construcción"""
+        self.last_stats = {
+            "total_turns": total_turns,
+            "summarized_turns": summarized_turns,
+            "verbatim_turns": total_turns - summarized_turns,
+            "full_tokens": full_tokens,
+            "injected_tokens": injected_tokens,
+            "tokens_saved": max(0, full_tokens - injected_tokens)
+        }
+
+    # ------------------------------------------------------------------
+    # Resúmenes
+    # ------------------------------------------------------------------
+
+    def _summarize_turn(self, turn: List[Dict[str, str]]) -> str:
+        """Resumen extractivo de un turno: petición, primera línea de la respuesta y datos clave"""
+        request = next((m['content'] for m in turn if m['role'] == 'user'), "")
+        responses = "\n".join(m['content'] for m in turn if m['role'] == 'assistant')
+
+        line = f"• 👤 {_first_line(request, 120) or '(sin texto)'}"
+        answer = _first_line(responses, 160)
+        if answer:
+            line += f" → 🤖 {answer}"
+
+        facts = []
+        for match in _KEY_FACTS.findall(responses):
+            if match not in facts:
+                facts.append(match)
+        if facts:
+            line += f" [datos: {', '.join(facts[:8])}]"
+        return line
+
+    def _get_span_summary(self, cache: Dict[str, Any], turns: List[List[Dict[str, str]]], index: int) -> str:
+        """Resumen de un bloque, desde la caché si su contenido no cambió"""
+        span = turns[index * self.span_turns:(index + 1) * self.span_turns]
+        digest = hashlib.sha1(
+            json.dumps(span, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+
+        cached = cache['spans'].get(str(index))
+        if cached and cached.get('digest') == digest:
+            return cached['summary']
+
+        first = index * self.span_turns + 1
+        summary = f"Turnos {first}-{first + len(span) - 1}:\n" + "\n".join(
+            self._summarize_turn(turn) for turn in span
+        )
+        cache['spans'][str(index)] = {'digest': digest, 'summary': summary}
+        cache['_dirty'] = True
+        return summary
+
+    def _format_summary(self, summaries: List[str], extra: List[str], omitted: int, summarized_turns: int) -> str:
+        """Arma el mensaje de resumen que precede a los turnos literales"""
+        if not summaries and not extra:
+            return ""
+
+        parts = [f"{_SUMMARY_HEADER} ({summarized_turns} turnos resumidos para ahorrar contexto):"]
+        if omitted:
+            parts.append(f"({omitted} bloques más antiguos omitidos por el presupuesto de tokens)")
+        parts.extend(summaries)
+        if extra:
+            parts.append("\n".join(extra))
+        return "\n\n".join(parts)
+
+    # ------------------------------------------------------------------
+    # Caché en disco
+    # ------------------------------------------------------------------
+
+    def _load_cache(self, session_id: str) -> Dict[str, Any]:
+        """Carga los resúmenes guardados (invalida la caché si cambió span_turns)"""
+        cache = {'span_turns': self.span_turns, 'spans': {}}
+        try:
+            with open(self._get_summaries_file(session_id), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('span_turns') == self.span_turns and isinstance(data.get('spans'), dict):
+                cache['spans'] = data['spans']
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"[!] Resúmenes de la sesión ilegibles, se regenerarán: {e}")
+        return cache
+
+    def _save_cache(self, session_id: str, cache: Dict[str, Any]):
+        """Guarda los resúmenes de forma atómica"""
+        try:
+            os.makedirs(self.memory_dir, exist_ok=True)
+            summaries_file = self._get_summaries_file(session_id)
+            tmp_file = summaries_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_file, summaries_file)
+        except OSError as e:
+            print(f"[!] No se pudieron guardar los resúmenes de la sesión: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de la última construcción (tokens ahorrados por llamada al LLM)"""
+        return dict(self.last_stats)
+
+
+__all__ = ['ContextWindowManager']
@@ -159,6 +159,8 @@ class ResultInterpreter:
         Returns:
             Diccionario con interpretación simplificada
         """
+        from ..tools.whois_client import parse_whois_response
+        
         interpretation = {
             "summary": "Información de registro de dominio",
             "findings": [],
@@ -168,16 +170,14 @@ class ResultInterpreter:
         }
         
         # Extraer información clave
-        registrar = re.search(r'Registrar:\s*(.+)', raw_output)
-        creation_date = re.search(r'Creation Date:\s*(.+)', raw_output)
-        expiration_date = re.search(r'Expiration Date:\s*(.+)', raw_output)
-        
-        if registrar:
-            interpretation["findings"].append(f"Registrador: {registrar.group(1)}")
-        if creation_date:
-            interpretation["findings"].append(f"Fecha de creación: {creation_date.group(1)}")
-        if expiration_date:
-            interpretation["findings"].append(f"Fecha de expiración: {expiration_date.group(1)}")
+        record = parse_whois_response(raw_output)
+        
+        if record.get("registrar"):
+            interpretation["findings"].append(f"Registrador: {record['registrar']}")
+        if record.get("creation_date"):
+            interpretation["findings"].append(f"Fecha de creación: {record['creation_date']}")
+        if record.get("expiration_date"):
+            interpretation["findings"].append(f"Fecha de expiración: {record['expiration_date']}")
         
         interpretation["simple_explanation"] = (
             "WHOIS proporciona información pública sobre quién registró un dominio web. "
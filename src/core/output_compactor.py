@@ -0,0 +1,124 @@
+"""
+OutputCompactor: Limita los tokens que cada resultado de herramienta envía al LLM
+
+Los outputs grandes (escaneos completos, logs) se guardan como artefacto en
+disco y en el historial queda solo el resumen, los hallazgos principales y
+la referencia para paginar el contenido completo con read_artifact_tool.
+"""
+
+from typing import Dict, Any, List, Optional
+
+from ..models.artifact_store import ArtifactStore, get_artifact_store
+from ..models.tool_results import ToolResult, REPORT_MARKER
+
+
+# Aproximación estándar: ~4 caracteres por token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación rápida de tokens de un texto"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+class OutputCompactor:
+    """
+    Compacta resultados de herramientas que exceden un presupuesto de tokens.
+    """
+
+    def __init__(self, token_budget: int = 1500, top_k: int = 10,
+                 store: Optional[ArtifactStore] = None):
+        """
+        Inicializa el compactador.
+
+        Args:
+            token_budget: Tokens máximos por resultado enviado al LLM
+            top_k: Hallazgos que se mantienen en línea
+            store: Almacén de artefactos (por defecto, el compartido)
+        """
+        self.token_budget = token_budget
+        self.top_k = top_k
+        self.store = store or get_artifact_store()
+        self.stats = {"results": 0, "compacted": 0, "tokens_in": 0, "tokens_out": 0}
+
+    def compact(self, result: Any, tool_name: str, token_budget: Optional[int] = None) -> str:
+        """
+        Convierte un resultado en el texto que recibirá el LLM.
+
+        Args:
+            result: Resultado de la herramienta (ToolResult o cualquier objeto)
+            tool_name: Nombre de la herramienta
+            token_budget: Presupuesto específico de la herramienta (0 desactiva)
+
+        Returns:
+            Texto completo si cabe en el presupuesto, o versión compacta
+        """
+        text = str(result)
+        budget = self.token_budget if token_budget is None else token_budget
+        tokens = estimate_tokens(text)
+
+        self.stats["results"] += 1
+        self.stats["tokens_in"] += tokens
+
+        if not budget or tokens <= budget:
+            self.stats["tokens_out"] += tokens
+            return text
+
+        artifact_id = self.store.save(text, tool_name)
+        compacted = self._build_compact_text(result, text, artifact_id, budget)
+
+        self.stats["compacted"] += 1
+        self.stats["tokens_out"] += estimate_tokens(compacted)
+        print(f"[*] Output de {tool_name} compactado: ~{tokens} → ~{estimate_tokens(compacted)} tokens "
+              f"(artefacto: {artifact_id})")
+        return compacted
+
+    def _build_compact_text(self, result: Any, text: str, artifact_id: str, budget: int) -> str:
+        """Arma la versión compacta: resumen + top-K hallazgos + referencia"""
+        lines = len(text.splitlines())
+
+        if isinstance(result, ToolResult):
+            summary = result.summary()
+            findings = result.findings()
+            marker = REPORT_MARKER if result.report_required else ""
+        else:
+            summary = text.strip().split('\n')[0]
+            findings = [line for line in text.split('\n')[1:] if line.strip()]
+            marker = ""
+
+        header = f"{summary}\n\n"
+        footer = (
+            f"\n📦 Output completo ({lines} líneas, ~{estimate_tokens(text)} tokens) guardado "
+            f"como artefacto '{artifact_id}'.\n"
+            f"   Usa read_artifact_tool('{artifact_id}', page=1) para consultarlo por páginas."
+            f"{marker}"
+        )
+
+        # Hallazgos que caben en el presupuesto restante
+        remaining = budget * CHARS_PER_TOKEN - len(header) - len(footer)
+        kept: List[str] = []
+        for finding in findings[:self.top_k]:
+            line = f"  • {finding[:200]}\n"
+            if len(line) > remaining:
+                break
+            kept.append(line)
+            remaining -= len(line)
+
+        body = ""
+        if kept:
+            omitted = len(findings) - len(kept)
+            body = "🔍 HALLAZGOS PRINCIPALES:\n" + "".join(kept)
+            if omitted > 0:
+                body += f"  ... y {omitted} más en el artefacto\n"
+
+        return header + body + footer
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas de compactación (tokens ahorrados)"""
+        return {
+            **self.stats,
+            "tokens_saved": self.stats["tokens_in"] - self.stats["tokens_out"]
+        }
+
+
+__all__ = ['OutputCompactor', 'estimate_tokens', 'CHARS_PER_TOKEN']
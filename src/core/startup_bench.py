@@ -0,0 +1,225 @@
+"""
+Benchmark de arranque: tiempo hasta el prompt, desglosado por fase
+
+`python main.py --bench-startup` lanza el programa varias veces en procesos
+hijos (`--bench-startup-child`), cada uno mide sus fases con StartupTimer
+(imports, permisos, cada paso de setup_agent) y las devuelve como JSON. La
+primera ejecución es en frío (sin bytecode compilado ni manifiesto de
+herramientas) y las siguientes en caliente. El resultado se guarda en JSON y,
+si se supera el presupuesto, el comando termina con código de salida 1.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+
+# Prefijo de la línea con el resultado del proceso hijo
+BENCH_MARKER = "__STARTUP_BENCH__ "
+
+# Imports de primer nivel que se reportan (los más lentos)
+TOP_IMPORTS = 10
+
+
+class StartupTimer:
+    """
+    Acumula la duración (ms) de cada fase del arranque.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """Mide el bloque como la fase `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def record(self, name: str, elapsed_ms: float):
+        """Registra una duración medida por fuera"""
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Fases y total en ms"""
+        return {
+            "phases": {name: round(ms, 2) for name, ms in self.phases.items()},
+            "total_ms": round(sum(self.phases.values()), 2)
+        }
+
+
+def parse_importtime(stderr: str, top: int = TOP_IMPORTS) -> List[Dict[str, Any]]:
+    """
+    Extrae los imports de primer nivel más lentos de la salida de `-X importtime`.
+
+    Returns:
+        Lista de {'module', 'cumulative_ms'} ordenada de mayor a menor
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        # Sin sangría adicional = import de primer nivel
+        if name.startswith("  "):
+            continue
+        imports.append({"module": name.strip(), "cumulative_ms": round(int(parts[1]) / 1000, 2)})
+
+    imports.sort(key=lambda item: item["cumulative_ms"], reverse=True)
+    return imports[:top]
+
+
+def _run_child(main_path: str, workdir: str, env: Dict[str, str],
+               importtime: bool = False) -> Dict[str, Any]:
+    """
+    Lanza un proceso hijo de benchmark y devuelve sus mediciones.
+
+    Args:
+        importtime: Ejecutar con `-X importtime` (agrega 'slowest_imports', pero
+                    infla los tiempos: no se usa en las ejecuciones medidas)
+    """
+    command = [sys.executable, main_path, "--bench-startup-child"]
+    if importtime:
+        command[1:1] = ["-X", "importtime"]
+
+    start = time.perf_counter()
+    proc = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True, timeout=300)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    result = None
+    for line in proc.stdout.splitlines():
+        if line.startswith(BENCH_MARKER):
+            result = json.loads(line[len(BENCH_MARKER):])
+    if proc.returncode != 0 or result is None:
+        tail = (proc.stderr or proc.stdout).strip().splitlines()[-5:]
+        raise RuntimeError("El proceso de benchmark falló:\n" + "\n".join(tail))
+
+    result["wall_ms"] = round(wall_ms, 2)
+    # Arranque del intérprete y salida del proceso (lo que no mide el hijo)
+    result["interpreter_ms"] = round(wall_ms - result["total_ms"], 2)
+    if importtime:
+        result["slowest_imports"] = parse_importtime(proc.stderr)
+    return result
+
+
+def run_startup_benchmark(main_path: str, runs: int = 5, budget_ms: Optional[float] = None,
+                          phase_budgets: Optional[Dict[str, float]] = None,
+                          output: Optional[str] = None) -> int:
+    """
+    Ejecuta el benchmark de arranque completo.
+
+    Args:
+        main_path: Ruta de main.py
+        runs: Ejecuciones en caliente (además de la de frío)
+        budget_ms: Presupuesto del tiempo hasta el prompt en caliente (mediana de wall_ms)
+        phase_budgets: Presupuestos por fase en ms ({'imports': 1500, ...})
+        output: Archivo JSON de resultados (por defecto, logs/bench/startup_<fecha>.json)
+
+    Returns:
+        Código de salida: 0 si se cumplen los presupuestos, 1 si no
+    """
+    phase_budgets = phase_budgets or {}
+    main_path = os.path.abspath(main_path)
+    output = output or os.path.join(
+        "logs", "bench", f"startup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+
+    with tempfile.TemporaryDirectory(prefix="startup_bench_") as workdir:
+        # Directorio de trabajo y caché de bytecode propios: la primera ejecución
+        # compila todo y genera el manifiesto de herramientas (frío)
+        env = {**os.environ, "PYTHONPYCACHEPREFIX": os.path.join(workdir, "pycache")}
+
+        print(f"[*] Ejecución en frío...")
+        cold = _run_child(main_path, workdir, env)
+
+        warm = []
+        for i in range(max(1, runs)):
+            print(f"[*] Ejecución en caliente {i + 1}/{max(1, runs)}...")
+            warm.append(_run_child(main_path, workdir, env))
+
+        # Desglose de imports en una ejecución aparte (no cuenta para los tiempos)
+        slowest_imports = _run_child(main_path, workdir, env, importtime=True)["slowest_imports"]
+
+    phase_names = list(cold["phases"])
+    warm_summary = {
+        "wall_ms": round(statistics.median(r["wall_ms"] for r in warm), 2),
+        "interpreter_ms": round(statistics.median(r["interpreter_ms"] for r in warm), 2),
+        "phases": {
+            name: round(statistics.median(r["phases"].get(name, 0.0) for r in warm), 2)
+            for name in phase_names
+        }
+    }
+
+    violations = []
+    if budget_ms is not None and warm_summary["wall_ms"] > budget_ms:
+        violations.append(f"tiempo hasta el prompt {warm_summary['wall_ms']:.0f} ms > {budget_ms:.0f} ms")
+    for name, limit in phase_budgets.items():
+        measured = warm_summary["phases"].get(name)
+        if measured is not None and measured > limit:
+            violations.append(f"fase '{name}' {measured:.0f} ms > {limit:.0f} ms")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "runs": len(warm),
+        "cold": cold,
+        "warm": warm_summary,
+        "warm_runs": warm,
+        "slowest_imports": slowest_imports,
+        "budget_ms": budget_ms,
+        "phase_budgets": phase_budgets,
+        "violations": violations,
+        "passed": not violations
+    }
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print_benchmark_report(report)
+    print(f"📁 Resultados guardados en: {output}\n")
+    return 0 if report["passed"] else 1
+
+
+def print_benchmark_report(report: Dict[str, Any]):
+    """Imprime el resumen del benchmark"""
+    cold, warm = report["cold"], report["warm"]
+
+    print("\n" + "=" * 70)
+    print("⏱️  BENCHMARK DE ARRANQUE")
+    print("=" * 70)
+    print(f"\n{'Fase':<32} {'Frío (ms)':>12} {'Caliente (ms)':>15}")
+    print("-" * 70)
+    print(f"{'intérprete + salida':<32} {cold['interpreter_ms']:>12.1f} {warm['interpreter_ms']:>15.1f}")
+    for name, cold_ms in cold["phases"].items():
+        print(f"{name:<32} {cold_ms:>12.1f} {warm['phases'].get(name, 0.0):>15.1f}")
+    print("-" * 70)
+    print(f"{'TOTAL hasta el prompt':<32} {cold['wall_ms']:>12.1f} {warm['wall_ms']:>15.1f}")
+
+    if report["slowest_imports"]:
+        print("\n🐢 Imports de primer nivel más lentos:")
+        for item in report["slowest_imports"][:5]:
+            print(f"   • {item['module']:<40} {item['cumulative_ms']:>8.1f} ms")
+
+    print()
+    if report["violations"]:
+        for violation in report["violations"]:
+            print(f"❌ Presupuesto excedido: {violation}")
+    elif report["budget_ms"] is not None or report["phase_budgets"]:
+        print("✅ Dentro del presupuesto")
+    print()
+
+
+__all__ = ['StartupTimer', 'run_startup_benchmark', 'parse_importtime', 'BENCH_MARKER']
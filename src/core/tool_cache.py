@@ -0,0 +1,257 @@
+"""
+ToolResultCache: Memoización de resultados de herramientas deterministas
+
+Las preguntas repetidas dentro de una sesión (y entre sesiones) vuelven a
+pedir el mismo WHOIS, la misma resolución DNS o el mismo análisis de log.
+ToolManager envuelve las herramientas con metadato `cacheable` para que su
+resultado se guarde en dos niveles:
+
+- Memoria: LRU con el objeto resultado tal cual (ToolResult).
+- Disco: `cache/tools/{clave}.json` con los datos estructurados (to_dict)
+  y la vista de texto, que sobrevive entre ejecuciones y se reconstruye como
+  el mismo tipo de resultado al leerse.
+
+La clave es el nombre de la herramienta más sus argumentos (todos o los de
+`cache_key_fields`) y, para las herramientas que leen archivos, el mtime y
+tamaño de los archivos de `cache_file_fields`: si el archivo cambia, la
+entrada deja de coincidir. Las invocaciones con efectos secundarios (un
+argumento de `cache_bypass_fields` con valor, p. ej. save_to_file) no usan la
+caché. Los resultados fallidos (ok=False) no se guardan.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from ..models.tool_results import ToolResult, ToolMessage, result_from_dict
+
+
+# Vigencia por defecto de una entrada (segundos) si la herramienta no define cache_ttl
+DEFAULT_TTL = 3600
+
+
+class ToolResultCache:
+    """
+    Caché de resultados de herramientas en memoria (LRU) y en disco.
+    """
+
+    def __init__(self, max_entries: int = 512, cache_dir: Optional[str] = "cache/tools",
+                 default_ttl: int = DEFAULT_TTL):
+        """
+        Inicializa la caché.
+
+        Args:
+            max_entries: Entradas máximas en memoria
+            cache_dir: Directorio del nivel en disco (None lo desactiva)
+            default_ttl: Vigencia por defecto de las entradas (segundos)
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # clave -> (expira, resultado)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    # ------------------------------------------------------------------
+    # Claves
+    # ------------------------------------------------------------------
+
+    def make_key(self, tool_name: str, input_json: str, metadata: Dict[str, Any]) -> Optional[str]:
+        """
+        Calcula la clave de una invocación.
+
+        Args:
+            tool_name: Nombre de la herramienta
+            input_json: Argumentos de la invocación (JSON)
+            metadata: Metadatos de la herramienta (cache_key_fields, cache_file_fields,
+                      cache_bypass_fields)
+
+        Returns:
+            Clave hexadecimal, o None si la invocación no se puede cachear
+            (argumentos ilegibles, un archivo que no existe o un argumento
+            con efectos secundarios)
+        """
+        try:
+            args = json.loads(input_json or "{}")
+        except ValueError:
+            return None
+        if not isinstance(args, dict):
+            return None
+        if any(args.get(name) for name in metadata.get("cache_bypass_fields", [])):
+            return None
+
+        key_fields = metadata.get("cache_key_fields")
+        if key_fields:
+            args = {name: args.get(name) for name in key_fields}
+
+        files = {}
+        for name in metadata.get("cache_file_fields", []):
+            path = args.get(name)
+            try:
+                stat = os.stat(path)
+            except (OSError, TypeError):
+                return None
+            files[name] = [os.path.abspath(path), stat.st_mtime_ns, stat.st_size]
+
+        payload = json.dumps({"tool": tool_name, "args": args, "files": files},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Lectura y escritura
+    # ------------------------------------------------------------------
+
+    def get(self, tool_name: str, key: str) -> Optional[Any]:
+        """Obtiene un resultado vigente (memoria, luego disco) o None"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._count(tool_name, "memory_hits")
+                    return result
+                del self._entries[key]
+
+        data = self._load_disk(key)
+        if data is not None and data.get("expires_at", 0) > now:
+            result = self._restore(tool_name, data)
+            self._remember(key, data["expires_at"], result)
+            with self._lock:
+                self._count(tool_name, "disk_hits")
+            return result
+
+        with self._lock:
+            self._count(tool_name, "misses")
+        return None
+
+    def put(self, tool_name: str, key: str, result: Any, ttl: Optional[int] = None):
+        """
+        Guarda un resultado en ambos niveles.
+
+        Args:
+            tool_name: Nombre de la herramienta
+            key: Clave de make_key()
+            result: Resultado de la herramienta (no se guarda si ok=False)
+            ttl: Vigencia en segundos (por defecto, default_ttl)
+        """
+        if not getattr(result, "ok", True):
+            return
+
+        expires_at = time.time() + (ttl if ttl is not None else self.default_ttl)
+        self._remember(key, expires_at, result)
+        entry = {
+            "tool": tool_name,
+            "expires_at": expires_at,
+            "report_required": getattr(result, "report_required", False),
+            "text": str(result)
+        }
+        if isinstance(result, ToolResult):
+            entry["result"] = {"type": type(result).__name__, **result.to_dict()}
+        self._store_disk(key, entry)
+
+    @staticmethod
+    def _restore(tool_name: str, data: Dict[str, Any]) -> Any:
+        """Reconstruye el resultado de una entrada en disco (texto plano si no tiene datos)"""
+        if data.get("result"):
+            try:
+                return result_from_dict(data["result"], text=data.get("text", ""))
+            except (TypeError, ValueError):
+                pass
+        return ToolMessage(
+            tool=data.get("tool", tool_name),
+            report_required=data.get("report_required", False),
+            message=data.get("text", "")
+        )
+
+    def _remember(self, key: str, expires_at: float, result: Any):
+        """Agrega una entrada al nivel en memoria (desalojando la menos usada)"""
+        with self._lock:
+            self._entries[key] = (expires_at, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _count(self, tool_name: str, counter: str):
+        """Incrementa un contador de la herramienta (con el lock tomado)"""
+        tool_stats = self.stats.setdefault(tool_name, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+        tool_stats[counter] += 1
+
+    # ------------------------------------------------------------------
+    # Nivel en disco
+    # ------------------------------------------------------------------
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key[:32]}.json")
+
+    def _load_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        """Lee una entrada del disco"""
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store_disk(self, key: str, data: Dict[str, Any]):
+        """Guarda una entrada en disco (escritura atómica)"""
+        if not self.cache_dir:
+            return
+
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[!] No se pudo guardar la caché de herramientas: {e}")
+
+    # ------------------------------------------------------------------
+    # Estadísticas
+    # ------------------------------------------------------------------
+
+    def clear(self):
+        """Vacía el nivel en memoria y reinicia las estadísticas"""
+        with self._lock:
+            self._entries.clear()
+            self.stats.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Aciertos por nivel y tasa de aciertos, en total y por herramienta"""
+        with self._lock:
+            by_tool = {name: dict(counters) for name, counters in self.stats.items()}
+            entries = len(self._entries)
+
+        totals = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        for name, counters in by_tool.items():
+            for counter in totals:
+                totals[counter] += counters[counter]
+            lookups = sum(counters.values())
+            counters["hit_ratio"] = (counters["memory_hits"] + counters["disk_hits"]) / lookups if lookups else 0.0
+
+        lookups = sum(totals.values())
+        return {
+            "entries": entries,
+            **totals,
+            "hit_ratio": (totals["memory_hits"] + totals["disk_hits"]) / lookups if lookups else 0.0,
+            "by_tool": by_tool
+        }
+
+
+# Caché compartida por todas las herramientas del proceso
+shared_tool_cache = ToolResultCache(
+    max_entries=int(os.getenv("TOOL_CACHE_SIZE", "512")),
+    cache_dir=os.getenv("TOOL_CACHE_DIR", os.path.join("cache", "tools")) or None
+)
+
+
+__all__ = ['ToolResultCache', 'shared_tool_cache', 'DEFAULT_TTL']
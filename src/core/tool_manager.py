@@ -2,10 +2,135 @@
 ToolManager: Gestiona la carga y ejecución de herramientas (CAI + personalizadas)
 """
 
-from typing import List, Dict, Any, Callable
-from cai.sdk.agents import Agent, function_tool
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional
+from cai.sdk.agents import Agent, FunctionTool
+import asyncio
+import contextvars
+import dataclasses
+import functools
 import importlib
 import inspect
+import os
+import time
+import weakref
+
+from ..models.tool_results import record_result
+from .output_compactor import OutputCompactor
+from .tool_cache import ToolResultCache, shared_tool_cache
+from .tracing import get_tracer
+from .tool_metrics import (
+    ToolMetrics, shared_tool_metrics, mark_cache_hit,
+    STATUS_OK, STATUS_ERROR, STATUS_EXCEPTION
+)
+from .tool_manifest import (
+    TOOL_SPECS, MANIFEST_PATH, import_tool, source_digest,
+    describe_tool, load_manifest, save_manifest
+)
+
+
+# Llamadas simultáneas por categoría de herramienta (TOOL_CONCURRENCY_<CATEGORIA>)
+CATEGORY_CONCURRENCY = {
+    "network": 2,           # nmap/sniffer: procesos pesados y tráfico a la red
+    "reconnaissance": 8,    # WHOIS/DNS: esperas de red livianas
+    "analysis": 4,
+    "utility": 4,
+    "general": 4,
+}
+
+# Cómo se ejecuta cada herramienta (metadato 'executor')
+EXECUTOR_THREAD = "thread"  # Bloqueante (subprocess, sockets): hilo del pool
+EXECUTOR_ASYNC = "async"    # Asíncrona nativa: en el event loop del agente
+
+
+def _category_limit(category: str) -> int:
+    """Concurrencia máxima de una categoría"""
+    default = CATEGORY_CONCURRENCY.get(category, CATEGORY_CONCURRENCY["general"])
+    return max(1, int(os.getenv(f"TOOL_CONCURRENCY_{category.upper()}", str(default))))
+
+
+def _run_invocation(invoke: Callable, ctx: Any, input_json: str) -> Any:
+    """Ejecuta on_invoke_tool en un hilo del pool (con su propio event loop)"""
+    return asyncio.run(invoke(ctx, input_json))
+
+
+# Tipos de JSON Schema -> tipos de Python (bool no cuenta como número)
+_JSON_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list, tuple),
+    "object": (dict,),
+    "null": (type(None),),
+}
+
+
+def _get_tool_name(tool: Any) -> str:
+    """Nombre de una herramienta (FunctionTool de CAI o función)"""
+    if hasattr(tool, 'name'):
+        return tool.name
+    if hasattr(tool, '__name__'):
+        return tool.__name__
+    return str(tool)
+
+
+def extract_signature(tool: Any) -> Dict[str, Any]:
+    """
+    Extrae una sola vez los parámetros de una herramienta.
+    
+    Usa el esquema JSON de los FunctionTool (lo que ve el LLM) y, para
+    funciones normales, inspect.signature.
+    
+    Returns:
+        {'required': [...], 'optional': {nombre: default}, 'types': {nombre: tipos JSON},
+         'allow_extra': bool}
+    """
+    schema = getattr(tool, 'params_json_schema', None)
+    if isinstance(schema, dict):
+        properties = schema.get("properties", {}) or {}
+        required = set(schema.get("required", []) or [])
+        signature = {"required": [], "optional": {}, "types": {},
+                     "allow_extra": schema.get("additionalProperties", True) is not False}
+        for param_name, prop in properties.items():
+            # En esquemas estrictos todos figuran como requeridos: el default manda
+            if param_name in required and "default" not in prop:
+                signature["required"].append(param_name)
+            else:
+                signature["optional"][param_name] = prop.get("default")
+            types = _schema_types(prop)
+            if types:
+                signature["types"][param_name] = types
+        return signature
+    
+    signature = {"required": [], "optional": {}, "types": {}, "allow_extra": False}
+    try:
+        parameters = inspect.signature(tool).parameters
+    except (TypeError, ValueError):
+        signature["allow_extra"] = True
+        return signature
+    
+    for param_name, param in parameters.items():
+        if param.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD):
+            signature["allow_extra"] = True
+        elif param.default is inspect.Parameter.empty:
+            signature["required"].append(param_name)
+        else:
+            signature["optional"][param_name] = param.default
+    return signature
+
+
+def _schema_types(prop: Dict[str, Any]) -> List[str]:
+    """Tipos JSON admitidos por una propiedad (incluye anyOf de Optional[...])"""
+    declared = prop.get("type")
+    if isinstance(declared, str):
+        return [declared]
+    if isinstance(declared, list):
+        return list(declared)
+    types = []
+    for option in prop.get("anyOf", []) or []:
+        types.extend(_schema_types(option))
+    return types
 
 
 class ToolManager:
@@ -17,21 +142,58 @@ class ToolManager:
     - Cargar herramientas personalizadas
     - Listar herramientas disponibles
     - Ejecutar herramientas con validación
+    - Compactar outputs que exceden el presupuesto de tokens
+    - Memoizar resultados de herramientas deterministas
+    - Registrar telemetría por herramienta (latencia, bytes, errores)
+    - Registrar herramientas desde un manifiesto e importarlas al primer uso
     """
     
-    def __init__(self, agent: Agent):
+    def __init__(self, agent: Agent, token_budget: int = 1500,
+                 cache: Optional[ToolResultCache] = None,
+                 metrics: Optional[ToolMetrics] = None):
         """
         Inicializa el gestor de herramientas.
         
         Args:
             agent: Agente de CAI al que agregar herramientas
+            token_budget: Tokens máximos por resultado enviado al LLM
+                          (por herramienta: metadato 'token_budget', 0 desactiva)
+            cache: Caché de resultados de las herramientas 'cacheable'
+                   (por defecto, la compartida)
+            metrics: Telemetría de las invocaciones (por defecto, la compartida)
         """
         self.agent = agent
-        self.custom_tools: List[Callable] = []
+        # Registro por nombre: herramienta publicada al agente y sus parámetros
+        self.tools: Dict[str, Any] = {}
+        self.tool_signatures: Dict[str, Dict[str, Any]] = {}
         self.tool_metadata: Dict[str, Dict[str, Any]] = {}
+        self.compactor = OutputCompactor(token_budget=token_budget)
+        self.cache = cache or shared_tool_cache
+        self.metrics = metrics or shared_tool_metrics
+        # Herramientas registradas desde el manifiesto cuyo módulo ya se importó
+        self.loaded_tools: Dict[str, Any] = {}
+        
+        # Ejecución concurrente: pool para herramientas bloqueantes y un
+        # semáforo por categoría en cada event loop
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("TOOL_WORKERS", "16")), thread_name_prefix="tool"
+        )
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._enable_parallel_tool_calls()
         
         print("[*] ToolManager inicializado")
     
+    def _enable_parallel_tool_calls(self):
+        """Permite que el modelo pida varias herramientas en un mismo turno"""
+        settings = getattr(self.agent, 'model_settings', None)
+        if settings is not None and getattr(settings, 'parallel_tool_calls', False) is None:
+            settings.parallel_tool_calls = True
+    
+    @property
+    def custom_tools(self) -> List[Callable]:
+        """Herramientas registradas, en orden de registro"""
+        return list(self.tools.values())
+    
     def register_tool(self, tool_function: Callable, metadata: Dict[str, Any] = None):
         """
         Registra una herramienta personalizada en el agente.
@@ -39,21 +201,29 @@ class ToolManager:
         Args:
             tool_function: Función decorada con @function_tool
             metadata: Metadatos adicionales (descripción, categoría, sensibilidad)
+            
+        Raises:
+            ValueError: Si ya hay una herramienta registrada con ese nombre
         """
-        # Manejar FunctionTool objects de CAI
-        if hasattr(tool_function, 'name'):
-            tool_name = tool_function.name
-        elif hasattr(tool_function, '__name__'):
-            tool_name = tool_function.__name__
-        else:
-            tool_name = str(tool_function)
+        tool_name = _get_tool_name(tool_function)
+        if tool_name in self.tools:
+            raise ValueError(f"Herramienta '{tool_name}' ya registrada")
+        
+        # Parámetros extraídos una sola vez (validación sin inspección posterior)
+        self.tool_signatures[tool_name] = extract_signature(tool_function)
+        
+        # Ejecución concurrente acotada por categoría, caché de resultados,
+        # telemetría y compactación antes de llegar al LLM
+        tool_function = self._wrap_with_executor(tool_function, metadata or {})
+        tool_function = self._wrap_with_cache(tool_function, tool_name, metadata or {})
+        tool_function = self._wrap_with_metrics(tool_function, tool_name)
+        tool_function = self._wrap_with_compaction(tool_function, tool_name, metadata or {})
         
         # Agregar al agente
         if hasattr(self.agent, 'tools'):
             self.agent.tools.append(tool_function)
         
-        # Guardar en la lista de herramientas personalizadas
-        self.custom_tools.append(tool_function)
+        self.tools[tool_name] = tool_function
         
         # Guardar metadatos
         # Obtener descripción de la función
@@ -69,7 +239,8 @@ class ToolManager:
             "description": description,
             "category": "general",
             "is_sensitive": False,
-            "requires_root": False
+            "requires_root": False,
+            "executor": EXECUTOR_THREAD
         }
         
         if metadata:
@@ -79,6 +250,207 @@ class ToolManager:
         
         print(f"[+] Herramienta registrada: {tool_name}")
     
+    def _wrap_with_compaction(self, tool: Any, tool_name: str, metadata: Dict[str, Any]) -> Any:
+        """
+        Envuelve on_invoke_tool de un FunctionTool para aplicar el presupuesto de tokens.
+        
+        Returns:
+            Copia del FunctionTool con la invocación envuelta (o el original si no aplica)
+        """
+        original_invoke = getattr(tool, 'on_invoke_tool', None)
+        if original_invoke is None:
+            return tool
+        
+        compactor = self.compactor
+        token_budget = metadata.get("token_budget")
+        
+        async def invoke_with_compaction(ctx, input_json):
+            result = await original_invoke(ctx, input_json)
+            # El resultado estructurado queda en el contexto de la conversación (reportes)
+            record_result(ctx, result)
+            return compactor.compact(result, tool_name, token_budget)
+        
+        return self._replace_invoke(tool, invoke_with_compaction)
+    
+    def _wrap_with_cache(self, tool: Any, tool_name: str, metadata: Dict[str, Any]) -> Any:
+        """
+        Envuelve on_invoke_tool para memoizar el resultado (metadato 'cacheable').
+        
+        Metadatos:
+            cacheable: Activa la caché para la herramienta
+            cache_ttl: Vigencia de las entradas en segundos
+            cache_key_fields: Argumentos que forman la clave (por defecto, todos)
+            cache_file_fields: Argumentos con rutas de archivo cuyo mtime y tamaño
+                               forman parte de la clave
+            cache_bypass_fields: Argumentos con efectos secundarios: si tienen valor,
+                                 la invocación no usa la caché
+        
+        Returns:
+            Copia del FunctionTool con la invocación envuelta (o el original si no aplica)
+        """
+        original_invoke = getattr(tool, 'on_invoke_tool', None)
+        if original_invoke is None or not metadata.get("cacheable"):
+            return tool
+        
+        cache = self.cache
+        ttl = metadata.get("cache_ttl")
+        
+        async def invoke_with_cache(ctx, input_json):
+            key = cache.make_key(tool_name, input_json, metadata)
+            if key is None:
+                return await original_invoke(ctx, input_json)
+            
+            cached = cache.get(tool_name, key)
+            if cached is not None:
+                mark_cache_hit()
+                return cached
+            
+            result = await original_invoke(ctx, input_json)
+            cache.put(tool_name, key, result, ttl)
+            return result
+        
+        return self._replace_invoke(tool, invoke_with_cache)
+    
+    def _wrap_with_metrics(self, tool: Any, tool_name: str) -> Any:
+        """
+        Envuelve on_invoke_tool para registrar latencia, bytes, estado y aciertos de caché
+        (en ToolMetrics y como span de la traza del turno).
+        
+        Returns:
+            Copia del FunctionTool con la invocación envuelta (o el original si no aplica)
+        """
+        original_invoke = getattr(tool, 'on_invoke_tool', None)
+        if original_invoke is None:
+            return tool
+        
+        metrics = self.metrics
+        
+        async def invoke_with_metrics(ctx, input_json):
+            # También queda como span de la traza del turno (en su propio carril)
+            with get_tracer().span(f"tool:{tool_name}", cat="tool", concurrent=True) as span:
+                call, token = metrics.start_call()
+                start = time.perf_counter()
+                status, bytes_out = STATUS_EXCEPTION, 0
+                try:
+                    result = await original_invoke(ctx, input_json)
+                    status = STATUS_OK if getattr(result, "ok", True) else STATUS_ERROR
+                    bytes_out = len(str(result).encode('utf-8'))
+                    return result
+                finally:
+                    metrics.end_call(token)
+                    bytes_in = len((input_json or "").encode('utf-8'))
+                    metrics.record(
+                        tool_name, time.perf_counter() - start, status,
+                        bytes_in=bytes_in, bytes_out=bytes_out, cache_hit=call["cache_hit"]
+                    )
+                    span.update(status=status, cache_hit=call["cache_hit"],
+                                bytes_in=bytes_in, bytes_out=bytes_out)
+        
+        return self._replace_invoke(tool, invoke_with_metrics)
+    
+    def _wrap_with_executor(self, tool: Any, metadata: Dict[str, Any]) -> Any:
+        """
+        Envuelve on_invoke_tool para ejecutar la herramienta de forma concurrente.
+        
+        El Runner lanza juntas las llamadas independientes de un mismo turno y
+        devuelve sus resultados en el orden de las llamadas; aquí cada llamada
+        espera el semáforo de su categoría y, si es bloqueante (metadato
+        'executor' = 'thread'), se ejecuta en un hilo del pool para no frenar
+        al resto.
+        
+        Returns:
+            Copia del FunctionTool con la invocación envuelta (o el original si no aplica)
+        """
+        original_invoke = getattr(tool, 'on_invoke_tool', None)
+        if original_invoke is None:
+            return tool
+        
+        category = metadata.get("category", "general")
+        in_thread = metadata.get("executor", EXECUTOR_THREAD) == EXECUTOR_THREAD
+        manager = self
+        
+        async def invoke_concurrently(ctx, input_json):
+            async with manager._get_semaphore(category):
+                if not in_thread:
+                    return await original_invoke(ctx, input_json)
+                loop = asyncio.get_running_loop()
+                # El hilo hereda el contexto (trazas del SDK)
+                call = functools.partial(
+                    contextvars.copy_context().run, _run_invocation, original_invoke, ctx, input_json
+                )
+                return await loop.run_in_executor(manager.executor, call)
+        
+        return self._replace_invoke(tool, invoke_concurrently)
+    
+    def _get_semaphore(self, category: str) -> asyncio.Semaphore:
+        """Semáforo de la categoría para el event loop actual"""
+        semaphores = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        if category not in semaphores:
+            semaphores[category] = asyncio.Semaphore(_category_limit(category))
+        return semaphores[category]
+    
+    def _replace_invoke(self, tool: Any, invoke: Callable) -> Any:
+        """Devuelve el FunctionTool con on_invoke_tool reemplazado"""
+        if dataclasses.is_dataclass(tool):
+            return dataclasses.replace(tool, on_invoke_tool=invoke)
+        
+        tool.on_invoke_tool = invoke
+        return tool
+    
+    def register_from_manifest(self, specs: Optional[List[Dict[str, Any]]] = None,
+                               manifest_path: str = MANIFEST_PATH):
+        """
+        Registra herramientas sin importar sus módulos (carga perezosa).
+        
+        Cada herramienta se publica al agente con la descripción y el esquema
+        del manifiesto; su módulo se importa en la primera invocación. Las que
+        no tienen entrada vigente (nuevas o con el código modificado) se
+        importan ahora y el manifiesto se actualiza.
+        
+        Args:
+            specs: Herramientas a registrar (por defecto, TOOL_SPECS)
+            manifest_path: Ruta del manifiesto generado
+        """
+        manifest = load_manifest(manifest_path)
+        updated = False
+        
+        for spec in specs or TOOL_SPECS:
+            name, module = spec["name"], spec["module"]
+            digest = source_digest(module)
+            entry = manifest.get(name)
+            
+            if entry and entry.get("module") == module and entry.get("source_sha1") == digest:
+                self.register_tool(self._lazy_tool(entry), spec["metadata"])
+                continue
+            
+            tool = import_tool(module, name)
+            self.loaded_tools[name] = tool
+            manifest[name] = describe_tool(tool, module, digest)
+            updated = True
+            self.register_tool(tool, spec["metadata"])
+        
+        if updated:
+            save_manifest(manifest, manifest_path)
+    
+    def _lazy_tool(self, entry: Dict[str, Any]) -> FunctionTool:
+        """FunctionTool que importa el módulo real en su primera invocación"""
+        name, module = entry["name"], entry["module"]
+        loaded_tools = self.loaded_tools
+        
+        async def invoke_lazily(ctx, input_json):
+            tool = loaded_tools.get(name)
+            if tool is None:
+                tool = loaded_tools[name] = import_tool(module, name)
+            return await tool.on_invoke_tool(ctx, input_json)
+        
+        return FunctionTool(
+            name=name,
+            description=entry["description"],
+            params_json_schema=entry["params_json_schema"],
+            on_invoke_tool=invoke_lazily,
+            strict_json_schema=entry.get("strict_json_schema", True)
+        )
+    
     def load_tools_from_module(self, module_path: str):
         """
         Carga todas las herramientas de un módulo Python.
@@ -96,6 +468,8 @@ class ToolManager:
                                      hasattr(obj, 'name') or 
                                      str(type(obj).__name__) == 'FunctionTool'):
                     # Es una función decorada con @function_tool
+                    if _get_tool_name(obj) in self.tools:
+                        continue
                     self.register_tool(obj)
             
             print(f"[+] Herramientas cargadas desde: {module_path}")
@@ -104,12 +478,7 @@ class ToolManager:
     
     def get_tool_by_name(self, tool_name: str) -> Callable:
         """Obtiene una herramienta por su nombre"""
-        for tool in self.custom_tools:
-            # Manejar FunctionTool objects
-            current_name = tool.name if hasattr(tool, 'name') else getattr(tool, '__name__', None)
-            if current_name == tool_name:
-                return tool
-        return None
+        return self.tools.get(tool_name)
     
     def list_tools(self, category: str = None) -> List[Dict[str, Any]]:
         """
@@ -143,19 +512,29 @@ class ToolManager:
         Returns:
             (es_válido, mensaje_error)
         """
-        tool = self.get_tool_by_name(tool_name)
+        signature = self.tool_signatures.get(tool_name)
         
-        if not tool:
+        if signature is None:
             return False, f"Herramienta '{tool_name}' no encontrada"
         
-        # Obtener signature de la función
-        sig = inspect.signature(tool)
-        
         # Verificar argumentos requeridos
-        for param_name, param in sig.parameters.items():
-            if param.default == inspect.Parameter.empty:  # Argumento requerido
-                if param_name not in args:
-                    return False, f"Argumento requerido faltante: {param_name}"
+        for param_name in signature["required"]:
+            if param_name not in args:
+                return False, f"Argumento requerido faltante: {param_name}"
+        
+        for arg_name, value in args.items():
+            if arg_name not in signature["types"]:
+                if (not signature["allow_extra"] and arg_name not in signature["optional"]
+                        and arg_name not in signature["required"]):
+                    return False, f"Argumento desconocido: {arg_name}"
+                continue
+            
+            # Verificar el tipo declarado en el esquema
+            expected = signature["types"][arg_name]
+            python_types = tuple(t for name in expected for t in _JSON_TYPES.get(name, (object,)))
+            if (not isinstance(value, python_types)
+                    or (isinstance(value, bool) and "boolean" not in expected)):
+                return False, f"Tipo inválido para {arg_name}: se esperaba {' | '.join(expected)}"
         
         return True, "Argumentos válidos"
     
@@ -189,6 +568,32 @@ class ToolManager:
         
         print("="*80 + "\n")
     
+    def partition_unattended(self, tools: List[Any], allow_sensitive: bool = False) -> tuple[List[Any], List[str]]:
+        """
+        Separa las herramientas que se pueden ofrecer sin un usuario que confirme
+        (modo por lotes, API).
+        
+        Las herramientas que no se registraron en este ToolManager (por ejemplo,
+        las propias del agente de CAI) no tienen metadatos de sensibilidad y se
+        tratan como sensibles.
+        
+        Args:
+            tools: Herramientas del agente
+            allow_sensitive: Permitir también las sensibles (autorización explícita)
+            
+        Returns:
+            (herramientas permitidas, nombres de las bloqueadas)
+        """
+        allowed, blocked = [], []
+        for tool in tools:
+            name = _get_tool_name(tool)
+            metadata = self.tool_metadata.get(name)
+            if allow_sensitive or (metadata is not None and not metadata.get("is_sensitive", False)):
+                allowed.append(tool)
+            else:
+                blocked.append(name)
+        return allowed, blocked
+    
     def get_sensitive_tools(self) -> List[str]:
         """Retorna lista de nombres de herramientas sensibles"""
         return [
@@ -0,0 +1,124 @@
+"""
+Manifiesto de herramientas: registro sin importar sus módulos al arrancar
+
+TOOL_SPECS es la lista estática de herramientas (módulo, nombre y metadatos
+de registro). Lo que el LLM necesita ver de cada una (descripción y esquema
+JSON de parámetros) se guarda en un manifiesto JSON junto con el hash del
+código fuente del módulo: mientras el archivo no cambie, ToolManager registra
+la herramienta desde el manifiesto y su módulo (scapy, subprocess, etc.)
+solo se importa la primera vez que el agente la invoca. Si falta la entrada
+o el módulo cambió, se importa en el arranque y el manifiesto se actualiza.
+"""
+
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+from typing import List, Dict, Any
+
+
+# Paquete de las herramientas (src.tools)
+TOOLS_PACKAGE = __name__.rsplit('.', 2)[0] + ".tools"
+
+# Manifiesto generado (junto al índice de sesiones, fuera del código)
+MANIFEST_PATH = os.path.join("logs", ".tool_manifest.json")
+
+MANIFEST_VERSION = 1
+
+
+def _spec(name: str, module: str, category: str, is_sensitive: bool = False,
+          requires_root: bool = False, **extra) -> Dict[str, Any]:
+    """Entrada de TOOL_SPECS"""
+    return {
+        "name": name,
+        "module": module,
+        "metadata": {"category": category, "is_sensitive": is_sensitive,
+                     "requires_root": requires_root, **extra}
+    }
+
+
+TOOL_SPECS: List[Dict[str, Any]] = [
+    _spec("network_sniffer_tool", "cai_tools_wrapper", "network", is_sensitive=True, requires_root=True),
+    _spec("nmap_scan_tool", "nmap_tool", "network", is_sensitive=True),
+    _spec("nmap_ping_sweep", "nmap_tool", "network", is_sensitive=True),
+    # Deterministas: sus resultados se memoizan (src/core/tool_cache.py)
+    _spec("whois_lookup_tool", "whois_tool", "reconnaissance", cacheable=True, cache_ttl=86400,
+          cache_bypass_fields=["save_to_file"]),
+    _spec("bulk_whois_lookup_tool", "whois_tool", "reconnaissance"),
+    _spec("dns_lookup_tool", "whois_tool", "reconnaissance", cacheable=True, cache_ttl=300),
+    _spec("reverse_dns_lookup_tool", "whois_tool", "reconnaissance", cacheable=True, cache_ttl=300),
+    # Asíncronas nativas: se ejecutan en el event loop, no en el pool de hilos
+    _spec("bulk_dns_lookup_tool", "whois_tool", "reconnaissance", executor="async"),
+    _spec("bulk_reverse_dns_lookup_tool", "whois_tool", "reconnaissance", executor="async"),
+    _spec("recon_pipeline_tool", "recon_pipeline_tool", "network", is_sensitive=True, executor="async"),
+    # Clave ligada al mtime y tamaño del log: si el archivo cambia, se vuelve a analizar
+    _spec("analyze_log_tool", "log_analyzer_tool", "analysis", cacheable=True,
+          cache_file_fields=["log_file_path"]),
+    _spec("tail_log_tool", "log_analyzer_tool", "analysis"),
+    _spec("generate_report_tool", "report_generator_tool", "utility"),
+    # Sin presupuesto de tokens: ya devuelve páginas acotadas
+    _spec("read_artifact_tool", "artifact_tool", "utility", token_budget=0),
+]
+
+
+def import_tool(module: str, name: str) -> Any:
+    """Importa el módulo de una herramienta y devuelve su FunctionTool"""
+    return getattr(importlib.import_module(f"{TOOLS_PACKAGE}.{module}"), name)
+
+
+def source_digest(module: str) -> str:
+    """Hash del código fuente de un módulo de herramientas (sin importarlo)"""
+    spec = importlib.util.find_spec(f"{TOOLS_PACKAGE}.{module}")
+    if spec is None or not spec.origin or not os.path.exists(spec.origin):
+        return ""
+    with open(spec.origin, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def describe_tool(tool: Any, module: str, digest: str) -> Dict[str, Any]:
+    """Entrada del manifiesto para un FunctionTool ya importado"""
+    return {
+        "name": tool.name,
+        "module": module,
+        "description": tool.description,
+        "params_json_schema": tool.params_json_schema,
+        "strict_json_schema": getattr(tool, "strict_json_schema", True),
+        "source_sha1": digest
+    }
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> Dict[str, Dict[str, Any]]:
+    """Carga el manifiesto ({nombre: entrada}); vacío si no existe o es de otra versión"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"[!] Manifiesto de herramientas ilegible, se regenerará: {e}")
+        return {}
+
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("tools", {})
+
+
+def save_manifest(tools: Dict[str, Dict[str, Any]], path: str = MANIFEST_PATH):
+    """Guarda el manifiesto de forma atómica"""
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = path + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "tools": tools}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, path)
+    except OSError as e:
+        print(f"[!] No se pudo guardar el manifiesto de herramientas: {e}")
+
+
+__all__ = [
+    'TOOL_SPECS', 'MANIFEST_PATH', 'import_tool', 'source_digest',
+    'describe_tool', 'load_manifest', 'save_manifest'
+]
@@ -0,0 +1,265 @@
+"""
+ToolMetrics: Telemetría de ejecución por herramienta
+
+ToolManager envuelve cada herramienta para registrar, por invocación, la
+latencia, los bytes de entrada (argumentos JSON) y de salida (texto del
+resultado), el estado (ok / error / excepción) y si la respuesta vino de la
+caché. Las latencias se acumulan en histogramas estilo HDR (buckets
+logarítmicos con sub-buckets lineales, error relativo acotado y memoria
+constante), de los que salen percentiles sin guardar cada muestra.
+
+`/metrics` muestra el resumen en la terminal y `/metrics export [archivo]`
+lo escribe en formato de texto de Prometheus (por defecto en
+`logs/metrics/tools.prom`, `TOOL_METRICS_FILE`).
+"""
+
+import contextvars
+import os
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+
+# Archivo por defecto de la exportación a Prometheus
+PROMETHEUS_FILE = os.getenv("TOOL_METRICS_FILE", os.path.join("logs", "metrics", "tools.prom"))
+
+# Límites (segundos) de los buckets del histograma exportado a Prometheus
+PROMETHEUS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Estados de una invocación
+STATUS_OK = "ok"                # La herramienta devolvió un resultado válido
+STATUS_ERROR = "error"          # Devolvió un resultado con ok=False
+STATUS_EXCEPTION = "exception"  # Lanzó una excepción
+
+# Datos de la invocación en curso (la capa de caché marca los aciertos)
+_current_call: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "tool_call", default=None
+)
+
+
+def mark_cache_hit():
+    """Marca la invocación en curso como respondida desde la caché"""
+    call = _current_call.get()
+    if call is not None:
+        call["cache_hit"] = True
+
+
+class LatencyHistogram:
+    """
+    Histograma de latencias (µs) estilo HDR.
+
+    Los valores menores que 2^sub_bucket_bits se guardan exactos; los
+    mayores caen en buckets cuyo ancho crece con la magnitud, así que el
+    error relativo de cualquier percentil es como máximo 1/2^(sub_bucket_bits-1).
+    """
+
+    def __init__(self, sub_bucket_bits: int = 6):
+        """
+        Inicializa el histograma.
+
+        Args:
+            sub_bucket_bits: Bits de precisión (6 = error relativo <= ~3%)
+        """
+        self.sub_bits = sub_bucket_bits
+        self.sub_count = 1 << sub_bucket_bits
+        self.half = self.sub_count >> 1
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def _index(self, value: int) -> int:
+        """Bucket de un valor"""
+        if value < self.sub_count:
+            return value
+        shift = value.bit_length() - self.sub_bits
+        return self.sub_count + (shift - 1) * self.half + ((value >> shift) - self.half)
+
+    def _bounds(self, index: int) -> Tuple[int, int]:
+        """Valores mínimo y máximo que caen en un bucket"""
+        if index < self.sub_count:
+            return index, index
+        offset = index - self.sub_count
+        shift = offset // self.half + 1
+        top = offset % self.half + self.half
+        return top << shift, ((top + 1) << shift) - 1
+
+    def record(self, value_us: int):
+        """Registra una latencia en microsegundos"""
+        value_us = max(0, int(value_us))
+        index = self._index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.sum += value_us
+        self.min = value_us if self.min is None else min(self.min, value_us)
+        self.max = value_us if self.max is None else max(self.max, value_us)
+
+    def percentile(self, percent: float) -> int:
+        """Valor (µs) por debajo del cual está el percent% de las muestras"""
+        if not self.total:
+            return 0
+        target = max(1, -(-self.total * percent // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._bounds(index)[1], self.max)
+        return self.max
+
+    def count_at_or_below(self, value_us: int) -> int:
+        """Muestras con valor <= value_us (por el valor máximo de cada bucket)"""
+        return sum(count for index, count in self.counts.items() if self._bounds(index)[1] <= value_us)
+
+
+class ToolMetrics:
+    """
+    Métricas agregadas por herramienta.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tools: Dict[str, Dict[str, Any]] = {}
+
+    def _get(self, tool_name: str) -> Dict[str, Any]:
+        """Contadores de una herramienta (con el lock tomado)"""
+        if tool_name not in self.tools:
+            self.tools[tool_name] = {
+                "histogram": LatencyHistogram(),
+                "status": {STATUS_OK: 0, STATUS_ERROR: 0, STATUS_EXCEPTION: 0},
+                "cache_hits": 0,
+                "bytes_in": 0,
+                "bytes_out": 0
+            }
+        return self.tools[tool_name]
+
+    def start_call(self) -> Tuple[Dict[str, Any], contextvars.Token]:
+        """Abre el registro de una invocación (ver mark_cache_hit)"""
+        call = {"cache_hit": False}
+        return call, _current_call.set(call)
+
+    def end_call(self, token: contextvars.Token):
+        """Cierra el registro abierto con start_call"""
+        _current_call.reset(token)
+
+    def record(self, tool_name: str, elapsed_s: float, status: str,
+               bytes_in: int = 0, bytes_out: int = 0, cache_hit: bool = False):
+        """
+        Registra una invocación.
+
+        Args:
+            tool_name: Nombre de la herramienta
+            elapsed_s: Duración en segundos
+            status: STATUS_OK, STATUS_ERROR o STATUS_EXCEPTION
+            bytes_in: Tamaño de los argumentos
+            bytes_out: Tamaño del resultado
+            cache_hit: Si el resultado vino de la caché
+        """
+        with self._lock:
+            stats = self._get(tool_name)
+            stats["histogram"].record(elapsed_s * 1_000_000)
+            stats["status"][status] = stats["status"].get(status, 0) + 1
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+            if cache_hit:
+                stats["cache_hits"] += 1
+
+    def reset(self):
+        """Borra todas las métricas"""
+        with self._lock:
+            self.tools.clear()
+
+    # ------------------------------------------------------------------
+    # Resumen y exportación
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """
+        Resumen por herramienta, ordenado por tiempo total (la que más pesa primero).
+
+        Returns:
+            Lista de {'tool', 'calls', 'total_s', 'p50_ms', 'p90_ms', 'p99_ms',
+            'max_ms', 'error_rate', 'cache_hits', 'bytes_in', 'bytes_out', 'status'}
+        """
+        with self._lock:
+            summary = []
+            for name, stats in self.tools.items():
+                histogram = stats["histogram"]
+                calls = histogram.total
+                failures = stats["status"][STATUS_ERROR] + stats["status"][STATUS_EXCEPTION]
+                summary.append({
+                    "tool": name,
+                    "calls": calls,
+                    "total_s": histogram.sum / 1_000_000,
+                    "p50_ms": histogram.percentile(50) / 1000,
+                    "p90_ms": histogram.percentile(90) / 1000,
+                    "p99_ms": histogram.percentile(99) / 1000,
+                    "max_ms": (histogram.max or 0) / 1000,
+                    "error_rate": failures / calls if calls else 0.0,
+                    "cache_hits": stats["cache_hits"],
+                    "bytes_in": stats["bytes_in"],
+                    "bytes_out": stats["bytes_out"],
+                    "status": dict(stats["status"])
+                })
+        summary.sort(key=lambda item: item["total_s"], reverse=True)
+        return summary
+
+    def to_prometheus(self) -> str:
+        """Métricas en formato de texto de Prometheus"""
+        lines = [
+            "# HELP tool_invocations_total Invocaciones de herramientas por estado",
+            "# TYPE tool_invocations_total counter",
+        ]
+        with self._lock:
+            tools = sorted(self.tools.items())
+            for name, stats in tools:
+                for status, count in stats["status"].items():
+                    lines.append(f'tool_invocations_total{{tool="{name}",status="{status}"}} {count}')
+
+            for metric, key, help_text in (
+                ("tool_cache_hits_total", "cache_hits", "Invocaciones respondidas desde la caché"),
+                ("tool_input_bytes_total", "bytes_in", "Bytes de argumentos recibidos"),
+                ("tool_output_bytes_total", "bytes_out", "Bytes de resultados producidos"),
+            ):
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} counter")
+                for name, stats in tools:
+                    lines.append(f'{metric}{{tool="{name}"}} {stats[key]}')
+
+            lines.append("# HELP tool_duration_seconds Latencia de las invocaciones")
+            lines.append("# TYPE tool_duration_seconds histogram")
+            for name, stats in tools:
+                histogram = stats["histogram"]
+                for bound in PROMETHEUS_BUCKETS:
+                    count = histogram.count_at_or_below(int(bound * 1_000_000))
+                    lines.append(f'tool_duration_seconds_bucket{{tool="{name}",le="{bound}"}} {count}')
+                lines.append(f'tool_duration_seconds_bucket{{tool="{name}",le="+Inf"}} {histogram.total}')
+                lines.append(f'tool_duration_seconds_sum{{tool="{name}"}} {histogram.sum / 1_000_000:.6f}')
+                lines.append(f'tool_duration_seconds_count{{tool="{name}"}} {histogram.total}')
+
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path: str = PROMETHEUS_FILE) -> str:
+        """
+        Escribe las métricas en formato Prometheus (escritura atómica).
+
+        Returns:
+            Ruta del archivo escrito
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+
+# Métricas compartidas por todas las herramientas del proceso
+shared_tool_metrics = ToolMetrics()
+
+
+__all__ = [
+    'ToolMetrics', 'LatencyHistogram', 'shared_tool_metrics', 'mark_cache_hit',
+    'PROMETHEUS_FILE', 'STATUS_OK', 'STATUS_ERROR', 'STATUS_EXCEPTION'
+]
@@ -0,0 +1,254 @@
+"""
+Tracer: Trazas por turno (entrada, llamadas al modelo, herramientas, historial)
+
+Cada turno de la terminal se registra como un árbol de spans en un archivo
+por sesión, `logs/traces/{sesion}.json`, en el formato Trace Event de Chrome
+(se abre en chrome://tracing, Perfetto o speedscope). Cada evento lleva
+además trace_id / span_id / parent_span_id con el formato de OpenTelemetry
+(hex de 32 y 16 caracteres) para correlacionarlo con otras herramientas.
+
+El archivo usa la variante de arreglo JSON sin `]` final, que los visores
+aceptan: cada evento se agrega al final sin reescribir nada, así que una
+traza sobrevive a una salida abrupta.
+
+Las herramientas que corren a la vez se dibujan en carriles propios (uno por
+ejecución concurrente) para que sus spans no se solapen en el visor.
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+
+TRACES_DIR = os.path.join("logs", "traces")
+
+# Hilo "principal" del visor (el turno y las llamadas al modelo)
+MAIN_TID = 0
+
+# Span activo: (trace_id, span_id)
+_current_span: contextvars.ContextVar[Optional[Tuple[str, str]]] = contextvars.ContextVar(
+    "trace_span", default=None
+)
+
+
+class Tracer:
+    """
+    Escritor de spans en formato Trace Event de Chrome.
+    """
+
+    def __init__(self, path: str):
+        """
+        Abre (o continúa) el archivo de trazas.
+
+        Args:
+            path: Archivo de trazas de la sesión
+        """
+        self.path = path
+        self.enabled = True
+        self._epoch = time.perf_counter()
+        self._lock = threading.Lock()
+        self._busy_lanes: set = set()
+        self._named_lanes: set = set()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', encoding='utf-8')
+        if is_new:
+            self._file.write("[\n")
+
+        self._write({"name": "process_name", "ph": "M", "pid": os.getpid(), "tid": MAIN_TID,
+                     "args": {"name": f"dui-IA ({datetime.now().isoformat(timespec='seconds')})"}})
+        self._name_lane(MAIN_TID, "turnos")
+
+    def _now_us(self) -> float:
+        """Microsegundos desde la apertura del tracer"""
+        return (time.perf_counter() - self._epoch) * 1_000_000
+
+    def _write(self, event: Dict[str, Any]):
+        """Agrega un evento al archivo"""
+        line = json.dumps(event, ensure_ascii=False, default=str) + ",\n"
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+
+    def _name_lane(self, tid: int, name: str):
+        """Nombra un carril del visor (una sola vez)"""
+        if tid in self._named_lanes:
+            return
+        self._named_lanes.add(tid)
+        self._write({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}})
+
+    def _acquire_lane(self) -> int:
+        """Carril libre para un span concurrente"""
+        with self._lock:
+            lane = 1
+            while lane in self._busy_lanes:
+                lane += 1
+            self._busy_lanes.add(lane)
+        self._name_lane(lane, f"herramientas #{lane}")
+        return lane
+
+    def _release_lane(self, lane: int):
+        with self._lock:
+            self._busy_lanes.discard(lane)
+
+    @contextmanager
+    def span(self, name: str, cat: str = "turn", concurrent: bool = False, **args):
+        """
+        Registra el bloque como un span hijo del span activo.
+
+        Args:
+            name: Nombre del span
+            cat: Categoría (turn, model, tool, history, persistence...)
+            concurrent: Dibujarlo en un carril propio (spans que se solapan)
+            **args: Atributos del span
+
+        Yields:
+            Diccionario de atributos (se puede completar dentro del bloque)
+        """
+        parent = _current_span.get()
+        trace_id = parent[0] if parent else secrets.token_hex(16)
+        span_id = secrets.token_hex(8)
+        token = _current_span.set((trace_id, span_id))
+        lane = self._acquire_lane() if concurrent else MAIN_TID
+        start = self._now_us()
+        attributes = dict(args)
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Generador asíncrono cerrado desde otro contexto (p. ej. al recolectarlo)
+                pass
+            if concurrent:
+                self._release_lane(lane)
+            self._write({
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": round(start, 1),
+                "dur": round(self._now_us() - start, 1),
+                "pid": os.getpid(),
+                "tid": lane,
+                "args": {
+                    **attributes,
+                    "trace_id": trace_id,
+                    "span_id": span_id,
+                    "parent_span_id": parent[1] if parent else None
+                }
+            })
+            if parent is None:
+                self.flush()
+
+    def flush(self):
+        """Escribe lo pendiente en disco"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self):
+        """Cierra el archivo de trazas"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class NullTracer:
+    """Tracer desactivado: misma interfaz, sin costo"""
+
+    enabled = False
+    path = None
+
+    @contextmanager
+    def span(self, name: str, cat: str = "turn", concurrent: bool = False, **args):
+        yield {}
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+_tracer: Any = NullTracer()
+
+
+def get_tracer():
+    """Tracer activo del proceso (NullTracer si no hay ninguno)"""
+    return _tracer
+
+
+def start_session_trace(session_name: str, traces_dir: str = TRACES_DIR):
+    """
+    Activa las trazas para una sesión (salvo TRACE_TURNS=0).
+
+    Args:
+        session_name: Nombre del archivo de trazas (sin extensión)
+        traces_dir: Directorio de las trazas
+
+    Returns:
+        El tracer activo
+    """
+    global _tracer
+    _tracer.close()
+    if os.getenv("TRACE_TURNS", "1") == "0":
+        _tracer = NullTracer()
+        return _tracer
+    try:
+        _tracer = Tracer(os.path.join(traces_dir, f"{session_name}.json"))
+    except OSError as e:
+        print(f"[!] No se pudieron activar las trazas: {e}")
+        _tracer = NullTracer()
+    return _tracer
+
+
+def instrument_method(obj: Any, method_name: str, span_name: str, cat: str) -> bool:
+    """
+    Envuelve un método (sync, async o generador async) de una instancia para
+    registrarlo como span. En los generadores async el span dura hasta que se
+    consume (o se cierra) el stream, no solo hasta que se crea.
+
+    Returns:
+        True si el método existía y se instrumentó
+    """
+    original = getattr(obj, method_name, None)
+    if original is None or getattr(original, "_traced", False):
+        return False
+
+    if inspect.isasyncgenfunction(original):
+        @functools.wraps(original)
+        async def traced(*args, **kwargs):
+            with get_tracer().span(span_name, cat=cat):
+                async for item in original(*args, **kwargs):
+                    yield item
+    elif inspect.iscoroutinefunction(original):
+        @functools.wraps(original)
+        async def traced(*args, **kwargs):
+            with get_tracer().span(span_name, cat=cat):
+                return await original(*args, **kwargs)
+    else:
+        @functools.wraps(original)
+        def traced(*args, **kwargs):
+            with get_tracer().span(span_name, cat=cat):
+                return original(*args, **kwargs)
+
+    traced._traced = True
+    setattr(obj, method_name, traced)
+    return True
+
+
+__all__ = ['Tracer', 'NullTracer', 'get_tracer', 'start_session_trace', 'instrument_method', 'TRACES_DIR']
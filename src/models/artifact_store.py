@@ -0,0 +1,119 @@
+"""
+Almacén de artefactos: outputs completos de herramientas guardados en disco
+
+Cuando el resultado de una herramienta es demasiado grande para enviarlo
+al LLM, el texto completo se guarda aquí y en el historial solo queda una
+versión compacta con la referencia al artefacto.
+"""
+
+import os
+import re
+import uuid
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+
+class ArtifactStore:
+    """
+    Guarda y pagina outputs de herramientas en archivos de texto.
+
+    Cada artefacto es un archivo `{artifact_id}.txt`; el ID incluye el nombre
+    de la herramienta para que sea legible en el historial.
+    """
+
+    def __init__(self, artifacts_dir: str = "artifacts"):
+        """
+        Inicializa el almacén.
+
+        Args:
+            artifacts_dir: Directorio donde guardar los artefactos
+        """
+        self.artifacts_dir = artifacts_dir
+        os.makedirs(artifacts_dir, exist_ok=True)
+
+    def _path(self, artifact_id: str) -> str:
+        """Ruta del artefacto (rechaza IDs con separadores de ruta)"""
+        if not re.fullmatch(r'[\w.-]+', artifact_id):
+            raise ValueError(f"ID de artefacto inválido: {artifact_id}")
+        return os.path.join(self.artifacts_dir, f"{artifact_id}.txt")
+
+    def save(self, content: str, tool: str = "tool") -> str:
+        """
+        Guarda un output completo.
+
+        Args:
+            content: Texto a guardar
+            tool: Herramienta que lo generó
+
+        Returns:
+            ID del artefacto
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        artifact_id = f"{tool}_{timestamp}_{uuid.uuid4().hex[:6]}"
+
+        with open(self._path(artifact_id), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+        return artifact_id
+
+    def exists(self, artifact_id: str) -> bool:
+        """Indica si el artefacto existe"""
+        try:
+            return os.path.exists(self._path(artifact_id))
+        except ValueError:
+            return False
+
+    def read(self, artifact_id: str) -> str:
+        """Lee el contenido completo de un artefacto"""
+        with open(self._path(artifact_id), 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+
+    def read_page(self, artifact_id: str, page: int = 1, page_size: int = 100) -> Dict[str, Any]:
+        """
+        Lee una página de líneas de un artefacto.
+
+        Args:
+            artifact_id: ID devuelto por save()
+            page: Número de página (desde 1)
+            page_size: Líneas por página
+
+        Returns:
+            Diccionario con 'lines', 'page', 'total_pages' y 'total_lines'
+
+        Raises:
+            FileNotFoundError: Si el artefacto no existe
+        """
+        page = max(1, page)
+        page_size = max(1, page_size)
+        start = (page - 1) * page_size
+
+        lines = []
+        total_lines = 0
+        with open(self._path(artifact_id), 'r', encoding='utf-8', errors='replace') as f:
+            for total_lines, line in enumerate(f, 1):
+                if start < total_lines <= start + page_size:
+                    lines.append(line)
+
+        return {
+            "artifact_id": artifact_id,
+            "lines": lines,
+            "page": page,
+            "page_size": page_size,
+            "first_line": start + 1,
+            "total_lines": total_lines,
+            "total_pages": max(1, -(-total_lines // page_size))
+        }
+
+
+_store: Optional[ArtifactStore] = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Obtiene el almacén de artefactos compartido"""
+    global _store
+    if _store is None:
+        _store = ArtifactStore()
+    return _store
+
+
+__all__ = ['ArtifactStore', 'get_artifact_store']
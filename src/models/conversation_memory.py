@@ -7,6 +7,8 @@ import os
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
+from .event_store import EventStore, EventKind
+
 
 class ConversationMemory:
     """
@@ -16,19 +18,34 @@ class ConversationMemory:
     - Guardar historial de mensajes
     - Recordar contexto de sesiones anteriores
     - Persistir memoria en disco
+    
+    Persistencia: la memoria es una vista sobre un EventStore. Cada cambio se
+    agrega como evento ('message' o 'clear') al registro de la sesión, que
+    puede ser compartido con el log de acciones del controlador, y cada
+    `compact_every` eventos el estado completo se vuelca a una instantánea
+    (`{session_id}_memory.json`) junto con el offset del registro que cubre.
+    Al cargar se lee la instantánea y solo los eventos posteriores a ese offset.
     """
     
-    def __init__(self, session_id: str, memory_dir: str = "memory"):
+    def __init__(self, session_id: str, memory_dir: str = "memory",
+                 compact_every: int = 200, fsync: bool = False,
+                 store: Optional[EventStore] = None):
         """
         Inicializa la memoria conversacional.
         
         Args:
             session_id: ID único de la sesión
             memory_dir: Directorio donde guardar la memoria
+            compact_every: Eventos antes de volcar una nueva instantánea
+            fsync: Forzar fsync tras cada lote (solo si la memoria crea su propio registro)
+            store: Registro de eventos compartido (por defecto, `{session_id}_memory.jsonl`)
         """
         self.session_id = session_id
         self.memory_dir = memory_dir
+        self.compact_every = compact_every
         self.messages: List[Dict[str, Any]] = []
+        self.last_seq = 0
+        self._pending_events = 0
         self.metadata: Dict[str, Any] = {
             "session_id": session_id,
             "created_at": datetime.now().isoformat(),
@@ -38,6 +55,10 @@ class ConversationMemory:
         # Crear directorio si no existe
         os.makedirs(memory_dir, exist_ok=True)
         
+        # Sin registro compartido, la memoria usa el suyo (y lo cierra al terminar)
+        self._owns_store = store is None
+        self.store = store or EventStore(self._get_journal_file(), session_id, fsync=fsync)
+        
         # Cargar memoria existente si hay
         self._load_memory()
     
@@ -58,8 +79,8 @@ class ConversationMemory:
         }
         
         self.messages.append(message)
-        self.metadata["last_updated"] = datetime.now().isoformat()
-        self._save_memory()
+        self.metadata["last_updated"] = message["timestamp"]
+        self._append_event(EventKind.MESSAGE, message)
     
     def get_recent_messages(self, count: int = 10) -> List[Dict[str, Any]]:
         """Obtiene los últimos N mensajes"""
@@ -73,37 +94,115 @@ class ConversationMemory:
         """Borra toda la memoria de la sesión"""
         self.messages = []
         self.metadata["last_updated"] = datetime.now().isoformat()
-        self._save_memory()
+        self._append_event(EventKind.CLEAR, {})
+        # Tras borrar, la instantánea vacía evita releer los mensajes anteriores
+        self.compact()
+    
+    def close(self):
+        """Vuelca la instantánea y cierra el registro si es propio"""
+        if self._pending_events:
+            self.compact()
+        if self._owns_store:
+            self.store.close()
     
     def _get_memory_file(self) -> str:
-        """Obtiene la ruta del archivo de memoria"""
+        """Obtiene la ruta del archivo de memoria (instantánea)"""
         return os.path.join(self.memory_dir, f"{self.session_id}_memory.json")
     
-    def _save_memory(self):
-        """Guarda la memoria en disco"""
+    def _get_journal_file(self) -> str:
+        """Obtiene la ruta del registro de eventos propio de la memoria"""
+        return os.path.join(self.memory_dir, f"{self.session_id}_memory.jsonl")
+    
+    def _append_event(self, kind: str, data: Dict[str, Any]):
+        """Agrega un evento al registro (lo escribe el hilo del EventStore)"""
+        self.last_seq = self.store.append(kind, data)["seq"]
+        
+        self._pending_events += 1
+        if self._pending_events >= self.compact_every:
+            self.compact()
+    
+    def compact(self):
+        """
+        Vuelca el estado completo a la instantánea.
+        
+        La instantánea guarda el último seq aplicado y el offset del registro
+        hasta el que llega; se escribe en un archivo temporal y se renombra de
+        forma atómica. El registro no se recorta (puede ser compartido).
+        """
         memory_data = {
-            "metadata": self.metadata,
+            "metadata": {
+                **self.metadata,
+                "last_seq": self.last_seq,
+                "store_offset": self.store.size()
+            },
             "messages": self.messages
         }
         
-        with open(self._get_memory_file(), 'w') as f:
-            json.dump(memory_data, f, indent=2)
+        memory_file = self._get_memory_file()
+        tmp_file = memory_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(memory_data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, memory_file)
+        
+        self._pending_events = 0
     
     def _load_memory(self):
-        """Carga la memoria desde disco si existe"""
+        """Carga la memoria desde disco si existe (instantánea + eventos posteriores)"""
         memory_file = self._get_memory_file()
+        store_offset = 0
         
         if os.path.exists(memory_file):
             try:
-                with open(memory_file, 'r') as f:
+                with open(memory_file, 'r', encoding='utf-8') as f:
                     memory_data = json.load(f)
                 
                 self.metadata = memory_data.get("metadata", self.metadata)
                 self.messages = memory_data.get("messages", [])
-                
-                print(f"[*] Memoria cargada: {len(self.messages)} mensajes")
+                self.last_seq = self.metadata.pop("last_seq", 0)
+                store_offset = self.metadata.pop("store_offset", 0)
             except Exception as e:
                 print(f"[!] Error cargando memoria: {e}")
+        
+        # Si el registro es más corto que el offset (se reemplazó), se relee entero
+        if store_offset > self.store.size():
+            store_offset = 0
+        
+        replayed = self._replay_events(store_offset)
+        
+        # Un registro nuevo no debe reutilizar seqs que la instantánea ya cubre
+        self.store.ensure_seq(self.last_seq)
+        
+        if self.messages or replayed:
+            print(f"[*] Memoria cargada: {len(self.messages)} mensajes")
+    
+    def _replay_events(self, start_offset: int = 0) -> int:
+        """
+        Aplica los eventos de memoria posteriores a la instantánea.
+        
+        Returns:
+            Número de eventos aplicados
+        """
+        applied = 0
+        
+        for event in self.store.iter_events((EventKind.MESSAGE, EventKind.CLEAR), start_offset):
+            if event["seq"] <= self.last_seq:
+                continue
+            
+            if event["kind"] == EventKind.MESSAGE:
+                # Los diarios anteriores guardaban el mensaje en 'message'
+                message = event.get("data") or event.get("message")
+                self.messages.append(message)
+                self.metadata["last_updated"] = message["timestamp"]
+            elif event["kind"] == EventKind.CLEAR:
+                self.messages = []
+            
+            self.last_seq = event["seq"]
+            applied += 1
+        
+        self._pending_events = applied
+        return applied
     
     def get_session_summary(self) -> Dict[str, Any]:
         """Obtiene un resumen de la sesión"""
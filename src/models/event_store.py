@@ -0,0 +1,162 @@
+"""
+EventStore: Registro único de eventos de una sesión
+
+Todo lo que la aplicación persiste durante una sesión (mensajes de la
+memoria conversacional, acciones del controlador) se agrega a un solo JSONL
+con un único escritor en segundo plano. Cada línea es un evento tipado:
+
+    {"seq": 12, "kind": "action", "timestamp": "...", "session_id": "...", "data": {...}}
+
+ConversationMemory y el historial de acciones de CybersecurityAgent son
+vistas sobre este registro: cada evento se serializa y escribe una sola vez.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Iterator, Iterable, Dict, Any, Optional
+
+from .jsonl_writer import BackgroundJSONLWriter
+
+
+class EventKind:
+    """Tipos de evento del registro"""
+    MESSAGE = "message"    # Mensaje de la memoria conversacional
+    CLEAR = "clear"        # Borrado de la memoria conversacional
+    ACTION = "action"      # Acción del controlador (aprobaciones, ejecuciones)
+
+
+class EventStore:
+    """
+    Registro de eventos append-only con un solo escritor.
+    """
+
+    def __init__(self, path: str, session_id: str = "", fsync: bool = False):
+        """
+        Abre (o crea) el registro.
+
+        Args:
+            path: Archivo JSONL del registro
+            session_id: ID de la sesión que se guarda en cada evento
+            fsync: Forzar fsync después de cada lote escrito
+        """
+        self.path = path
+        self.session_id = session_id
+        self._lock = threading.Lock()
+        self.last_seq = self._recover()
+        self.writer = BackgroundJSONLWriter(path, fsync=fsync)
+
+    def _recover(self) -> int:
+        """
+        Obtiene el último seq del archivo y recorta una última línea incompleta.
+
+        Returns:
+            Último número de secuencia escrito (0 si el registro está vacío)
+        """
+        if not os.path.exists(self.path):
+            return 0
+
+        last_seq = 0
+        valid_bytes = 0
+        with open(self.path, 'rb') as f:
+            for raw_line in f:
+                if not raw_line.endswith(b"\n"):
+                    break
+                try:
+                    last_seq = max(last_seq, json.loads(raw_line).get("seq", 0))
+                except (ValueError, AttributeError):
+                    break
+                valid_bytes += len(raw_line)
+
+        if valid_bytes < os.path.getsize(self.path):
+            print(f"[!] Registro de eventos truncado: se descarta la última entrada incompleta")
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_bytes)
+
+        return last_seq
+
+    def append(self, kind: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Agrega un evento (no bloquea: lo escribe el hilo del escritor).
+
+        El evento se serializa aquí, bajo el lock, para que el registro en
+        disco refleje `data` en el momento de la llamada aunque el llamador
+        lo modifique después.
+
+        Args:
+            kind: Tipo de evento (ver EventKind)
+            data: Contenido del evento
+
+        Returns:
+            El evento con su seq y timestamp
+
+        Raises:
+            TypeError, ValueError: Si `data` no se puede serializar
+        """
+        with self._lock:
+            event = {
+                "seq": self.last_seq + 1,
+                "kind": kind,
+                "timestamp": datetime.now().isoformat(),
+                "session_id": self.session_id,
+                "data": data
+            }
+            line = json.dumps(event, ensure_ascii=False, default=str)
+            self.last_seq += 1
+            self.writer.write(line)
+        return event
+
+    def ensure_seq(self, min_seq: int):
+        """Garantiza que los próximos eventos tengan seq mayor que min_seq"""
+        with self._lock:
+            self.last_seq = max(self.last_seq, min_seq)
+
+    def flush(self) -> bool:
+        """
+        Espera a que todos los eventos agregados estén en disco.
+
+        Returns:
+            False si el escritor no terminó a tiempo (ver BackgroundJSONLWriter.flush)
+        """
+        return self.writer.flush()
+
+    def size(self) -> int:
+        """Bytes escritos hasta ahora (tras vaciar lo pendiente)"""
+        self.flush()
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def iter_events(self, kinds: Optional[Iterable[str]] = None,
+                    start_offset: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre los eventos en orden.
+
+        Args:
+            kinds: Tipos a incluir (por defecto, todos)
+            start_offset: Byte desde el que leer (p. ej. el de una instantánea)
+        """
+        self.flush()
+        if not os.path.exists(self.path):
+            return
+
+        kinds = set(kinds) if kinds else None
+        with open(self.path, 'rb') as f:
+            f.seek(start_offset)
+            for raw_line in f:
+                try:
+                    event = json.loads(raw_line)
+                except ValueError:
+                    continue
+                if not isinstance(event, dict):
+                    continue
+                # Diarios de memoria anteriores guardaban el tipo en 'op'
+                kind = event.get("kind") or event.get("op")
+                if kinds is None or kind in kinds:
+                    yield {**event, "kind": kind}
+
+    def close(self):
+        """Escribe lo pendiente y cierra el registro"""
+        self.writer.close()
+
+
+__all__ = ['EventStore', 'EventKind']
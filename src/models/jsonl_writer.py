@@ -0,0 +1,208 @@
+"""
+Escritor JSONL en segundo plano con confirmación agrupada (group commit)
+
+Los llamadores solo encolan registros (o líneas JSON ya serializadas); un
+hilo dedicado los serializa y los agrega al archivo en lotes, cada `batch_size` registros o cada
+`flush_interval` segundos, lo que ocurra primero.
+
+Un error de escritura (disco lleno, permisos) no detiene el hilo: el lote se
+descarta, el error queda en `last_error` y el archivo se reabre en el lote
+siguiente. flush() nunca espera indefinidamente.
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, Any, Optional, Union
+
+
+# Marcadores internos de la cola
+_CLOSE = object()
+
+# Espera máxima por defecto de flush() (segundos)
+FLUSH_TIMEOUT = float(os.getenv("JSONL_FLUSH_TIMEOUT", "30"))
+
+
+class BackgroundJSONLWriter:
+    """
+    Agrega registros a un archivo JSONL sin bloquear al llamador.
+    """
+
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 0.2,
+                 fsync: bool = False):
+        """
+        Inicializa el escritor y arranca su hilo.
+
+        Args:
+            path: Archivo JSONL de destino (se abre en modo append)
+            batch_size: Registros máximos por escritura
+            flush_interval: Segundos máximos que un registro espera en memoria
+            fsync: Forzar fsync después de cada lote
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.stats = {"records": 0, "batches": 0, "dropped": 0}
+        self.last_error: Optional[BaseException] = None
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._closed = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._thread = threading.Thread(target=self._run, name="jsonl-writer", daemon=True)
+        self._thread.start()
+
+        # Vaciar lo pendiente aunque el programa termine sin llamar a close()
+        atexit.register(self.close)
+
+    def write(self, record: Union[Dict[str, Any], str]):
+        """
+        Encola un registro (no bloquea).
+
+        Args:
+            record: Registro a serializar en el hilo, o una línea JSON ya
+                serializada (str) que se escribe tal cual
+        """
+        if self._closed:
+            raise RuntimeError(f"El escritor de {self.path} ya está cerrado")
+        self._queue.put(record)
+
+    def flush(self, timeout: Optional[float] = FLUSH_TIMEOUT) -> bool:
+        """
+        Espera a que todo lo encolado hasta ahora esté procesado.
+
+        Args:
+            timeout: Segundos máximos de espera (None = sin límite)
+
+        Returns:
+            True si se completó antes del timeout (los lotes que fallaron
+            quedan en last_error y stats['dropped'])
+        """
+        if self._closed:
+            # close() ya escribió todo lo pendiente
+            return True
+        if not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Escribe lo pendiente y detiene el hilo"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    def _run(self):
+        """Bucle del hilo: agrupa registros y los escribe en lotes"""
+        f = None
+        waiters = []
+        try:
+            while True:
+                item = self._queue.get()
+                batch, waiters, closing = [], [], False
+                deadline = time.monotonic() + self.flush_interval
+
+                while True:
+                    if item is _CLOSE:
+                        closing = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+
+                    if closing or waiters or len(batch) >= self.batch_size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    try:
+                        if f is None:
+                            f = open(self.path, 'a', encoding='utf-8')
+                        self._write_batch(f, batch)
+                    except OSError as e:
+                        self._record_error(e, len(batch))
+                        if f is not None:
+                            try:
+                                f.close()
+                            except OSError:
+                                pass
+                        f = None
+                for waiter in waiters:
+                    waiter.set()
+                if closing:
+                    return
+        except Exception as e:
+            # Error inesperado: el hilo termina, pero nadie queda esperando
+            self._record_error(e, 0)
+        finally:
+            if f is not None:
+                try:
+                    f.close()
+                except OSError:
+                    pass
+            for waiter in waiters:
+                waiter.set()
+            self._release_waiters()
+
+    def _record_error(self, error: BaseException, dropped: int):
+        """Registra un error de escritura (avisa solo la primera vez seguida)"""
+        if self.last_error is None:
+            print(f"[!] Error escribiendo {self.path}: {error}")
+        self.last_error = error
+        self.stats["dropped"] += dropped
+
+    def _release_waiters(self):
+        """Libera los flush() encolados tras detenerse el hilo"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def _write_batch(self, f, batch):
+        """Serializa y escribe un lote completo con una sola llamada"""
+        lines = []
+        for record in batch:
+            if isinstance(record, str):
+                lines.append(record)
+                continue
+            try:
+                lines.append(json.dumps(record, ensure_ascii=False, default=str))
+            except Exception as e:
+                # Un registro defectuoso no debe detener el hilo del escritor
+                self.stats["dropped"] += 1
+                print(f"[!] Registro no serializable descartado: {e}")
+
+        if not lines:
+            return
+
+        f.write("\n".join(lines) + "\n")
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+        self.stats["records"] += len(lines)
+        self.stats["batches"] += 1
+        self.last_error = None
+
+
+__all__ = ['BackgroundJSONLWriter', 'FLUSH_TIMEOUT']
@@ -0,0 +1,355 @@
+"""
+Política de retención de sesiones: archivo comprimido de sesiones frías
+
+Los logs de `logs/` y la memoria de `memory/` crecen sin límite. El motor de
+retención mueve las sesiones antiguas (por edad o para respetar un tamaño
+máximo) a `logs/archive/` comprimidas con zstd (si `zstandard` está
+instalado) o gzip, y opcionalmente borra las muy antiguas. Las sesiones
+archivadas siguen en el índice, así que `/search` las encuentra, y se
+descomprimen solas al cargarlas con `/load`.
+
+Las sesiones locales del agente (`logs/session_YYYYMMDD_HHMMSS.jsonl` y su
+memoria `memory/session_..._memory.json[l]`) no son logs de CAI ni están en
+el índice: se agrupan por su propio ID y se juzgan por la fecha de
+modificación de sus archivos.
+"""
+
+import gzip
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+ARCHIVE_DIRNAME = "archive"
+
+# Extensión de los archivos nuevos según el compresor disponible
+ARCHIVE_EXT = ".zst" if zstandard else ".gz"
+
+DAY_SECONDS = 24 * 60 * 60
+
+# Archivos de una sesión local: session_{fecha}_{hora}.jsonl y session_{...}_memory.json[l]
+LOCAL_SESSION_FILE = re.compile(r'^(session_\d{8}_\d{6})(?:_memory)?\.jsonl?(?:\.gz|\.zst)?$')
+
+
+@dataclass
+class RetentionPolicy:
+    """Umbrales de la política de retención"""
+    archive_after_days: int = 30    # Sesiones sin cambios hace más de N días se archivan
+    delete_after_days: int = 0      # Sesiones sin cambios hace más de N días se borran (0 = nunca)
+    max_hot_mb: float = 200.0       # Tamaño máximo de logs sin comprimir (0 = sin límite)
+    keep_recent: int = 20           # Las N sesiones más recientes nunca se archivan ni borran
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        """Política con los umbrales de las variables de entorno RETENTION_*"""
+        return cls(
+            archive_after_days=int(os.getenv("RETENTION_ARCHIVE_DAYS", "30")),
+            delete_after_days=int(os.getenv("RETENTION_DELETE_DAYS", "0")),
+            max_hot_mb=float(os.getenv("RETENTION_MAX_HOT_MB", "200")),
+            keep_recent=int(os.getenv("RETENTION_KEEP_RECENT", "20"))
+        )
+
+
+def compress_file(src: str, dst: str):
+    """Comprime un archivo en streaming (zstd si dst termina en .zst, si no gzip)"""
+    with open(src, 'rb') as fin:
+        if dst.endswith(".zst"):
+            with open(dst, 'wb') as fout:
+                with zstandard.ZstdCompressor(level=10).stream_writer(fout) as writer:
+                    shutil.copyfileobj(fin, writer)
+        else:
+            with gzip.open(dst, 'wb') as fout:
+                shutil.copyfileobj(fin, fout)
+    # El archivo conserva la fecha del original (la edad de la sesión no cambia)
+    stat = os.stat(src)
+    os.utime(dst, (stat.st_atime, stat.st_mtime))
+
+
+def decompress_file(src: str, dst: str):
+    """Descomprime un archivo creado con compress_file()"""
+    if src.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("Se necesita el paquete 'zstandard' para restaurar archivos .zst")
+        with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+            with zstandard.ZstdDecompressor().stream_reader(fin) as reader:
+                shutil.copyfileobj(reader, fout)
+    else:
+        with gzip.open(src, 'rb') as fin, open(dst, 'wb') as fout:
+            shutil.copyfileobj(fin, fout)
+    stat = os.stat(src)
+    os.utime(dst, (stat.st_atime, stat.st_mtime))
+
+
+class RetentionManager:
+    """
+    Aplica la política de retención sobre las sesiones de un SessionManager.
+    """
+
+    def __init__(self, session_manager, policy: Optional[RetentionPolicy] = None):
+        """
+        Inicializa el motor de retención.
+
+        Args:
+            session_manager: SessionManager cuyas sesiones se gestionan
+            policy: Umbrales (por defecto, los de las variables de entorno)
+        """
+        self.session_manager = session_manager
+        self.index = session_manager.index
+        self.policy = policy or RetentionPolicy.from_env()
+        self.archive_dir = os.path.join(session_manager.logs_dir, ARCHIVE_DIRNAME)
+        self.memory_archive_dir = os.path.join(session_manager.memory_dir, ARCHIVE_DIRNAME)
+
+    def _memory_files(self, directory: str, session_id: str) -> List[str]:
+        """Archivos de memoria de una sesión dentro de un directorio"""
+        if not os.path.isdir(directory):
+            return []
+        return [name for name in os.listdir(directory) if name.startswith(f"{session_id}_memory")]
+
+    def _local_sessions(self) -> List[Dict[str, Any]]:
+        """
+        Sesiones locales del agente (ver LOCAL_SESSION_FILE), calientes y archivadas.
+
+        Returns:
+            Lista de {'filename', 'session_id', 'archived', 'size', 'mtime', 'paths'}; una
+            sesión con archivos en ambos lados aparece una vez por estado
+        """
+        directories = [
+            (self.session_manager.logs_dir, False),
+            (self.session_manager.memory_dir, False),
+            (self.archive_dir, True),
+            (self.memory_archive_dir, True)
+        ]
+        sessions: Dict[tuple, Dict[str, Any]] = {}
+        for directory, archived in directories:
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    match = LOCAL_SESSION_FILE.match(entry.name)
+                    # En los directorios de archivo solo cuentan los comprimidos
+                    compressed = entry.name.endswith(('.gz', '.zst'))
+                    if not match or compressed != archived or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    session = sessions.setdefault((match.group(1), archived), {
+                        'filename': match.group(1), 'session_id': match.group(1),
+                        'archived': archived, 'size': 0, 'mtime': 0.0, 'paths': []
+                    })
+                    session['size'] += stat.st_size
+                    session['mtime'] = max(session['mtime'], stat.st_mtime)
+                    session['paths'].append(entry.path)
+        return list(sessions.values())
+
+    # ------------------------------------------------------------------
+    # Plan
+    # ------------------------------------------------------------------
+
+    def plan(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Calcula las acciones de la política sin modificar nada.
+
+        Returns:
+            Lista de acciones {'filename', 'session_id', 'action', 'reason', 'size', 'age_days'}
+            con action 'archive' o 'delete'; las de sesiones locales llevan además 'paths'
+        """
+        now = now or time.time()
+        policy = self.policy
+
+        self.index.refresh()
+        sessions = self.index.list_sessions(limit=-1, include_archived=True)
+        protected = {s['filename'] for s in sessions if not s['archived']}
+        protected = set(sorted(protected, reverse=True)[:max(0, policy.keep_recent)])
+
+        local = self._local_sessions()
+        recent_local = sorted((s for s in local if not s['archived']), key=lambda s: s['mtime'], reverse=True)
+        protected.update(s['filename'] for s in recent_local[:max(0, policy.keep_recent)])
+
+        actions = []
+        planned = set()
+
+        def add(session, action, reason):
+            planned.add(session['filename'])
+            entry = {
+                'filename': session['filename'],
+                'session_id': session['session_id'],
+                'action': action,
+                'reason': reason,
+                'size': session['size'],
+                'age_days': round((now - session['mtime']) / DAY_SECONDS, 1)
+            }
+            if 'paths' in session:
+                entry['paths'] = session['paths']
+            actions.append(entry)
+
+        for session in sessions + local:
+            if session['filename'] in protected:
+                continue
+            age_days = (now - session['mtime']) / DAY_SECONDS
+            if policy.delete_after_days and age_days > policy.delete_after_days:
+                add(session, 'delete', f"sin cambios hace más de {policy.delete_after_days} días")
+            elif (not session['archived'] and policy.archive_after_days
+                  and age_days > policy.archive_after_days):
+                add(session, 'archive', f"sin cambios hace más de {policy.archive_after_days} días")
+
+        # Límite de tamaño: archivar las sesiones calientes más antiguas hasta cumplirlo
+        if policy.max_hot_mb:
+            limit = policy.max_hot_mb * 1024 * 1024
+            hot = [s for s in sessions + local if not s['archived'] and s['filename'] not in planned]
+            hot_bytes = sum(s['size'] for s in hot)
+            for session in sorted(hot, key=lambda s: s['mtime']):
+                if hot_bytes <= limit:
+                    break
+                if session['filename'] in protected:
+                    continue
+                add(session, 'archive', f"logs sin comprimir superan {policy.max_hot_mb:g} MB")
+                hot_bytes -= session['size']
+
+        return actions
+
+    # ------------------------------------------------------------------
+    # Aplicación
+    # ------------------------------------------------------------------
+
+    def apply(self, dry_run: bool = True) -> Dict[str, Any]:
+        """
+        Ejecuta (o simula) la política.
+
+        Args:
+            dry_run: Solo reportar lo que se haría
+
+        Returns:
+            Reporte con las acciones, contadores y bytes liberados
+        """
+        actions = self.plan()
+        report = {
+            'dry_run': dry_run,
+            'actions': actions,
+            'archived': 0,
+            'deleted': 0,
+            'bytes_freed': 0,
+            'errors': []
+        }
+        if dry_run:
+            return report
+
+        for action in actions:
+            try:
+                if 'paths' in action:
+                    report['bytes_freed'] += self._apply_local(action)
+                    report['deleted' if action['action'] == 'delete' else 'archived'] += 1
+                elif action['action'] == 'delete':
+                    report['bytes_freed'] += self._delete(action['filename'])
+                    report['deleted'] += 1
+                else:
+                    report['bytes_freed'] += self.archive(action['filename'])
+                    report['archived'] += 1
+            except Exception as e:
+                report['errors'].append(f"{action['filename']}: {e}")
+                print(f"[!] Retención: error con {action['filename']}: {e}")
+
+        return report
+
+    def archive(self, filename: str) -> int:
+        """
+        Comprime el log y la memoria de una sesión y los saca de los directorios calientes.
+
+        Returns:
+            Bytes liberados (original - comprimido)
+        """
+        session = self.index.get(filename)
+        if not session or session['archived']:
+            return 0
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        src = os.path.join(self.session_manager.logs_dir, filename)
+        dst = os.path.join(self.archive_dir, filename + ARCHIVE_EXT)
+        compress_file(src, dst)
+        freed = os.path.getsize(src) - os.path.getsize(dst)
+
+        memory_dir = self.session_manager.memory_dir
+        for name in self._memory_files(memory_dir, session['session_id']):
+            os.makedirs(self.memory_archive_dir, exist_ok=True)
+            memory_src = os.path.join(memory_dir, name)
+            memory_dst = os.path.join(self.memory_archive_dir, name + ARCHIVE_EXT)
+            compress_file(memory_src, memory_dst)
+            freed += os.path.getsize(memory_src) - os.path.getsize(memory_dst)
+            os.remove(memory_src)
+
+        # Primero el índice (la sesión sigue siendo buscable), después el borrado
+        self.index.mark_archived(filename, os.path.join(ARCHIVE_DIRNAME, filename + ARCHIVE_EXT))
+        os.remove(src)
+        return freed
+
+    def restore(self, filename: str) -> bool:
+        """
+        Descomprime una sesión archivada de vuelta a logs/ y memory/.
+
+        Returns:
+            True si se restauró
+        """
+        session = self.index.get(filename)
+        if not session or not session['archived']:
+            return False
+
+        decompress_file(session['filepath'], os.path.join(self.session_manager.logs_dir, filename))
+        os.remove(session['filepath'])
+
+        for name in self._memory_files(self.memory_archive_dir, session['session_id']):
+            archived = os.path.join(self.memory_archive_dir, name)
+            original = os.path.splitext(name)[0]
+            decompress_file(archived, os.path.join(self.session_manager.memory_dir, original))
+            os.remove(archived)
+
+        self.index.mark_archived(filename, "")
+        return True
+
+    def _apply_local(self, action: Dict[str, Any]) -> int:
+        """
+        Archiva o borra los archivos de una sesión local.
+
+        Returns:
+            Bytes liberados
+        """
+        freed = 0
+        destinations = {
+            os.path.abspath(self.session_manager.logs_dir): self.archive_dir,
+            os.path.abspath(self.session_manager.memory_dir): self.memory_archive_dir
+        }
+        for path in action['paths']:
+            if not os.path.exists(path):
+                continue
+            size = os.path.getsize(path)
+            if action['action'] == 'archive':
+                archive_dir = destinations[os.path.abspath(os.path.dirname(path))]
+                os.makedirs(archive_dir, exist_ok=True)
+                dst = os.path.join(archive_dir, os.path.basename(path) + ARCHIVE_EXT)
+                compress_file(path, dst)
+                size -= os.path.getsize(dst)
+            os.remove(path)
+            freed += size
+        return freed
+
+    def _delete(self, filename: str) -> int:
+        """Borra una sesión (caliente o archivada) y devuelve los bytes liberados"""
+        session = self.index.get(filename)
+        if not session:
+            return 0
+
+        freed = os.path.getsize(session['filepath']) if os.path.exists(session['filepath']) else 0
+        for directory in (self.session_manager.memory_dir, self.memory_archive_dir):
+            for name in self._memory_files(directory, session['session_id']):
+                freed += os.path.getsize(os.path.join(directory, name))
+
+        self.session_manager.delete_session(filename)
+        return freed
+
+
+__all__ = ['RetentionManager', 'RetentionPolicy', 'compress_file', 'decompress_file', 'ARCHIVE_EXT']
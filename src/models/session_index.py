@@ -0,0 +1,496 @@
+"""
+Índice SQLite de sesiones de CAI
+
+Guarda los metadatos de cada log `cai_*.jsonl` (fechas, contadores, preview)
+junto con el tamaño, mtime y offset ya procesado del archivo. Al refrescar,
+solo se leen los bytes nuevos de los logs que cambiaron, de modo que listar,
+buscar o sacar estadísticas no recorre todos los logs.
+
+Los mensajes de usuario, del asistente y las salidas de herramientas se
+indexan además en una tabla FTS5 para búsqueda de texto completo con
+ranking BM25 (si SQLite no trae FTS5, se usa una tabla normal con LIKE).
+
+Las sesiones archivadas por la política de retención conservan su fila y
+sus textos indexados (columna `archive` con la ruta del comprimido), así que
+siguen apareciendo en las búsquedas aunque ya no estén en el directorio.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+
+
+INDEX_FILENAME = ".session_index.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    filename TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    timestamp TEXT,
+    user TEXT,
+    start_time TEXT,
+    last_activity TEXT,
+    user_messages INTEGER NOT NULL DEFAULT 0,
+    assistant_messages INTEGER NOT NULL DEFAULT 0,
+    preview TEXT NOT NULL DEFAULT '',
+    size INTEGER NOT NULL DEFAULT 0,
+    mtime REAL NOT NULL DEFAULT 0,
+    parsed_offset INTEGER NOT NULL DEFAULT 0,
+    archive TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_session_id ON sessions(session_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user);
+CREATE TABLE IF NOT EXISTS indexed_refs (
+    filename TEXT NOT NULL,
+    ref TEXT NOT NULL,
+    PRIMARY KEY (filename, ref)
+);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages USING fts5(
+    content, role UNINDEXED, filename UNINDEXED, timestamp UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Alternativa sin FTS5: misma tabla, búsqueda por LIKE
+PLAIN_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    content TEXT, role TEXT, filename TEXT, timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_messages_filename ON messages(filename);
+"""
+
+# Roles indexados para búsqueda
+SEARCH_ROLES = {'user_message': 'user', 'assistant_message': 'assistant',
+                'tool_output': 'tool', 'tool_result': 'tool'}
+
+
+def parse_log_filename(filename: str) -> Optional[Dict[str, str]]:
+    """
+    Extrae session_id, timestamp y usuario del nombre de un log de CAI.
+
+    Formato: cai_{session_id}_{timestamp}_{user}_{os}_{kernel}_{ip}.jsonl
+    """
+    if not (filename.startswith('cai_') and filename.endswith('.jsonl')):
+        return None
+
+    parts = filename.replace('.jsonl', '').split('_')
+    if len(parts) < 3:
+        return None
+
+    return {
+        "session_id": parts[1],
+        "timestamp": parts[2],
+        "user": parts[3] if len(parts) > 3 else "unknown"
+    }
+
+
+def _like_pattern(text: str) -> str:
+    """Patrón LIKE que busca el texto literal en cualquier posición"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class SessionIndex:
+    """
+    Índice incremental de los logs de sesión de un directorio.
+    """
+
+    def __init__(self, logs_dir: str = "logs", db_path: Optional[str] = None):
+        """
+        Inicializa (o abre) el índice.
+
+        Args:
+            logs_dir: Directorio con los logs cai_*.jsonl
+            db_path: Ruta de la base SQLite (por defecto, dentro de logs_dir)
+        """
+        self.logs_dir = logs_dir
+        os.makedirs(logs_dir, exist_ok=True)
+        self.db_path = db_path or os.path.join(logs_dir, INDEX_FILENAME)
+
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+        # Índices creados antes de la columna de archivo
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(sessions)")}
+        if "archive" not in columns:
+            self.conn.execute("ALTER TABLE sessions ADD COLUMN archive TEXT NOT NULL DEFAULT ''")
+
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError:
+            self.conn.executescript(PLAIN_SCHEMA)
+            self.fts_enabled = False
+        self.conn.commit()
+
+    # ------------------------------------------------------------------
+    # Actualización incremental
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> int:
+        """
+        Sincroniza el índice con el directorio de logs.
+
+        Solo se procesan los archivos nuevos o cuyo tamaño/mtime cambió, y de
+        ellos solo los bytes posteriores al último offset indexado.
+
+        Returns:
+            Número de archivos (re)indexados
+        """
+        if not os.path.exists(self.logs_dir):
+            return 0
+
+        with self._lock:
+            known = {
+                row["filename"]: row
+                for row in self.conn.execute("SELECT * FROM sessions")
+            }
+
+            updated = 0
+            present = set()
+            with os.scandir(self.logs_dir) as entries:
+                for entry in entries:
+                    if not parse_log_filename(entry.name):
+                        continue
+                    present.add(entry.name)
+                    stat = entry.stat()
+                    row = known.get(entry.name)
+                    if row and row["archive"]:
+                        # El log volvió al directorio: deja de estar archivado
+                        self.mark_archived(entry.name, "")
+                    if row and row["size"] == stat.st_size and row["mtime"] == stat.st_mtime:
+                        continue
+                    if self._index_file(entry.name, stat, row):
+                        updated += 1
+
+            # Las sesiones archivadas no están en el directorio pero se conservan
+            removed = {name for name in set(known) - present if not known[name]["archive"]}
+            if removed:
+                for name in removed:
+                    self._drop_documents(name)
+                self.conn.executemany("DELETE FROM sessions WHERE filename = ?",
+                                      [(name,) for name in removed])
+
+            self.conn.commit()
+            return updated
+
+    def refresh_file(self, filename: str) -> bool:
+        """Reindexa un solo archivo si cambió (sin recorrer el directorio)"""
+        path = os.path.join(self.logs_dir, filename)
+        if not parse_log_filename(filename) or not os.path.exists(path):
+            return False
+
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM sessions WHERE filename = ?",
+                                    (filename,)).fetchone()
+            stat = os.stat(path)
+            if row and row["archive"]:
+                self.mark_archived(filename, "")
+            if row and row["size"] == stat.st_size and row["mtime"] == stat.st_mtime:
+                return False
+            updated = self._index_file(filename, stat, row)
+            self.conn.commit()
+            return updated
+
+    def _index_file(self, filename: str, stat: os.stat_result, row: Optional[sqlite3.Row]) -> bool:
+        """Procesa los bytes nuevos de un log y actualiza su fila"""
+        name_info = parse_log_filename(filename)
+
+        # Si el archivo se acortó (reescrito o rotado), se indexa desde cero
+        if row is None or stat.st_size < row["parsed_offset"]:
+            state = {
+                "start_time": None, "last_activity": "", "user_messages": 0,
+                "assistant_messages": 0, "preview": "", "parsed_offset": 0
+            }
+            if row is not None:
+                self._drop_documents(filename)
+        else:
+            state = {key: row[key] for key in
+                     ("start_time", "last_activity", "user_messages",
+                      "assistant_messages", "preview", "parsed_offset")}
+
+        path = os.path.join(self.logs_dir, filename)
+        offset = state["parsed_offset"]
+        documents = []
+
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                for raw_line in f:
+                    # Una línea sin '\n' puede estar a medio escribir: se relee después
+                    if not raw_line.endswith(b"\n"):
+                        break
+                    offset += len(raw_line)
+                    try:
+                        event = json.loads(raw_line)
+                    except ValueError:
+                        continue
+                    if not isinstance(event, dict):
+                        continue
+                    self._apply_event(state, event)
+                    documents.extend(self._extract_documents(event))
+        except OSError as e:
+            print(f"[!] Error indexando {filename}: {e}")
+            return False
+
+        if state["start_time"] is None and offset == 0:
+            # Archivo vacío o sin líneas completas todavía
+            return False
+
+        self.conn.execute("""
+            INSERT OR REPLACE INTO sessions (
+                filename, session_id, timestamp, user, start_time, last_activity,
+                user_messages, assistant_messages, preview, size, mtime, parsed_offset
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            filename, name_info["session_id"], name_info["timestamp"], name_info["user"],
+            state["start_time"] or "", state["last_activity"],
+            state["user_messages"], state["assistant_messages"], state["preview"],
+            stat.st_size, stat.st_mtime, offset
+        ))
+        self._add_documents(filename, documents)
+        return True
+
+    def mark_archived(self, filename: str, archive: str):
+        """
+        Registra que un log se movió a un archivo comprimido (o que se restauró).
+
+        Args:
+            filename: Nombre del log
+            archive: Ruta del comprimido relativa a logs_dir ('' = restaurado)
+        """
+        with self._lock:
+            self.conn.execute("UPDATE sessions SET archive = ? WHERE filename = ?", (archive, filename))
+            self.conn.commit()
+
+    def remove(self, filename: str):
+        """Elimina una sesión del índice junto con sus textos indexados"""
+        with self._lock:
+            self._drop_documents(filename)
+            self.conn.execute("DELETE FROM sessions WHERE filename = ?", (filename,))
+            self.conn.commit()
+
+    @staticmethod
+    def _extract_documents(event: Dict[str, Any]) -> List[tuple]:
+        """
+        Obtiene los textos buscables de un evento como (rol, contenido, timestamp, ref).
+
+        Los registros de completado de CAI repiten toda la conversación en
+        'messages'; de ellos solo se toman las salidas de herramientas, una
+        vez por tool_call_id (ref).
+        """
+        timestamp = event.get('timestamp', '')
+        role = SEARCH_ROLES.get(event.get('event'))
+        if role:
+            content = event.get('content') or event.get('output') or ''
+            return [(role, str(content), timestamp, None)] if content else []
+
+        documents = []
+        for message in event.get('messages') or []:
+            if isinstance(message, dict) and message.get('role') == 'tool' and message.get('content'):
+                ref = message.get('tool_call_id') or hashlib.sha1(
+                    str(message['content']).encode('utf-8')).hexdigest()
+                documents.append(('tool', str(message['content']), timestamp, ref))
+        return documents
+
+    def _add_documents(self, filename: str, documents: List[tuple]):
+        """Inserta textos en la tabla de búsqueda (sin repetir refs ya indexadas)"""
+        rows = []
+        for role, content, timestamp, ref in documents:
+            if ref is not None:
+                inserted = self.conn.execute(
+                    "INSERT OR IGNORE INTO indexed_refs (filename, ref) VALUES (?, ?)",
+                    (filename, ref)
+                ).rowcount
+                if not inserted:
+                    continue
+            rows.append((content, role, filename, timestamp))
+
+        if rows:
+            self.conn.executemany(
+                "INSERT INTO messages (content, role, filename, timestamp) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def _drop_documents(self, filename: str):
+        """Elimina los textos indexados de un archivo"""
+        self.conn.execute("DELETE FROM messages WHERE filename = ?", (filename,))
+        self.conn.execute("DELETE FROM indexed_refs WHERE filename = ?", (filename,))
+
+    @staticmethod
+    def _apply_event(state: Dict[str, Any], event: Dict[str, Any]):
+        """Acumula un evento en los metadatos de la sesión"""
+        if state["start_time"] is None:
+            state["start_time"] = event.get('timestamp', '')
+
+        event_type = event.get('event')
+        if event_type == 'user_message':
+            state["user_messages"] += 1
+            state["preview"] = (event.get('content') or '')[:100]
+        elif event_type == 'assistant_message':
+            state["assistant_messages"] += 1
+
+        if 'timestamp' in event:
+            state["last_activity"] = event['timestamp']
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _row_to_session(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convierte una fila al formato de sesión de SessionManager"""
+        return {
+            'session_id': row["session_id"],
+            'filename': row["filename"],
+            'filepath': os.path.join(self.logs_dir, row["archive"] or row["filename"]),
+            'timestamp': row["timestamp"],
+            'user': row["user"],
+            'start_time': row["start_time"],
+            'last_activity': row["last_activity"],
+            'user_messages': row["user_messages"],
+            'assistant_messages': row["assistant_messages"],
+            'total_interactions': row["user_messages"] + row["assistant_messages"],
+            'last_message_preview': row["preview"],
+            'size': row["size"],
+            'mtime': row["mtime"],
+            'archived': bool(row["archive"])
+        }
+
+    def get(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Obtiene los metadatos de un log por nombre de archivo"""
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM sessions WHERE filename = ?",
+                                    (filename,)).fetchone()
+        return self._row_to_session(row) if row else None
+
+    def list_sessions(self, limit: int = 20, include_archived: bool = False) -> List[Dict[str, Any]]:
+        """
+        Sesiones más recientes (mismo orden que los nombres de archivo, descendente).
+
+        Args:
+            limit: Número máximo de sesiones (-1 = sin límite)
+            include_archived: Incluir las sesiones archivadas
+        """
+        where = "" if include_archived else "WHERE archive = '' "
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT * FROM sessions {where}ORDER BY filename DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._row_to_session(row) for row in rows]
+
+    def archived_filenames(self) -> List[str]:
+        """Nombres de los logs archivados"""
+        with self._lock:
+            return [row["filename"] for row in
+                    self.conn.execute("SELECT filename FROM sessions WHERE archive != ''")]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Búsqueda de texto completo en los mensajes de todas las sesiones.
+
+        Cada palabra de la consulta debe aparecer (sin distinguir mayúsculas
+        ni acentos). Los resultados se ordenan por relevancia (BM25) y se
+        agrupan por sesión, con el fragmento que mejor coincide.
+
+        Args:
+            query: Texto a buscar
+            limit: Número máximo de sesiones
+
+        Returns:
+            Sesiones con 'snippet', 'match_role' y 'matches' añadidos
+        """
+        terms = query.split()
+        if not terms:
+            return []
+
+        # Mejor coincidencia por sesión (ROW_NUMBER por archivo) y LIMIT en SQL;
+        # el fragmento se construye después, solo para las filas devueltas
+        if self.fts_enabled:
+            fts_query = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+            hits_sql = "SELECT rowid AS id, filename, role, bm25(messages) AS score " \
+                       "FROM messages WHERE messages MATCH ?"
+            params: List[Any] = [fts_query]
+            order = "score, id DESC"
+        else:
+            where = " AND ".join("content LIKE ? ESCAPE '\\'" for _ in terms)
+            hits_sql = f"SELECT rowid AS id, filename, role, 0 AS score FROM messages WHERE {where}"
+            params = [_like_pattern(term) for term in terms]
+            order = "id DESC"
+
+        with self._lock:
+            best = self.conn.execute(f"""
+                WITH hits AS ({hits_sql}),
+                ranked AS (
+                    SELECT id, filename, role, score,
+                           ROW_NUMBER() OVER (PARTITION BY filename ORDER BY {order}) AS position,
+                           COUNT(*) OVER (PARTITION BY filename) AS matches
+                    FROM hits
+                )
+                SELECT id, filename, role, score, matches FROM ranked
+                WHERE position = 1 ORDER BY {order} LIMIT ?
+            """, params + [limit]).fetchall()
+            if not best:
+                return []
+
+            ids = [row["id"] for row in best]
+            placeholders = ", ".join("?" for _ in ids)
+            if self.fts_enabled:
+                snippets = dict(self.conn.execute(
+                    f"SELECT rowid, snippet(messages, 0, '[', ']', '…', 16) FROM messages "
+                    f"WHERE messages MATCH ? AND rowid IN ({placeholders})", [fts_query] + ids
+                ).fetchall())
+            else:
+                snippets = dict(self.conn.execute(
+                    f"SELECT rowid, substr(content, 1, 120) FROM messages WHERE rowid IN ({placeholders})", ids
+                ).fetchall())
+
+            results = []
+            for row in best:
+                session = self.get(row["filename"])
+                if session:
+                    results.append({**session, "snippet": snippets.get(row["id"], ""),
+                                    "match_role": row["role"], "score": row["score"],
+                                    "matches": row["matches"]})
+        return results
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Totales agregados de todas las sesiones indexadas"""
+        with self._lock:
+            totals = self.conn.execute(
+                "SELECT COUNT(*) AS sessions, "
+                "COALESCE(SUM(user_messages + assistant_messages), 0) AS messages, "
+                "COALESCE(SUM(archive != ''), 0) AS archived "
+                "FROM sessions"
+            ).fetchone()
+            users = {
+                row["user"]: row["count"]
+                for row in self.conn.execute(
+                    "SELECT user, COUNT(*) AS count FROM sessions GROUP BY user"
+                )
+            }
+
+        total_sessions = totals["sessions"]
+        total_messages = totals["messages"]
+        return {
+            'total_sessions': total_sessions,
+            'total_messages': total_messages,
+            'archived_sessions': totals["archived"],
+            'users': users,
+            'average_messages_per_session': total_messages / total_sessions if total_sessions > 0 else 0
+        }
+
+    def close(self):
+        """Cierra la conexión con la base"""
+        with self._lock:
+            self.conn.close()
+
+
+__all__ = ['SessionIndex', 'parse_log_filename', 'INDEX_FILENAME']
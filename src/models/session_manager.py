@@ -3,10 +3,22 @@ Session Manager - Gestiona sesiones persistentes y reanudación de conversacione
 """
 
 import os
-import json
+import bisect
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
-from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from .session_index import SessionIndex, parse_log_filename
+from .session_view import SessionView, event_to_message
+from .retention import RetentionManager
+
+
+class AmbiguousSessionError(ValueError):
+    """El prefijo de session_id coincide con más de una sesión"""
+    
+    def __init__(self, prefix: str, candidates: List[str]):
+        self.prefix = prefix
+        self.candidates = candidates
+        super().__init__(f"El ID '{prefix}' es ambiguo: coincide con {len(candidates)} sesiones")
 
 
 class SessionManager:
@@ -30,31 +42,113 @@ class SessionManager:
         """
         self.logs_dir = logs_dir
         self.memory_dir = memory_dir
-        self.sessions_cache: Dict[str, Dict] = {}
         
-    def list_sessions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        # Índice SQLite de metadatos (se actualiza solo con los logs que cambian)
+        self.index = SessionIndex(logs_dir)
+        
+        # Archivo comprimido de sesiones frías (logs/archive/)
+        self.retention = RetentionManager(self)
+        
+        # Mapa session_id -> filename, reconstruido solo si cambia el directorio
+        self._id_to_file: Dict[str, str] = {}
+        self._sorted_ids: List[str] = []
+        self._dir_mtime: Optional[float] = None
+    
+    def _refresh_id_map(self):
+        """Reconstruye el mapa ID -> archivo si el mtime del directorio cambió"""
+        try:
+            dir_mtime = os.stat(self.logs_dir).st_mtime
+        except FileNotFoundError:
+            self._id_to_file, self._sorted_ids, self._dir_mtime = {}, [], None
+            return
+        
+        if dir_mtime == self._dir_mtime:
+            return
+        
+        id_to_file = {}
+        # Orden por nombre: ante IDs repetidos gana el archivo más reciente.
+        # Las sesiones archivadas (fuera del directorio) también se resuelven.
+        filenames = set(os.listdir(self.logs_dir)) | set(self.index.archived_filenames())
+        for filename in sorted(filenames):
+            info = parse_log_filename(filename)
+            if info:
+                id_to_file[info['session_id']] = filename
+        
+        self._id_to_file = id_to_file
+        self._sorted_ids = sorted(id_to_file)
+        self._dir_mtime = dir_mtime
+    
+    def resolve_session_file(self, session_id: str) -> Optional[str]:
+        """
+        Resuelve un session_id completo, un prefijo único o un nombre de archivo.
+        
+        Args:
+            session_id: UUID, prefijo del UUID (ej: '0a28b9e5') o filename del log
+            
+        Returns:
+            Nombre del archivo de log, o None si no existe
+            
+        Raises:
+            AmbiguousSessionError: Si el prefijo coincide con varias sesiones
+        """
+        self._refresh_id_map()
+        
+        if session_id in self._id_to_file:
+            return self._id_to_file[session_id]
+        
+        info = parse_log_filename(os.path.basename(session_id))
+        if info and self._id_to_file.get(info['session_id']) == os.path.basename(session_id):
+            return os.path.basename(session_id)
+        
+        # Los IDs que empiezan por el prefijo son contiguos en la lista ordenada
+        start = bisect.bisect_left(self._sorted_ids, session_id)
+        candidates = []
+        for candidate in self._sorted_ids[start:]:
+            if not candidate.startswith(session_id):
+                break
+            candidates.append(candidate)
+            if len(candidates) > 10:
+                break
+        
+        if not candidates:
+            return None
+        if len(candidates) > 1:
+            raise AmbiguousSessionError(session_id, candidates)
+        return self._id_to_file[candidates[0]]
+    
+    def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene los metadatos de una sesión desde el índice (sin leer sus eventos).
+        
+        Args:
+            session_id: UUID, prefijo único o filename
+            
+        Returns:
+            Metadatos de la sesión o None si no existe
+        """
+        filename = self.resolve_session_file(session_id)
+        return self._parse_session_from_log(filename) if filename else None
+        
+    def list_sessions(self, limit: int = 20, include_archived: bool = False) -> List[Dict[str, Any]]:
         """
         Lista todas las sesiones disponibles ordenadas por fecha.
         
         Args:
             limit: Número máximo de sesiones a retornar
+            include_archived: Incluir las sesiones archivadas por la retención
             
         Returns:
             Lista de diccionarios con información de cada sesión
         """
-        sessions = []
-        
-        # Buscar archivos de log de CAI
-        if os.path.exists(self.logs_dir):
-            for filename in sorted(os.listdir(self.logs_dir), reverse=True):
-                if filename.startswith('cai_') and filename.endswith('.jsonl'):
-                    session_info = self._parse_session_from_log(filename)
-                    if session_info:
-                        sessions.append(session_info)
-                        if len(sessions) >= limit:
-                            break
-        
-        return sessions
+        self.index.refresh()
+        return self.index.list_sessions(limit, include_archived)
+    
+    def _ensure_hot(self, filename: str):
+        """Restaura la sesión a logs/ si la política de retención la archivó"""
+        info = self.index.get(filename)
+        if info and info['archived']:
+            print(f"[*] Restaurando sesión archivada: {info['session_id'][:16]}...")
+            self.retention.restore(filename)
     
     def _parse_session_from_log(self, filename: str) -> Optional[Dict[str, Any]]:
         """
@@ -66,72 +160,10 @@ class SessionManager:
         Returns:
             Diccionario con información de la sesión o None si hay error
         """
-        filepath = os.path.join(self.logs_dir, filename)
-        
         try:
-            # Extraer información del nombre del archivo
-            # Formato: cai_{session_id}_{timestamp}_{user}_{os}_{kernel}_{ip}.jsonl
-            parts = filename.replace('.jsonl', '').split('_')
-            
-            if len(parts) < 3:
-                return None
-            
-            session_id = parts[1]  # El UUID después de 'cai_'
-            timestamp_str = parts[2] if len(parts) > 2 else "unknown"
-            user = parts[3] if len(parts) > 3 else "unknown"
-            
-            # Leer primera y última línea para obtener info de sesión
-            with open(filepath, 'r') as f:
-                lines = f.readlines()
-                
-            if not lines:
-                return None
-            
-            # Primera línea debe ser session_start
-            first_event = json.loads(lines[0])
-            
-            # Contar mensajes
-            user_messages = 0
-            assistant_messages = 0
-            last_timestamp = first_event.get('timestamp', '')
-            
-            for line in lines:
-                try:
-                    event = json.loads(line)
-                    if event.get('event') == 'user_message':
-                        user_messages += 1
-                    elif event.get('event') == 'assistant_message':
-                        assistant_messages += 1
-                    if 'timestamp' in event:
-                        last_timestamp = event['timestamp']
-                except:
-                    continue
-            
-            # Obtener preview del último mensaje del usuario
-            last_user_message = ""
-            for line in reversed(lines):
-                try:
-                    event = json.loads(line)
-                    if event.get('event') == 'user_message':
-                        last_user_message = event.get('content', '')[:100]
-                        break
-                except:
-                    continue
-            
-            return {
-                'session_id': session_id,
-                'filename': filename,
-                'filepath': filepath,
-                'timestamp': timestamp_str,
-                'user': user,
-                'start_time': first_event.get('timestamp', ''),
-                'last_activity': last_timestamp,
-                'user_messages': user_messages,
-                'assistant_messages': assistant_messages,
-                'total_interactions': user_messages + assistant_messages,
-                'last_message_preview': last_user_message
-            }
-            
+            # Solo se leen los bytes nuevos desde la última indexación
+            self.index.refresh_file(filename)
+            return self.index.get(filename)
         except Exception as e:
             print(f"[!] Error parseando {filename}: {e}")
             return None
@@ -141,21 +173,22 @@ class SessionManager:
         Carga una sesión completa con todo su contexto.
         
         Args:
-            session_id: ID de la sesión a cargar (puede ser el UUID o el filename)
+            session_id: ID de la sesión a cargar (UUID, prefijo único o filename)
             
         Returns:
             Diccionario con toda la información de la sesión
+            
+        Raises:
+            AmbiguousSessionError: Si el prefijo coincide con varias sesiones
         """
         # Buscar el archivo de log correspondiente
-        log_file = None
-        
-        if os.path.exists(self.logs_dir):
-            for filename in os.listdir(self.logs_dir):
-                if session_id in filename and filename.endswith('.jsonl'):
-                    log_file = os.path.join(self.logs_dir, filename)
-                    break
+        filename = self.resolve_session_file(session_id)
+        if not filename:
+            return None
         
-        if not log_file or not os.path.exists(log_file):
+        self._ensure_hot(filename)
+        log_file = os.path.join(self.logs_dir, filename)
+        if not os.path.exists(log_file):
             return None
         
         # Cargar todos los eventos del log
@@ -163,30 +196,16 @@ class SessionManager:
         messages = []
         
         try:
-            with open(log_file, 'r') as f:
-                for line in f:
-                    try:
-                        event = json.loads(line)
-                        events.append(event)
-                        
-                        # Extraer mensajes para reconstruir conversación
-                        if event.get('event') == 'user_message':
-                            messages.append({
-                                'role': 'user',
-                                'content': event.get('content', ''),
-                                'timestamp': event.get('timestamp', '')
-                            })
-                        elif event.get('event') == 'assistant_message':
-                            messages.append({
-                                'role': 'assistant',
-                                'content': event.get('content', ''),
-                                'timestamp': event.get('timestamp', '')
-                            })
-                    except:
-                        continue
+            for event in SessionView(log_file).iter_events():
+                events.append(event)
+                
+                # Extraer mensajes para reconstruir conversación
+                message = event_to_message(event)
+                if message:
+                    messages.append(message)
             
             # Extraer información adicional
-            session_info = self._parse_session_from_log(os.path.basename(log_file))
+            session_info = self._parse_session_from_log(filename)
             
             return {
                 'session_info': session_info,
@@ -200,6 +219,32 @@ class SessionManager:
             print(f"[!] Error cargando sesión: {e}")
             return None
     
+    def open_session(self, session_id: str) -> Optional[SessionView]:
+        """
+        Abre una vista perezosa de la sesión (no lee sus eventos todavía).
+        
+        Preferible a load_session() para sesiones largas: permite leer los
+        últimos mensajes o páginas del historial sin cargar todo el log.
+        
+        Args:
+            session_id: UUID, prefijo único o filename
+            
+        Returns:
+            SessionView o None si la sesión no existe
+            
+        Raises:
+            AmbiguousSessionError: Si el prefijo coincide con varias sesiones
+        """
+        filename = self.resolve_session_file(session_id)
+        if not filename:
+            return None
+        
+        self._ensure_hot(filename)
+        return SessionView(
+            os.path.join(self.logs_dir, filename),
+            session_info=self._parse_session_from_log(filename)
+        )
+    
     def get_session_context(self, session_id: str) -> Optional[List[Dict[str, str]]]:
         """
         Obtiene solo los mensajes de contexto de una sesión para reanudar.
@@ -221,55 +266,57 @@ class SessionManager:
         """
         Busca sesiones que contengan cierto texto en sus mensajes.
         
+        Usa el índice de texto completo: busca en todos los mensajes de
+        usuario, del asistente y salidas de herramientas de todas las sesiones.
+        
         Args:
-            query: Texto a buscar
+            query: Texto a buscar (todas las palabras deben aparecer)
             limit: Número máximo de resultados
             
         Returns:
-            Lista de sesiones que coinciden con la búsqueda
+            Lista de sesiones ordenadas por relevancia, con el fragmento
+            que coincide en 'snippet'
         """
-        matching_sessions = []
-        query_lower = query.lower()
-        
-        sessions = self.list_sessions(limit=100)  # Buscar en más sesiones
-        
-        for session_info in sessions:
-            # Buscar en el preview del último mensaje
-            if query_lower in session_info.get('last_message_preview', '').lower():
-                matching_sessions.append(session_info)
-                if len(matching_sessions) >= limit:
-                    break
-        
-        return matching_sessions
+        self.index.refresh()
+        return self.index.search(query, limit)
     
     def delete_session(self, session_id: str) -> bool:
         """
         Elimina una sesión y todos sus archivos asociados.
         
         Args:
-            session_id: ID de la sesión a eliminar
+            session_id: ID de la sesión a eliminar (UUID o prefijo único)
             
         Returns:
             True si se eliminó correctamente
+            
+        Raises:
+            AmbiguousSessionError: Si el prefijo coincide con varias sesiones
         """
         deleted = False
         
-        # Eliminar log de CAI
-        if os.path.exists(self.logs_dir):
-            for filename in os.listdir(self.logs_dir):
-                if session_id in filename:
-                    try:
-                        os.remove(os.path.join(self.logs_dir, filename))
-                        deleted = True
-                    except Exception as e:
-                        print(f"[!] Error eliminando {filename}: {e}")
+        # Eliminar log de CAI (solo el de esta sesión, nunca por coincidencia parcial)
+        filename = self.resolve_session_file(session_id)
+        if filename:
+            session_id = parse_log_filename(filename)['session_id']
+            info = self.index.get(filename)
+            # Si está archivada, el log vive comprimido en logs/archive/
+            path = info['filepath'] if info else os.path.join(self.logs_dir, filename)
+            try:
+                os.remove(path)
+                deleted = True
+            except Exception as e:
+                print(f"[!] Error eliminando {filename}: {e}")
+            self.index.remove(filename)
         
-        # Eliminar memoria conversacional
-        if os.path.exists(self.memory_dir):
-            for filename in os.listdir(self.memory_dir):
-                if session_id in filename:
+        # Eliminar memoria conversacional (también la archivada)
+        for directory in (self.memory_dir, self.retention.memory_archive_dir):
+            if not os.path.isdir(directory):
+                continue
+            for filename in os.listdir(directory):
+                if filename.startswith(f"{session_id}_memory"):
                     try:
-                        os.remove(os.path.join(self.memory_dir, filename))
+                        os.remove(os.path.join(directory, filename))
                     except Exception as e:
                         print(f"[!] Error eliminando {filename}: {e}")
         
@@ -324,6 +371,8 @@ class SessionManager:
             messages = session.get('total_interactions', 0)
             user = session.get('user', 'unknown')
             preview = session.get('last_message_preview', '')[:30]
+            if session.get('archived'):
+                preview = f"📦 {preview}"
             
             print(f"{idx:<4} {session_id_short:<16} {formatted_timestamp:<20} {messages:<10} {user:<10} {preview:<30}")
         
@@ -336,20 +385,5 @@ class SessionManager:
         Returns:
             Diccionario con estadísticas
         """
-        sessions = self.list_sessions(limit=1000)
-        
-        total_sessions = len(sessions)
-        total_messages = sum(s.get('total_interactions', 0) for s in sessions)
-        
-        # Contar por usuario
-        users = {}
-        for session in sessions:
-            user = session.get('user', 'unknown')
-            users[user] = users.get(user, 0) + 1
-        
-        return {
-            'total_sessions': total_sessions,
-            'total_messages': total_messages,
-            'users': users,
-            'average_messages_per_session': total_messages / total_sessions if total_sessions > 0 else 0
-        }
+        self.index.refresh()
+        return self.index.get_statistics()
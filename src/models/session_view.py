@@ -0,0 +1,234 @@
+"""
+Vista perezosa de una sesión de CAI
+
+Recorre el log JSONL de una sesión sin cargarlo entero en memoria: los
+eventos se leen con generadores, los últimos mensajes con lectura inversa
+desde el final del archivo y las páginas del historial con un índice de
+offsets en bytes de cada línea de mensaje.
+"""
+
+import json
+import os
+import re
+from typing import Iterator, List, Dict, Any, Optional
+
+
+# Eventos del log que corresponden a mensajes de la conversación
+MESSAGE_EVENTS = {'user_message': 'user', 'assistant_message': 'assistant'}
+
+# Detección barata de líneas de mensaje sin decodificar el JSON
+_MESSAGE_LINE = re.compile(rb'"event"\s*:\s*"(user|assistant)_message"')
+
+# Tamaño de bloque para la lectura inversa
+_BLOCK_SIZE = 64 * 1024
+
+
+def event_to_message(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Convierte un evento del log en mensaje de conversación (o None)"""
+    role = MESSAGE_EVENTS.get(event.get('event'))
+    if not role:
+        return None
+    return {
+        'role': role,
+        'content': event.get('content', ''),
+        'timestamp': event.get('timestamp', '')
+    }
+
+
+class SessionView:
+    """
+    Acceso perezoso y paginado a los eventos y mensajes de una sesión.
+    """
+
+    def __init__(self, filepath: str, session_info: Optional[Dict[str, Any]] = None,
+                 end_offset: Optional[int] = None):
+        """
+        Inicializa la vista (no lee el archivo todavía).
+
+        Args:
+            filepath: Ruta del log cai_*.jsonl
+            session_info: Metadatos de la sesión (del índice), si se tienen
+            end_offset: Byte donde termina la vista (None = hasta el final actual)
+        """
+        self.filepath = filepath
+        self.session_info = session_info or {}
+        self.end_offset = end_offset
+        self._offsets: List[int] = []
+        self._role_counts: Dict[str, int] = {'user': 0, 'assistant': 0}
+        self._indexed_bytes = 0
+
+    def freeze(self) -> int:
+        """
+        Fija el final de la vista en el tamaño actual del log.
+
+        Al reanudar una sesión, CAI sigue escribiendo en el mismo archivo: con
+        la vista fijada, los mensajes nuevos no se cuentan como parte del
+        historial cargado.
+
+        Returns:
+            Byte final de la vista
+        """
+        self.end_offset = os.path.getsize(self.filepath)
+        return self.end_offset
+
+    def _size(self) -> int:
+        """Bytes del log visibles para la vista"""
+        size = os.path.getsize(self.filepath)
+        return size if self.end_offset is None else min(size, self.end_offset)
+
+    # ------------------------------------------------------------------
+    # Recorrido secuencial
+    # ------------------------------------------------------------------
+
+    def iter_events(self) -> Iterator[Dict[str, Any]]:
+        """Genera los eventos del log en orden, uno a la vez"""
+        remaining = self._size()
+        with open(self.filepath, 'rb') as f:
+            for line in f:
+                remaining -= len(line)
+                if remaining < 0:
+                    break
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(event, dict):
+                    yield event
+
+    def iter_messages(self) -> Iterator[Dict[str, Any]]:
+        """Genera los mensajes de usuario y asistente en orden"""
+        for event in self.iter_events():
+            message = event_to_message(event)
+            if message:
+                yield message
+
+    # ------------------------------------------------------------------
+    # Índice de offsets (acceso aleatorio)
+    # ------------------------------------------------------------------
+
+    def _build_index(self):
+        """Indexa los offsets de las líneas de mensaje nuevas desde la última vez"""
+        size = self._size()
+        if size < self._indexed_bytes:
+            # El archivo fue reescrito: reindexar desde cero
+            self._offsets, self._indexed_bytes = [], 0
+            self._role_counts = {'user': 0, 'assistant': 0}
+        if size == self._indexed_bytes:
+            return
+
+        offset = self._indexed_bytes
+        with open(self.filepath, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n") or offset + len(line) > size:
+                    break
+                match = _MESSAGE_LINE.search(line)
+                if match:
+                    self._offsets.append(offset)
+                    role = match.group(1).decode('ascii')
+                    self._role_counts[role] += 1
+                offset += len(line)
+        self._indexed_bytes = offset
+
+    def __len__(self) -> int:
+        """Número de mensajes de la sesión"""
+        self._build_index()
+        return len(self._offsets)
+
+    def role_counts(self) -> Dict[str, int]:
+        """Mensajes por rol ({'user', 'assistant'}) hasta el final de la vista"""
+        self._build_index()
+        return dict(self._role_counts)
+
+    def get_messages(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        """
+        Obtiene los mensajes en el rango [start, stop) leyendo solo esas líneas.
+
+        Args:
+            start: Índice del primer mensaje (desde 0)
+            stop: Índice final (exclusivo)
+        """
+        self._build_index()
+        messages = []
+        with open(self.filepath, 'rb') as f:
+            for offset in self._offsets[max(0, start):max(0, stop)]:
+                f.seek(offset)
+                try:
+                    message = event_to_message(json.loads(f.readline()))
+                except ValueError:
+                    message = None
+                if message:
+                    messages.append(message)
+        return messages
+
+    def page(self, page: int, page_size: int = 20) -> List[Dict[str, Any]]:
+        """
+        Obtiene una página de mensajes (la página 1 son los más antiguos).
+
+        Args:
+            page: Número de página (desde 1)
+            page_size: Mensajes por página
+        """
+        start = (max(1, page) - 1) * page_size
+        return self.get_messages(start, start + page_size)
+
+    def total_pages(self, page_size: int = 20) -> int:
+        """Número de páginas del historial"""
+        return max(1, -(-len(self) // page_size))
+
+    # ------------------------------------------------------------------
+    # Lectura inversa
+    # ------------------------------------------------------------------
+
+    def iter_lines_reversed(self) -> Iterator[bytes]:
+        """Genera las líneas completas del archivo desde la última hacia atrás"""
+        with open(self.filepath, 'rb') as f:
+            position = self._size()
+            remainder = b""
+
+            while position > 0:
+                read_size = min(_BLOCK_SIZE, position)
+                position -= read_size
+                f.seek(position)
+                block = f.read(read_size) + remainder
+                lines = block.split(b"\n")
+                # El primer fragmento puede ser una línea cortada: se completa en el siguiente bloque
+                remainder = lines.pop(0)
+                for line in reversed(lines):
+                    if line:
+                        yield line
+
+            if remainder:
+                yield remainder
+
+    def tail(self, count: int) -> List[Dict[str, Any]]:
+        """
+        Obtiene los últimos N mensajes leyendo el archivo desde el final.
+
+        Args:
+            count: Número de mensajes
+
+        Returns:
+            Mensajes en orden cronológico
+        """
+        messages: List[Dict[str, Any]] = []
+        if count <= 0:
+            return messages
+
+        for line in self.iter_lines_reversed():
+            if not _MESSAGE_LINE.search(line):
+                continue
+            try:
+                message = event_to_message(json.loads(line))
+            except ValueError:
+                continue
+            if message:
+                messages.append(message)
+                if len(messages) >= count:
+                    break
+
+        messages.reverse()
+        return messages
+
+
+__all__ = ['SessionView', 'event_to_message', 'MESSAGE_EVENTS']
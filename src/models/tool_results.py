@@ -0,0 +1,607 @@
+"""
+Resultados estructurados de las herramientas
+
+Cada herramienta devuelve un objeto tipado con los datos ya extraídos. El
+texto que ve el LLM se genera de forma perezosa (solo la primera vez que se
+convierte a string) y se reutiliza después, de modo que la caché y los
+reportes trabajan sobre los datos sin volver a parsear texto.
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field, fields
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# Marcador especial para indicar al Agente que debe ofrecer un reporte
+REPORT_MARKER = "\n\n---REPORTE_REQUERIDO:NMAP_SCAN---"
+
+# Historial de resultados dentro del context= de Runner.run (para los reportes)
+HISTORY_KEY = "tool_results"
+HISTORY_SIZE = 50
+
+
+@dataclass
+class ToolResult(ABC):
+    """
+    Base de todos los resultados de herramientas.
+
+    Attributes:
+        tool: Nombre de la herramienta que generó el resultado
+        ok: False si la ejecución falló
+        report_required: True si el agente debe ofrecer un reporte
+    """
+    tool: str = ""
+    ok: bool = True
+    report_required: bool = False
+    _text: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @abstractmethod
+    def render(self) -> str:
+        """Genera la vista de texto (implementada por cada subclase)"""
+
+    @property
+    def text(self) -> str:
+        """Vista de texto, generada una sola vez"""
+        if self._text is None:
+            self._text = self.render()
+        return self._text
+
+    def __str__(self) -> str:
+        return self.text
+
+    def summary(self) -> str:
+        """Resumen de una línea (por defecto, la primera línea del texto)"""
+        return self.text.strip().split('\n')[0]
+
+    def findings(self) -> List[str]:
+        """Hallazgos principales, de más a menos relevante"""
+        return []
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Datos estructurados (sin la vista de texto)"""
+        return {
+            f.name: getattr(self, f.name)
+            for f in fields(self) if not f.name.startswith('_')
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ToolResult":
+        """Reconstruye un resultado a partir de to_dict() (ignora claves desconocidas)"""
+        return cls(**{f.name: data[f.name] for f in fields(cls) if f.init and f.name in data})
+
+
+@dataclass
+class ToolMessage(ToolResult):
+    """Resultado de solo texto: errores, avisos o resultados vacíos"""
+    message: str = ""
+
+    @classmethod
+    def error(cls, tool: str, message: str) -> "ToolMessage":
+        """Resultado de una ejecución fallida"""
+        return cls(tool=tool, ok=False, message=message)
+
+    @classmethod
+    def info(cls, tool: str, message: str) -> "ToolMessage":
+        """Resultado informativo (sin datos)"""
+        return cls(tool=tool, ok=True, message=message)
+
+    def render(self) -> str:
+        return self.message
+
+
+@dataclass
+class CaptureResult(ToolResult):
+    """Captura de paquetes de red"""
+    interface: str = ""
+    count: int = 0
+    filename: str = ""
+    packets: List[str] = field(default_factory=list)
+
+    def render(self) -> str:
+        return f"✅ Captura exitosa: {self.count} paquetes guardados en '{self.filename}'"
+
+    def findings(self) -> List[str]:
+        return self.packets
+
+
+@dataclass
+class NmapScanResult(ToolResult):
+    """Escaneo de puertos con nmap"""
+    target: str = ""
+    scan_type: str = "basic"
+    raw_output: str = ""
+    open_ports: List[Tuple[str, str]] = field(default_factory=list)
+    output_file: Optional[str] = None
+
+    def render(self) -> str:
+        output = self.raw_output
+
+        if self.output_file:
+            output += f"\n\n📄 Resultados guardados en: {self.output_file}"
+
+        output += "\n\n" + self.summary()
+
+        if self.report_required:
+            output += REPORT_MARKER
+        return output
+
+    def summary(self) -> str:
+        if self.open_ports:
+            return f"🎯 RESUMEN: Se encontraron {len(self.open_ports)} puertos abiertos en {self.target}"
+        return f"🎯 RESUMEN: No se encontraron puertos abiertos en {self.target}"
+
+    def findings(self) -> List[str]:
+        return [f"{port}/tcp open {service}" for port, service in self.open_ports]
+
+
+@dataclass
+class PingSweepResult(ToolResult):
+    """Barrido de hosts activos"""
+    network: str = ""
+    hosts: List[str] = field(default_factory=list)
+
+    def render(self) -> str:
+        if not self.hosts:
+            return "ℹ️  No se encontraron hosts activos en la red especificada"
+
+        output = f"✅ Se encontraron {len(self.hosts)} hosts activos:\n\n"
+        for ip in self.hosts:
+            output += f"  • {ip}\n"
+        return output
+
+    def findings(self) -> List[str]:
+        return self.hosts
+
+
+@dataclass
+class ReconResult(ToolResult):
+    """Perfilado de red del pipeline de reconocimiento"""
+    network: str = ""
+    records: List[Dict[str, Any]] = field(default_factory=list)
+    elapsed: float = 0.0
+    output_file: str = ""
+    skipped_hosts: int = 0
+
+    def render(self) -> str:
+        output = f"🛰️  RECONOCIMIENTO DE RED: {self.network}\n"
+        output += "=" * 70 + "\n\n"
+        output += f"🖥️  Hosts activos: {len(self.records)}\n"
+        output += f"⏱️  Tiempo total: {self.elapsed:.1f}s\n"
+        output += f"📄 Registros por host: {self.output_file}\n"
+        if self.skipped_hosts:
+            output += f"⚠️  {self.skipped_hosts} hosts activos sin perfilar (límite RECON_MAX_HOSTS)\n"
+        output += "\n"
+
+        for record in self.records:
+            hostnames = (record.get("rdns") or {}).get("hostnames", [])
+            output += f"📍 {record['host']}"
+            output += f"  🌐 {hostnames[0]}\n" if hostnames else "\n"
+
+            whois = record.get("whois") or {}
+            owner = whois.get("organization") or whois.get("registrar")
+            if owner:
+                output += f"   • WHOIS ({whois['query']}): {owner}\n"
+
+            if record.get("scan"):
+                ports = record["scan"]["open_ports"]
+                if ports:
+                    port_list = ", ".join(f"{p['port']}/{p['service']}" for p in ports[:10])
+                    extra = f" (+{len(ports) - 10})" if len(ports) > 10 else ""
+                    output += f"   • Puertos abiertos: {port_list}{extra}\n"
+                else:
+                    output += "   • Sin puertos abiertos\n"
+
+            for stage, error in record["errors"].items():
+                output += f"   ❌ {stage}: {error}\n"
+
+        return output
+
+    def summary(self) -> str:
+        return f"🛰️  {self.network}: {len(self.records)} hosts activos en {self.elapsed:.1f}s"
+
+    def findings(self) -> List[str]:
+        # Primero los hosts con más puertos abiertos
+        ranked = sorted(
+            self.records,
+            key=lambda r: len((r.get("scan") or {}).get("open_ports", [])),
+            reverse=True
+        )
+        return [
+            f"{r['host']}: {len((r.get('scan') or {}).get('open_ports', []))} puertos abiertos"
+            for r in ranked
+        ]
+
+
+@dataclass
+class WhoisResult(ToolResult):
+    """Consulta WHOIS de un dominio o IP"""
+    domain: str = ""
+    record: Any = None
+    saved_to: Optional[str] = None
+
+    def render(self) -> str:
+        output = self.record.raw
+
+        if self.record.errors:
+            output += "\n\n⚠️  Servidores de referencia sin respuesta (datos incompletos): " + "; ".join(self.record.errors)
+
+        if self.saved_to:
+            output += f"\n\n📄 Resultados guardados en: {self.saved_to}"
+
+        if self.record.key_lines:
+            summary = "\n\n📋 INFORMACIÓN CLAVE:\n" + "\n".join(f"  • {info}" for info in self.record.key_lines[:10])
+            output = summary + "\n\n" + "─" * 70 + "\n\n" + output
+
+        return output
+
+    def summary(self) -> str:
+        owner = self.record.organization or self.record.registrar or "registrador desconocido"
+        return f"📋 WHOIS de {self.domain}: {owner}"
+
+    def findings(self) -> List[str]:
+        return self.record.key_lines
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = ToolResult.to_dict(self)
+        data["record"] = {k: v for k, v in self.record.to_dict().items() if k != "raw"}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WhoisResult":
+        from ..tools.whois_client import WhoisRecord
+        return cls(tool=data.get("tool", ""), ok=data.get("ok", True),
+                   report_required=data.get("report_required", False),
+                   domain=data.get("domain", ""), record=WhoisRecord.from_dict(data.get("record") or {}),
+                   saved_to=data.get("saved_to"))
+
+
+@dataclass
+class BulkWhoisResult(ToolResult):
+    """Consultas WHOIS masivas"""
+    targets: List[str] = field(default_factory=list)
+    records: List[Any] = field(default_factory=list)
+
+    def render(self) -> str:
+        output = f"📋 WHOIS MASIVO: {len(self.targets)} objetivos\n"
+        output += "=" * 70 + "\n"
+
+        for target, record in zip(self.targets, self.records):
+            if isinstance(record, Exception):
+                output += f"\n❌ {target}: {str(record)}\n"
+                continue
+
+            if not record.found:
+                output += f"\nℹ️  {target}: sin información WHOIS\n"
+                continue
+
+            cached = " (caché)" if record.from_cache else ""
+            output += f"\n🌐 {target}{cached}\n"
+            if record.errors:
+                output += f"  ⚠️  Referencia sin respuesta: {'; '.join(record.errors)}\n"
+            if record.registrar:
+                output += f"  • Registrador: {record.registrar}\n"
+            if record.organization:
+                output += f"  • Organización: {record.organization}\n"
+            if record.creation_date:
+                output += f"  • Creación: {record.creation_date}\n"
+            if record.expiration_date:
+                output += f"  • Expiración: {record.expiration_date}\n"
+            if record.name_servers:
+                output += f"  • Servidores DNS: {', '.join(record.name_servers[:4])}\n"
+
+        return output
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = ToolResult.to_dict(self)
+        data["records"] = [
+            {"error": str(r)} if isinstance(r, Exception) else r.to_dict()
+            for r in self.records
+        ]
+        return data
+
+
+@dataclass
+class DnsLookupResult(ToolResult):
+    """Resolución DNS de un dominio"""
+    domain: str = ""
+    ip_address: str = ""
+    fqdn: str = ""
+
+    def render(self) -> str:
+        output = f"✅ Resolución DNS exitosa:\n\n"
+        output += f"  🌐 Dominio: {self.domain}\n"
+        output += f"  📍 IP: {self.ip_address}\n"
+        output += f"  🔗 FQDN: {self.fqdn}\n"
+        return output
+
+    def summary(self) -> str:
+        return f"🌐 {self.domain} → {self.ip_address}"
+
+
+@dataclass
+class ReverseDnsResult(ToolResult):
+    """Consulta DNS inversa de una IP"""
+    ip_address: str = ""
+    hostname: str = ""
+    aliases: List[str] = field(default_factory=list)
+
+    def render(self) -> str:
+        output = f"✅ DNS inverso encontrado:\n\n"
+        output += f"  📍 IP: {self.ip_address}\n"
+        output += f"  🌐 Hostname: {self.hostname}\n"
+
+        if self.aliases:
+            output += f"  🔗 Aliases: {', '.join(self.aliases)}\n"
+
+        return output
+
+    def summary(self) -> str:
+        return f"📍 {self.ip_address} → {self.hostname}"
+
+
+@dataclass
+class BulkDnsResult(ToolResult):
+    """Resolución DNS masiva (A/AAAA)"""
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    cache_stats: Dict[str, Any] = field(default_factory=dict)
+
+    def render(self) -> str:
+        resolved = [r for r in self.results if not r['error']]
+
+        output = f"✅ Resolución DNS masiva: {len(resolved)}/{len(self.results)} dominios resueltos\n\n"
+        for result in self.results:
+            if result['error']:
+                output += f"  ❌ {result['name']}: {result['error']}\n"
+                continue
+
+            output += f"  🌐 {result['name']} (TTL {result['ttl']}s)\n"
+            if result['A']:
+                output += f"     📍 IPv4: {', '.join(result['A'])}\n"
+            if result['AAAA']:
+                output += f"     📍 IPv6: {', '.join(result['AAAA'])}\n"
+
+        stats = self.cache_stats
+        if stats:
+            output += f"\n💾 Caché DNS: {stats['entries']} entradas, {stats['hit_ratio']:.0%} de aciertos\n"
+
+        return output
+
+    def findings(self) -> List[str]:
+        return [
+            f"{r['name']}: {', '.join(r['A'] + r['AAAA'])}"
+            for r in self.results if not r['error']
+        ]
+
+
+@dataclass
+class BulkReverseDnsResult(ToolResult):
+    """Consultas DNS inversas masivas (PTR)"""
+    results: List[Dict[str, Any]] = field(default_factory=list)
+
+    def render(self) -> str:
+        found = [r for r in self.results if r['PTR']]
+
+        output = f"✅ DNS inverso masivo: {len(found)}/{len(self.results)} IPs con registro PTR\n\n"
+        for result in found:
+            output += f"  📍 {result['ip']:<40} 🌐 {', '.join(result['PTR'])}\n"
+
+        invalid = [r['ip'] for r in self.results if r['error'] == "IP inválida"]
+        if invalid:
+            output += f"\n❌ IPs inválidas: {', '.join(invalid)}\n"
+
+        missing = len(self.results) - len(found) - len(invalid)
+        if missing:
+            output += f"\nℹ️  {missing} IPs sin registro DNS inverso\n"
+
+        return output
+
+    def findings(self) -> List[str]:
+        return [f"{r['ip']}: {', '.join(r['PTR'])}" for r in self.results if r['PTR']]
+
+
+@dataclass
+class LogAnalysisResult(ToolResult):
+    """Análisis de un archivo de log"""
+    log_file_path: str = ""
+    patterns: str = "errors"
+    lines_analyzed: int = 0
+    matches: List[Dict[str, Any]] = field(default_factory=list)
+
+    def by_category(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Agrupa los hallazgos por categoría (conservando el orden)"""
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for match in self.matches:
+            grouped.setdefault(match["category"], []).append(match)
+        return grouped
+
+    def render(self) -> str:
+        if not self.matches:
+            return (f"✅ Análisis completado: No se encontraron eventos del tipo "
+                    f"'{self.patterns}' en las últimas {self.lines_analyzed} líneas.")
+
+        output = f"📊 ANÁLISIS DE LOG: {os.path.basename(self.log_file_path)}\n"
+        output += "=" * 70 + "\n\n"
+        output += f"📁 Archivo: {self.log_file_path}\n"
+        output += f"📏 Líneas analizadas: {self.lines_analyzed}\n"
+        output += f"🔍 Hallazgos: {len(self.matches)}\n\n"
+
+        by_category = self.by_category()
+
+        # Mostrar resumen por categoría
+        output += "📋 RESUMEN POR CATEGORÍA:\n"
+        output += "-" * 70 + "\n"
+        for category, items in by_category.items():
+            output += f"\n🔹 {category}: {len(items)} eventos\n"
+
+            # Mostrar primeros 5 ejemplos
+            for item in items[:5]:
+                output += f"   Línea {item['line_number']}: {item['content'][:80]}...\n"
+
+            if len(items) > 5:
+                output += f"   ... y {len(items) - 5} eventos más\n"
+
+        output += "\n" + "=" * 70 + "\n"
+
+        # Agregar recomendaciones
+        output += "\n💡 RECOMENDACIONES:\n"
+
+        if "Actividad Sospechosa" in by_category:
+            output += "  ⚠️  Se detectó actividad sospechosa. Revisa los logs inmediatamente.\n"
+
+        if "Autenticación" in by_category and len(by_category["Autenticación"]) > 10:
+            output += "  ⚠️  Múltiples fallos de autenticación. Posible ataque de fuerza bruta.\n"
+
+        if "Errores y Fallos" in by_category and len(by_category["Errores y Fallos"]) > 50:
+            output += "  ⚠️  Alto número de errores. El sistema puede estar comprometido o tener problemas.\n"
+
+        output += f"  📄 Considera guardar este reporte para análisis posterior.\n"
+
+        return output
+
+    def summary(self) -> str:
+        counts = ", ".join(f"{cat}: {len(items)}" for cat, items in self.by_category().items())
+        return (f"📊 {self.log_file_path}: {len(self.matches)} hallazgos en "
+                f"{self.lines_analyzed} líneas" + (f" ({counts})" if counts else ""))
+
+    def findings(self) -> List[str]:
+        # Lo sospechoso primero, luego autenticación, luego errores
+        priority = {"Actividad Sospechosa": 0, "Autenticación": 1, "Errores y Fallos": 2}
+        ranked = sorted(self.matches, key=lambda m: priority.get(m["category"], 3))
+        return [f"[{m['category']}] Línea {m['line_number']}: {m['content'][:120]}" for m in ranked]
+
+
+@dataclass
+class TailLogResult(ToolResult):
+    """Últimas líneas de un archivo de log"""
+    log_file_path: str = ""
+    lines: List[str] = field(default_factory=list)
+
+    def render(self) -> str:
+        output = f"📄 Últimas {len(self.lines)} líneas de: {os.path.basename(self.log_file_path)}\n"
+        output += "=" * 70 + "\n\n"
+        output += "".join(self.lines)
+        return output
+
+    def findings(self) -> List[str]:
+        # Las líneas más recientes son las más relevantes
+        return [line.rstrip('\n') for line in reversed(self.lines)]
+
+
+@dataclass
+class ReportResult(ToolResult):
+    """Reporte generado en disco"""
+    file_path: str = ""
+
+    def render(self) -> str:
+        return f"Reporte generado exitosamente en el archivo: {self.file_path}"
+
+
+@dataclass
+class ArtifactPageResult(ToolResult):
+    """Página de un artefacto (output completo guardado en disco)"""
+    artifact_id: str = ""
+    page: int = 1
+    total_pages: int = 1
+    first_line: int = 1
+    total_lines: int = 0
+    lines: List[str] = field(default_factory=list)
+
+    def render(self) -> str:
+        last_line = self.first_line + len(self.lines) - 1
+        output = f"📦 Artefacto {self.artifact_id} — página {self.page}/{self.total_pages} "
+        output += f"(líneas {self.first_line}-{last_line} de {self.total_lines})\n"
+        output += "=" * 70 + "\n\n"
+        output += "".join(self.lines)
+
+        if self.page < self.total_pages:
+            output += f"\n\n➡️  Siguiente: read_artifact_tool('{self.artifact_id}', page={self.page + 1})"
+        return output
+
+    def summary(self) -> str:
+        return f"📦 {self.artifact_id}: página {self.page}/{self.total_pages}"
+
+
+def result_history(ctx: Any) -> deque:
+    """
+    Historial de resultados del contexto de ejecución de una herramienta.
+
+    Si el context= de Runner.run es un dict (terminal, sesiones de la API),
+    el historial vive en él y abarca todos los turnos de esa conversación;
+    si no, dura solo la ejecución actual. Nunca se comparte entre conversaciones.
+
+    Args:
+        ctx: RunContextWrapper recibido por on_invoke_tool
+    """
+    context = getattr(ctx, "context", None)
+    if isinstance(context, dict):
+        return context.setdefault(HISTORY_KEY, deque(maxlen=HISTORY_SIZE))
+
+    history = getattr(ctx, "_tool_results", None)
+    if history is None:
+        history = deque(maxlen=HISTORY_SIZE)
+        try:
+            ctx._tool_results = history
+        except AttributeError:
+            pass
+    return history
+
+
+def record_result(ctx: Any, result: Any):
+    """Agrega un resultado estructurado al historial de su contexto de ejecución"""
+    if isinstance(result, ToolResult):
+        result_history(ctx).append(result)
+
+
+def get_recent_results(ctx: Any, tool: Optional[str] = None) -> List[ToolResult]:
+    """
+    Obtiene los resultados estructurados más recientes de un contexto de ejecución.
+
+    Args:
+        ctx: RunContextWrapper de la herramienta que los pide
+        tool: Filtrar por nombre de herramienta (opcional)
+    """
+    return [
+        r for r in result_history(ctx)
+        if r.ok and not isinstance(r, (ToolMessage, ReportResult, ArtifactPageResult))
+        and (tool is None or r.tool == tool)
+    ]
+
+
+def result_from_dict(data: Dict[str, Any], text: Optional[str] = None) -> ToolResult:
+    """
+    Reconstruye un resultado serializado como en results_to_json().
+
+    Args:
+        data: Datos con la clave 'type' (nombre de la clase)
+        text: Vista de texto ya generada (evita volver a renderizar)
+
+    Raises:
+        ValueError: Si el tipo no es un resultado conocido
+    """
+    cls = globals().get(data.get("type", ""))
+    if not (isinstance(cls, type) and issubclass(cls, ToolResult)):
+        raise ValueError(f"Tipo de resultado desconocido: {data.get('type')!r}")
+    result = cls.from_dict(data)
+    if text is not None:
+        result._text = text
+    return result
+
+
+def results_to_json(results: List[ToolResult]) -> str:
+    """Serializa resultados estructurados a JSON legible"""
+    return json.dumps(
+        [{"type": type(r).__name__, **r.to_dict()} for r in results],
+        indent=2, ensure_ascii=False, default=str
+    )
+
+
+__all__ = [
+    'REPORT_MARKER', 'ToolResult', 'ToolMessage', 'CaptureResult', 'NmapScanResult',
+    'PingSweepResult', 'ReconResult', 'WhoisResult', 'BulkWhoisResult', 'DnsLookupResult',
+    'ReverseDnsResult', 'BulkDnsResult', 'BulkReverseDnsResult', 'LogAnalysisResult',
+    'TailLogResult', 'ReportResult', 'ArtifactPageResult', 'record_result', 'get_recent_results',
+    'result_from_dict', 'results_to_json'
+]
@@ -1,13 +1,30 @@
 """
 Herramientas personalizadas de ciberseguridad
+
+Los módulos se importan al acceder a cada herramienta (no al importar el
+paquete), así que importar `src.tools` no carga scapy ni subprocess.
 """
 
-from .cai_tools_wrapper import *
-from .nmap_tool import nmap_scan_tool
-from .whois_tool import whois_lookup_tool
-from .log_analyzer_tool import analyze_log_tool
+import importlib
+
+# Herramienta -> módulo que la define
+_TOOL_MODULES = {
+    'network_sniffer_tool': 'cai_tools_wrapper',
+    'nmap_scan_tool': 'nmap_tool',
+    'whois_lookup_tool': 'whois_tool',
+    'analyze_log_tool': 'log_analyzer_tool',
+}
+
+
+def __getattr__(name):
+    module = _TOOL_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f"{__name__}.{module}"), name)
+
 
 __all__ = [
+    'network_sniffer_tool',
     'nmap_scan_tool',
     'whois_lookup_tool', 
     'analyze_log_tool'
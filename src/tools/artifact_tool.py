@@ -0,0 +1,52 @@
+"""
+Herramienta de lectura de artefactos (outputs completos compactados)
+"""
+
+from cai.sdk.agents import function_tool
+from ..models.artifact_store import get_artifact_store
+from ..models.tool_results import ArtifactPageResult, ToolMessage
+
+
+@function_tool
+def read_artifact_tool(artifact_id: str, page: int = 1, page_size: int = 100) -> ArtifactPageResult:
+    """
+    Lee por páginas el output completo de una herramienta que fue compactado.
+
+    Cuando un resultado es demasiado grande, solo su resumen llega a la
+    conversación y el texto completo se guarda como artefacto. Usa esta
+    herramienta solo si necesitas detalles que no están en el resumen.
+
+    Args:
+        artifact_id: ID del artefacto indicado en el resultado compactado
+        page: Número de página (empieza en 1)
+        page_size: Líneas por página (máximo 200)
+
+    Returns:
+        Las líneas de la página solicitada
+    """
+    store = get_artifact_store()
+
+    if not store.exists(artifact_id):
+        return ToolMessage.error("read_artifact_tool", f"❌ Error: No existe el artefacto '{artifact_id}'")
+
+    try:
+        data = store.read_page(artifact_id, page, min(page_size, 200))
+    except Exception as e:
+        return ToolMessage.error("read_artifact_tool", f"❌ Error leyendo el artefacto: {str(e)}")
+
+    if page > data["total_pages"]:
+        return ToolMessage.info("read_artifact_tool", f"ℹ️  El artefacto '{artifact_id}' solo tiene {data['total_pages']} páginas")
+
+    return ArtifactPageResult(
+        tool="read_artifact_tool",
+        artifact_id=artifact_id,
+        page=data["page"],
+        total_pages=data["total_pages"],
+        first_line=data["first_line"],
+        total_lines=data["total_lines"],
+        lines=data["lines"]
+    )
+
+
+# Exportar herramientas
+__all__ = ['read_artifact_tool']
@@ -2,14 +2,13 @@
 Wrapper para herramientas oficiales de CAI
 """
 
-from cai.agents.network_traffic_analyzer import network_security_analyzer_agent
-from scapy.all import sniff
 from cai.sdk.agents import function_tool
 from ..core.permissions import PermissionChecker
+from ..models.tool_results import CaptureResult, ToolMessage
 
 
 @function_tool
-def network_sniffer_tool(interface: str, count: int, filename: str) -> str:
+def network_sniffer_tool(interface: str, count: int, filename: str) -> CaptureResult:
     """
     Captura paquetes de red en una interfaz específica y guarda el resumen en un archivo de texto.
     
@@ -27,12 +26,13 @@ def network_sniffer_tool(interface: str, count: int, filename: str) -> str:
     can_capture, message = PermissionChecker.can_capture_packets()
     if not can_capture:
         advice = PermissionChecker.get_permission_advice("network_sniffer")
-        return f"{message}\n\n{advice}"
+        return ToolMessage.error("network_sniffer_tool", f"{message}\n\n{advice}")
     
     try:
         print(f"[*] Iniciando captura en {interface} para {count} paquetes...")
 
-        # Ejecutar captura con Scapy
+        # Ejecutar captura con Scapy (se importa aquí: tarda segundos en cargar)
+        from scapy.all import sniff
         packets = sniff(iface=interface, count=count)
 
         # Procesar paquetes a formato de texto
@@ -50,13 +50,19 @@ def network_sniffer_tool(interface: str, count: int, filename: str) -> str:
             f.write("=" * 50 + "\n\n")
             f.write(full_content)
 
-        return f"✅ Captura exitosa: {count} paquetes guardados en '{filename}'"
+        return CaptureResult(
+            tool="network_sniffer_tool",
+            interface=interface,
+            count=count,
+            filename=filename,
+            packets=output_data
+        )
 
     except PermissionError:
         advice = PermissionChecker.get_permission_advice("network_sniffer")
-        return f"❌ Error de permisos al capturar paquetes\n\n{advice}"
+        return ToolMessage.error("network_sniffer_tool", f"❌ Error de permisos al capturar paquetes\n\n{advice}")
     except Exception as e:
-        return f"❌ Error durante la captura: {str(e)}"
+        return ToolMessage.error("network_sniffer_tool", f"❌ Error durante la captura: {str(e)}")
 
 
 # Exportar herramientas disponibles
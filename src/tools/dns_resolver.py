@@ -0,0 +1,624 @@
+"""
+Resolvedor DNS asíncrono con caché LRU para consultas masivas
+
+Implementa un cliente DNS nativo sobre UDP (sin dependencias externas) que
+permite resolver cientos de nombres o IPs de forma concurrente, respetando
+el TTL de cada respuesta.
+"""
+
+import asyncio
+import ipaddress
+import itertools
+import os
+import random
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+
+# Tipos de registro soportados
+RECORD_TYPES = {"A": 1, "CNAME": 5, "SOA": 6, "PTR": 12, "AAAA": 28}
+RECORD_NAMES = {value: name for name, value in RECORD_TYPES.items()}
+
+# Códigos de respuesta relevantes
+RCODE_NXDOMAIN = 3
+
+# TTL usado cuando la respuesta no trae uno (resolución del sistema, errores)
+DEFAULT_TTL = 60
+NEGATIVE_TTL = 60
+
+
+@dataclass
+class DNSAnswer:
+    """Resultado de una consulta DNS de un tipo de registro"""
+    name: str
+    record_type: str
+    values: List[str] = field(default_factory=list)
+    ttl: int = DEFAULT_TTL
+    error: Optional[str] = None
+    from_cache: bool = False
+    source: str = "dns"
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class DNSCache:
+    """
+    Caché LRU en memoria que respeta el TTL de cada entrada.
+
+    Las entradas expiradas se descartan al consultarlas; cuando se supera
+    la capacidad se elimina la entrada usada hace más tiempo.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        """
+        Inicializa la caché.
+
+        Args:
+            max_entries: Número máximo de entradas en memoria
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, DNSAnswer]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, name: str, record_type: str) -> Optional[DNSAnswer]:
+        """Obtiene una respuesta vigente de la caché o None"""
+        key = (name.lower().rstrip('.'), record_type)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, answer = entry
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        return DNSAnswer(
+            name=answer.name,
+            record_type=answer.record_type,
+            values=list(answer.values),
+            ttl=int(remaining),
+            error=answer.error,
+            from_cache=True,
+            source=answer.source
+        )
+
+    def put(self, answer: DNSAnswer):
+        """Guarda una respuesta durante su TTL"""
+        if answer.ttl <= 0:
+            return
+
+        key = (answer.name.lower().rstrip('.'), answer.record_type)
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + answer.ttl, answer)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Vacía la caché y reinicia las estadísticas"""
+        with self._lock:
+            self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas de uso de la caché"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0
+        }
+
+
+def read_system_nameservers(resolv_conf: str = "/etc/resolv.conf") -> List[Tuple[str, int]]:
+    """
+    Lee los servidores DNS configurados en el sistema.
+
+    Args:
+        resolv_conf: Ruta al archivo resolv.conf
+
+    Returns:
+        Lista de tuplas (ip, puerto)
+    """
+    nameservers = []
+
+    try:
+        with open(resolv_conf, 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == 'nameserver':
+                    nameservers.append((parts[1].split('%')[0], 53))
+    except OSError:
+        pass
+
+    return nameservers
+
+
+def reverse_pointer(ip_address: str) -> str:
+    """Convierte una IP (v4 o v6) en su nombre in-addr.arpa / ip6.arpa"""
+    return ipaddress.ip_address(ip_address).reverse_pointer
+
+
+def build_query(query_id: int, name: str, record_type: str) -> bytes:
+    """Construye un paquete de consulta DNS estándar con recursión"""
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)
+
+    question = b""
+    for label in name.rstrip('.').split('.'):
+        if not label:
+            continue
+        encoded = label.encode('idna')
+        if len(encoded) > 63:
+            raise ValueError(f"Etiqueta DNS demasiado larga: {label}")
+        question += bytes([len(encoded)]) + encoded
+    question += b"\x00" + struct.pack("!HH", RECORD_TYPES[record_type], 1)
+
+    return header + question
+
+
+def _read_name(message: bytes, offset: int) -> Tuple[str, int]:
+    """Lee un nombre DNS (con compresión) y devuelve (nombre, offset siguiente)"""
+    labels = []
+    jumped = False
+    next_offset = offset
+    hops = 0
+
+    while True:
+        if offset >= len(message):
+            raise ValueError("Nombre DNS truncado")
+
+        length = message[offset]
+
+        if length & 0xC0 == 0xC0:
+            pointer = struct.unpack("!H", message[offset:offset + 2])[0] & 0x3FFF
+            if not jumped:
+                next_offset = offset + 2
+            offset = pointer
+            jumped = True
+            hops += 1
+            if hops > 64:
+                raise ValueError("Bucle de compresión en nombre DNS")
+            continue
+
+        if length == 0:
+            if not jumped:
+                next_offset = offset + 1
+            break
+
+        offset += 1
+        labels.append(message[offset:offset + length].decode('ascii', errors='replace'))
+        offset += length
+
+    return '.'.join(labels), next_offset
+
+
+def parse_response(message: bytes) -> Dict[str, Any]:
+    """
+    Parsea una respuesta DNS.
+
+    Returns:
+        Diccionario con id, rcode, truncated, answers y authority
+        (cada registro como {name, type, ttl, value})
+    """
+    if len(message) < 12:
+        raise ValueError("Respuesta DNS demasiado corta")
+
+    query_id, flags, qdcount, ancount, nscount, _ = struct.unpack("!HHHHHH", message[:12])
+    offset = 12
+
+    for _ in range(qdcount):
+        _, offset = _read_name(message, offset)
+        offset += 4
+
+    def read_records(count: int, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+        records = []
+        for _ in range(count):
+            name, offset = _read_name(message, offset)
+            rtype, _, ttl, rdlength = struct.unpack("!HHIH", message[offset:offset + 10])
+            offset += 10
+            rdata = message[offset:offset + rdlength]
+
+            if rtype == RECORD_TYPES["A"] and rdlength == 4:
+                value = socket.inet_ntop(socket.AF_INET, rdata)
+            elif rtype == RECORD_TYPES["AAAA"] and rdlength == 16:
+                value = socket.inet_ntop(socket.AF_INET6, rdata)
+            elif rtype in (RECORD_TYPES["PTR"], RECORD_TYPES["CNAME"]):
+                value, _ = _read_name(message, offset)
+            elif rtype == RECORD_TYPES["SOA"]:
+                _, soa_offset = _read_name(message, offset)
+                _, soa_offset = _read_name(message, soa_offset)
+                value = struct.unpack("!IIIII", message[soa_offset:soa_offset + 20])[4]
+            else:
+                value = None
+
+            records.append({
+                "name": name,
+                "type": RECORD_NAMES.get(rtype, str(rtype)),
+                "ttl": ttl,
+                "value": value
+            })
+            offset += rdlength
+        return records, offset
+
+    answers, offset = read_records(ancount, offset)
+    authority, offset = read_records(nscount, offset)
+
+    return {
+        "id": query_id,
+        "rcode": flags & 0x000F,
+        "truncated": bool(flags & 0x0200),
+        "answers": answers,
+        "authority": authority
+    }
+
+
+class _DNSClientProtocol(asyncio.DatagramProtocol):
+    """Protocolo UDP compartido: asocia cada respuesta a su consulta por ID"""
+
+    def __init__(self):
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.pending: Dict[int, asyncio.Future] = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr):
+        if len(data) < 2:
+            return
+        query_id = struct.unpack("!H", data[:2])[0]
+        future = self.pending.get(query_id)
+        if future and not future.done():
+            future.set_result(data)
+
+    def error_received(self, exc):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    def connection_lost(self, exc):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(exc or ConnectionError("Socket DNS cerrado"))
+
+
+class AsyncDNSResolver:
+    """
+    Resolvedor DNS asíncrono para consultas masivas.
+
+    Funcionalidades:
+    - Cliente UDP nativo (un socket compartido por servidor)
+    - Consultas A, AAAA y PTR concurrentes con límite configurable
+    - Caché LRU que respeta el TTL (incluido el caché negativo)
+    - Respaldo a la resolución del sistema (getaddrinfo) si no hay servidores
+    """
+
+    def __init__(self, nameservers: Optional[List[Tuple[str, int]]] = None,
+                 timeout: float = 2.0, retries: int = 2, concurrency: int = 100,
+                 cache: Optional[DNSCache] = None, use_system_fallback: bool = True):
+        """
+        Inicializa el resolvedor.
+
+        Args:
+            nameservers: Servidores DNS [(ip, puerto)] (por defecto: /etc/resolv.conf)
+            timeout: Tiempo de espera por intento en segundos
+            retries: Intentos por servidor
+            concurrency: Consultas simultáneas máximas
+            cache: Caché a utilizar (por defecto: la caché compartida del módulo)
+            use_system_fallback: Usar getaddrinfo si el cliente nativo falla
+        """
+        self.nameservers = nameservers if nameservers is not None else read_system_nameservers()
+        self.timeout = timeout
+        self.retries = retries
+        self.concurrency = concurrency
+        self.cache = cache if cache is not None else shared_cache
+        self.use_system_fallback = use_system_fallback
+        self._clients: Dict[Tuple[str, int], asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _get_client(self, nameserver: Tuple[str, int]) -> Tuple[asyncio.DatagramTransport, _DNSClientProtocol]:
+        """
+        Obtiene (o crea) el socket UDP asociado a un servidor.
+
+        La tarea de creación se guarda antes de esperarla: las consultas
+        concurrentes al mismo servidor esperan esa misma tarea y comparten
+        un único socket.
+        """
+        client = self._clients.get(nameserver)
+        if client is None:
+            loop = asyncio.get_running_loop()
+            client = loop.create_task(loop.create_datagram_endpoint(
+                _DNSClientProtocol, remote_addr=nameserver
+            ))
+            self._clients[nameserver] = client
+        try:
+            # shield: cancelar una consulta no cancela la creación compartida
+            return await asyncio.shield(client)
+        except OSError:
+            # Creación fallida: la próxima consulta lo vuelve a intentar
+            if self._clients.get(nameserver) is client:
+                del self._clients[nameserver]
+            raise
+
+    async def aclose(self):
+        """Cierra los sockets abiertos (incluidos los que se estaban creando)"""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            try:
+                transport, _ = await client
+            except (OSError, asyncio.CancelledError):
+                continue
+            transport.close()
+
+    async def _query_nameserver(self, nameserver: Tuple[str, int], name: str,
+                                record_type: str) -> Dict[str, Any]:
+        """Envía una consulta a un servidor y espera su respuesta"""
+        transport, protocol = await self._get_client(nameserver)
+        loop = asyncio.get_running_loop()
+
+        query_id = random.randint(0, 0xFFFF)
+        while query_id in protocol.pending:
+            query_id = random.randint(0, 0xFFFF)
+
+        future = loop.create_future()
+        protocol.pending[query_id] = future
+
+        try:
+            transport.sendto(build_query(query_id, name, record_type))
+            data = await asyncio.wait_for(future, self.timeout)
+        finally:
+            protocol.pending.pop(query_id, None)
+
+        return parse_response(data)
+
+    async def _query_native(self, name: str, record_type: str) -> DNSAnswer:
+        """Resuelve usando el cliente UDP nativo"""
+        last_error = "Sin servidores DNS configurados"
+
+        for nameserver in self.nameservers:
+            for _ in range(self.retries):
+                try:
+                    response = await self._query_nameserver(nameserver, name, record_type)
+                except asyncio.TimeoutError:
+                    last_error = f"Tiempo de espera agotado ({nameserver[0]})"
+                    continue
+                except (OSError, ValueError) as e:
+                    last_error = str(e)
+                    break
+
+                if response["truncated"]:
+                    last_error = "Respuesta truncada"
+                    break
+
+                return self._answer_from_response(name, record_type, response)
+
+        return DNSAnswer(name=name, record_type=record_type, error=last_error, ttl=0)
+
+    def _answer_from_response(self, name: str, record_type: str,
+                              response: Dict[str, Any]) -> DNSAnswer:
+        """Convierte una respuesta parseada en un DNSAnswer"""
+        if response["rcode"] == RCODE_NXDOMAIN:
+            soa_ttls = [min(r["ttl"], r["value"]) for r in response["authority"]
+                        if r["type"] == "SOA" and isinstance(r["value"], int)]
+            return DNSAnswer(
+                name=name, record_type=record_type, error="NXDOMAIN",
+                ttl=soa_ttls[0] if soa_ttls else NEGATIVE_TTL
+            )
+
+        if response["rcode"] != 0:
+            return DNSAnswer(name=name, record_type=record_type,
+                             error=f"RCODE {response['rcode']}", ttl=0)
+
+        matching = [r for r in response["answers"] if r["type"] == record_type]
+        if not matching:
+            soa_ttls = [min(r["ttl"], r["value"]) for r in response["authority"]
+                        if r["type"] == "SOA" and isinstance(r["value"], int)]
+            return DNSAnswer(name=name, record_type=record_type,
+                             ttl=soa_ttls[0] if soa_ttls else NEGATIVE_TTL)
+
+        # El TTL efectivo es el mínimo de la cadena (CNAME incluidos)
+        ttl = min(r["ttl"] for r in response["answers"])
+        values = []
+        for record in matching:
+            if record["value"] not in values:
+                values.append(record["value"])
+
+        return DNSAnswer(name=name, record_type=record_type, values=values, ttl=ttl)
+
+    async def _query_system(self, name: str, record_type: str) -> DNSAnswer:
+        """Resuelve usando el resolvedor del sistema (sin TTL real)"""
+        loop = asyncio.get_running_loop()
+
+        try:
+            if record_type == "PTR":
+                ip_address = _ip_from_reverse_pointer(name)
+                hostname, aliases, _ = await loop.run_in_executor(
+                    None, socket.gethostbyaddr, ip_address
+                )
+                return DNSAnswer(name=name, record_type=record_type,
+                                 values=[hostname] + list(aliases), source="system")
+
+            family = socket.AF_INET if record_type == "A" else socket.AF_INET6
+            infos = await loop.getaddrinfo(name, None, family=family, type=socket.SOCK_STREAM)
+            values = []
+            for info in infos:
+                address = info[4][0]
+                if address not in values:
+                    values.append(address)
+            return DNSAnswer(name=name, record_type=record_type, values=values, source="system")
+
+        except (socket.herror, socket.gaierror) as e:
+            return DNSAnswer(name=name, record_type=record_type, error=str(e),
+                             ttl=NEGATIVE_TTL, source="system")
+
+    async def resolve(self, name: str, record_type: str = "A") -> DNSAnswer:
+        """
+        Resuelve un nombre para un tipo de registro, usando la caché.
+
+        Args:
+            name: Nombre a resolver (o nombre in-addr.arpa para PTR)
+            record_type: 'A', 'AAAA' o 'PTR'
+
+        Returns:
+            DNSAnswer con los valores encontrados
+        """
+        cached = self.cache.get(name, record_type)
+        if cached is not None:
+            return cached
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with self._semaphore:
+            answer = None
+            if self.nameservers:
+                answer = await self._query_native(name, record_type)
+            if (answer is None or (answer.error and answer.error != "NXDOMAIN")) \
+                    and self.use_system_fallback:
+                answer = await self._query_system(name, record_type)
+
+        if answer is None:
+            # Sin servidores configurados ni resolvedor del sistema: no se cachea
+            return DNSAnswer(name=name, record_type=record_type, error="Sin servidores DNS", ttl=0)
+
+        self.cache.put(answer)
+        return answer
+
+    async def resolve_host(self, name: str) -> Dict[str, Any]:
+        """
+        Resuelve los registros A y AAAA de un dominio.
+
+        Returns:
+            Diccionario {name, A, AAAA, ttl, error, from_cache}
+        """
+        a_answer, aaaa_answer = await asyncio.gather(
+            self.resolve(name, "A"), self.resolve(name, "AAAA")
+        )
+
+        error = None
+        if not a_answer.values and not aaaa_answer.values:
+            error = a_answer.error or aaaa_answer.error or "Sin registros"
+
+        return {
+            "name": name,
+            "A": a_answer.values,
+            "AAAA": aaaa_answer.values,
+            "ttl": min(a_answer.ttl, aaaa_answer.ttl),
+            "error": error,
+            "from_cache": a_answer.from_cache and aaaa_answer.from_cache
+        }
+
+    async def reverse(self, ip_address: str) -> Dict[str, Any]:
+        """
+        Realiza una consulta PTR para una IP.
+
+        Returns:
+            Diccionario {ip, PTR, ttl, error, from_cache}
+        """
+        try:
+            pointer = reverse_pointer(ip_address)
+        except ValueError:
+            return {"ip": ip_address, "PTR": [], "ttl": 0,
+                    "error": "IP inválida", "from_cache": False}
+
+        answer = await self.resolve(pointer, "PTR")
+        return {
+            "ip": ip_address,
+            "PTR": [value.rstrip('.') for value in answer.values],
+            "ttl": answer.ttl,
+            "error": answer.error if not answer.values else None,
+            "from_cache": answer.from_cache
+        }
+
+    async def resolve_many(self, names: Iterable[str]) -> List[Dict[str, Any]]:
+        """Resuelve A/AAAA de muchos dominios concurrentemente (mantiene el orden)"""
+        try:
+            return list(await asyncio.gather(*(self.resolve_host(n) for n in names)))
+        finally:
+            await self.aclose()
+
+    async def reverse_many(self, ip_addresses: Iterable[str]) -> List[Dict[str, Any]]:
+        """Resuelve PTR de muchas IPs concurrentemente (mantiene el orden)"""
+        try:
+            return list(await asyncio.gather(*(self.reverse(ip) for ip in ip_addresses)))
+        finally:
+            await self.aclose()
+
+
+def _ip_from_reverse_pointer(pointer: str) -> str:
+    """Convierte un nombre in-addr.arpa / ip6.arpa de vuelta a IP"""
+    pointer = pointer.rstrip('.').lower()
+
+    if pointer.endswith('.in-addr.arpa'):
+        return '.'.join(reversed(pointer[:-len('.in-addr.arpa')].split('.')))
+
+    if pointer.endswith('.ip6.arpa'):
+        nibbles = ''.join(reversed(pointer[:-len('.ip6.arpa')].split('.')))
+        groups = [nibbles[i:i + 4] for i in range(0, 32, 4)]
+        return str(ipaddress.IPv6Address(':'.join(groups)))
+
+    return pointer
+
+
+def expand_targets(targets: str, max_hosts: int = 1024) -> List[str]:
+    """
+    Expande una lista de objetivos separados por comas/espacios.
+
+    Acepta dominios, IPs individuales y redes CIDR (se expanden a sus hosts).
+
+    Args:
+        targets: Texto con los objetivos (ej: 'a.com, b.com' o '192.168.1.0/24')
+        max_hosts: Límite de objetivos tras expandir redes
+
+    Returns:
+        Lista de objetivos sin duplicados, en orden de aparición
+    """
+    expanded: List[str] = []
+    seen = set()
+
+    for token in targets.replace(',', ' ').split():
+        if '/' in token:
+            network = ipaddress.ip_network(token, strict=False)
+            # Solo se generan los hosts necesarios para detectar el exceso (una /8 son 16M)
+            hosts = [str(h) for h in itertools.islice(network.hosts(), max_hosts + 1)]
+            hosts = hosts or [str(network.network_address)]
+        else:
+            hosts = [token]
+
+        for host in hosts:
+            if host not in seen:
+                seen.add(host)
+                expanded.append(host)
+            if len(expanded) > max_hosts:
+                raise ValueError(f"Demasiados objetivos (máximo {max_hosts})")
+
+    return expanded
+
+
+# Caché compartida entre todas las invocaciones de las herramientas
+shared_cache = DNSCache(max_entries=int(os.getenv("DNS_CACHE_SIZE", "4096")))
+
+
+__all__ = ['AsyncDNSResolver', 'DNSCache', 'DNSAnswer', 'shared_cache',
+           'expand_targets', 'reverse_pointer', 'read_system_nameservers']
@@ -8,10 +8,11 @@ from datetime import datetime
 from typing import List, Dict, Any
 import os
 from ..core.permissions import PermissionChecker
+from ..models.tool_results import LogAnalysisResult, TailLogResult, ToolMessage
 
 
 @function_tool
-def analyze_log_tool(log_file_path: str, patterns: str = "errors", max_lines: int = 1000) -> str:
+def analyze_log_tool(log_file_path: str, patterns: str = "errors", max_lines: int = 1000) -> LogAnalysisResult:
     """
     Analiza archivos de log del sistema en busca de eventos importantes, errores o patrones sospechosos.
     
@@ -35,13 +36,13 @@ def analyze_log_tool(log_file_path: str, patterns: str = "errors", max_lines: in
     """
     # Verificar que el archivo existe
     if not os.path.exists(log_file_path):
-        return f"❌ Error: No se encontró el archivo: {log_file_path}"
+        return ToolMessage.error("analyze_log_tool", f"❌ Error: No se encontró el archivo: {log_file_path}")
     
     # Verificar permisos de lectura
     can_read, message = PermissionChecker.can_read_file(log_file_path)
     if not can_read:
         advice = PermissionChecker.get_permission_advice("analyze_log")
-        return f"{message}\n\n{advice}"
+        return ToolMessage.error("analyze_log_tool", f"{message}\n\n{advice}")
     
     try:
         
@@ -86,7 +87,7 @@ def analyze_log_tool(log_file_path: str, patterns: str = "errors", max_lines: in
         elif patterns in pattern_config:
             search_patterns = {patterns: pattern_config[patterns]}
         else:
-            return f"❌ Error: Patrón inválido '{patterns}'. Usa: errors, auth, suspicious, all"
+            return ToolMessage.error("analyze_log_tool", f"❌ Error: Patrón inválido '{patterns}'. Usa: errors, auth, suspicious, all")
         
         # Realizar análisis
         findings: List[Dict[str, Any]] = []
@@ -103,64 +104,24 @@ def analyze_log_tool(log_file_path: str, patterns: str = "errors", max_lines: in
                         })
                         break  # Solo un match por línea
         
-        # Generar reporte
-        if not findings:
-            return f"✅ Análisis completado: No se encontraron eventos del tipo '{patterns}' en las últimas {len(lines)} líneas."
-        
-        output = f"📊 ANÁLISIS DE LOG: {os.path.basename(log_file_path)}\n"
-        output += "=" * 70 + "\n\n"
-        output += f"📁 Archivo: {log_file_path}\n"
-        output += f"📏 Líneas analizadas: {len(lines)}\n"
-        output += f"🔍 Hallazgos: {len(findings)}\n\n"
-        
-        # Agrupar por categoría
-        by_category: Dict[str, List[Dict]] = {}
-        for finding in findings:
-            cat = finding["category"]
-            if cat not in by_category:
-                by_category[cat] = []
-            by_category[cat].append(finding)
-        
-        # Mostrar resumen por categoría
-        output += "📋 RESUMEN POR CATEGORÍA:\n"
-        output += "-" * 70 + "\n"
-        for category, items in by_category.items():
-            output += f"\n🔹 {category}: {len(items)} eventos\n"
-            
-            # Mostrar primeros 5 ejemplos
-            for item in items[:5]:
-                output += f"   Línea {item['line_number']}: {item['content'][:80]}...\n"
-            
-            if len(items) > 5:
-                output += f"   ... y {len(items) - 5} eventos más\n"
-        
-        output += "\n" + "=" * 70 + "\n"
-        
-        # Agregar recomendaciones
-        output += "\n💡 RECOMENDACIONES:\n"
-        
-        if "Actividad Sospechosa" in by_category:
-            output += "  ⚠️  Se detectó actividad sospechosa. Revisa los logs inmediatamente.\n"
-        
-        if "Autenticación" in by_category and len(by_category["Autenticación"]) > 10:
-            output += "  ⚠️  Múltiples fallos de autenticación. Posible ataque de fuerza bruta.\n"
-        
-        if "Errores y Fallos" in by_category and len(by_category["Errores y Fallos"]) > 50:
-            output += "  ⚠️  Alto número de errores. El sistema puede estar comprometido o tener problemas.\n"
-        
-        output += f"  📄 Considera guardar este reporte para análisis posterior.\n"
-        
-        return output
+        # El reporte (o el mensaje sin hallazgos) se genera al renderizar el texto
+        return LogAnalysisResult(
+            tool="analyze_log_tool",
+            log_file_path=log_file_path,
+            patterns=patterns,
+            lines_analyzed=len(lines),
+            matches=findings
+        )
     
     except PermissionError:
         advice = PermissionChecker.get_permission_advice("analyze_log")
-        return f"❌ Error: Permiso denegado para leer {log_file_path}\n\n{advice}"
+        return ToolMessage.error("analyze_log_tool", f"❌ Error: Permiso denegado para leer {log_file_path}\n\n{advice}")
     except Exception as e:
-        return f"❌ Error durante el análisis: {str(e)}"
+        return ToolMessage.error("analyze_log_tool", f"❌ Error durante el análisis: {str(e)}")
 
 
 @function_tool
-def tail_log_tool(log_file_path: str, lines: int = 20) -> str:
+def tail_log_tool(log_file_path: str, lines: int = 20) -> TailLogResult:
     """
     Muestra las últimas N líneas de un archivo de log en tiempo real.
     
@@ -175,12 +136,12 @@ def tail_log_tool(log_file_path: str, lines: int = 20) -> str:
     """
     # Verificar permisos
     if not os.path.exists(log_file_path):
-        return f"❌ Error: No se encontró el archivo: {log_file_path}"
+        return ToolMessage.error("tail_log_tool", f"❌ Error: No se encontró el archivo: {log_file_path}")
     
     can_read, message = PermissionChecker.can_read_file(log_file_path)
     if not can_read:
         advice = PermissionChecker.get_permission_advice("tail_log")
-        return f"{message}\n\n{advice}"
+        return ToolMessage.error("tail_log_tool", f"{message}\n\n{advice}")
     
     try:
         
@@ -188,17 +149,13 @@ def tail_log_tool(log_file_path: str, lines: int = 20) -> str:
             all_lines = f.readlines()
             last_lines = all_lines[-lines:] if len(all_lines) >= lines else all_lines
         
-        output = f"📄 Últimas {len(last_lines)} líneas de: {os.path.basename(log_file_path)}\n"
-        output += "=" * 70 + "\n\n"
-        output += "".join(last_lines)
-        
-        return output
+        return TailLogResult(tool="tail_log_tool", log_file_path=log_file_path, lines=last_lines)
     
     except PermissionError:
         advice = PermissionChecker.get_permission_advice("tail_log")
-        return f"❌ Error: Permiso denegado\n\n{advice}"
+        return ToolMessage.error("tail_log_tool", f"❌ Error: Permiso denegado\n\n{advice}")
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        return ToolMessage.error("tail_log_tool", f"❌ Error: {str(e)}")
 
 
 # Exportar herramientas
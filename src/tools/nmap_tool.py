@@ -5,14 +5,73 @@ Herramienta de escaneo Nmap
 from cai.sdk.agents import function_tool
 import subprocess
 import re
+from typing import List, Tuple
 from ..core.permissions import PermissionChecker
+from ..models.tool_results import NmapScanResult, PingSweepResult, ToolMessage
 
-# Marcador especial para indicar al Agente que debe ofrecer un reporte
-REPORT_MARKER = "\n\n---REPORTE_REQUERIDO:NMAP_SCAN---" 
+# Comandos según tipo de escaneo
+SCAN_COMMANDS = {
+    "basic": [],
+    "full": ["-p-"],
+    "stealth": ["-sS"],
+    "service": ["-sV"]
+}
+
+
+def parse_open_ports(output: str) -> List[Tuple[str, str]]:
+    """Extrae (puerto, servicio) de los puertos TCP abiertos de un output de nmap"""
+    return re.findall(r'(\d+)/tcp\s+open\s+(\w+)', output)
+
+
+def run_nmap_scan(target: str, scan_type: str = "basic", timeout: int = 300) -> subprocess.CompletedProcess:
+    """
+    Ejecuta nmap sobre un objetivo (sin validaciones de permisos ni formato).
+    
+    Args:
+        target: IP, rango o dominio
+        scan_type: 'basic', 'full', 'stealth' o 'service'
+        timeout: Tiempo límite en segundos
+        
+    Returns:
+        Resultado del proceso (stdout, stderr, returncode)
+    """
+    command = ["nmap"] + SCAN_COMMANDS[scan_type] + [target]
+    return subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+
+
+def run_ping_sweep(network: str, timeout: int = 120) -> List[str]:
+    """
+    Ejecuta un barrido de ping y devuelve las IPs de los hosts activos.
+    
+    Raises:
+        RuntimeError: Si nmap termina con error
+        subprocess.TimeoutExpired: Si se supera el tiempo límite
+    """
+    result = subprocess.run(
+        ["nmap", "-sn", network],
+        capture_output=True,
+        text=True,
+        timeout=timeout
+    )
+    
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    
+    return parse_ping_sweep(result.stdout)
+
+
+def parse_ping_sweep(output: str) -> List[str]:
+    """
+    IPs de los hosts activos de la salida de `nmap -sn`.
+    
+    Acepta las dos formas de la línea: 'Nmap scan report for 10.0.0.5' y
+    'Nmap scan report for router.lan (192.168.1.1)' (host con DNS inverso).
+    """
+    return re.findall(r'Nmap scan report for (?:\S+ \()?([\d.]+)\)?', output)
 
 
 @function_tool
-def nmap_scan_tool(target: str, scan_type: str = "basic", output_file: str = None) -> str:
+def nmap_scan_tool(target: str, scan_type: str = "basic", output_file: str = None) -> NmapScanResult:
     """
     Realiza un escaneo de red usando Nmap para descubrir hosts y servicios.
     
@@ -36,39 +95,26 @@ def nmap_scan_tool(target: str, scan_type: str = "basic", output_file: str = Non
         try:
             subprocess.run(['which', 'nmap'], check=True, capture_output=True)
         except subprocess.CalledProcessError:
-            return "❌ Error: Nmap no está instalado. Instálalo con: sudo apt install nmap"
+            return ToolMessage.error("nmap_scan_tool", "❌ Error: Nmap no está instalado. Instálalo con: sudo apt install nmap")
         
-        # Construir comando según tipo de escaneo
-        scan_commands = {
-            "basic": ["nmap", target],
-            "full": ["nmap", "-p-", target],
-            "stealth": ["nmap", "-sS", target],
-            "service": ["nmap", "-sV", target]
-        }
-        
-        if scan_type not in scan_commands:
-            return f"❌ Tipo de escaneo inválido: {scan_type}. Usa: basic, full, stealth, service"
+        if scan_type not in SCAN_COMMANDS:
+            return ToolMessage.error("nmap_scan_tool", f"❌ Tipo de escaneo inválido: {scan_type}. Usa: basic, full, stealth, service")
         
         # Verificar permisos para escaneos que requieren root
         if scan_type == "stealth" and not PermissionChecker.is_root():
             advice = PermissionChecker.get_permission_advice("nmap_stealth")
-            return f"⚠️  El escaneo 'stealth' requiere privilegios root\n\n{advice}"
+            return ToolMessage.error("nmap_scan_tool", f"⚠️  El escaneo 'stealth' requiere privilegios root\n\n{advice}")
         
-        command = scan_commands[scan_type]
+        command = ["nmap"] + SCAN_COMMANDS[scan_type] + [target]
         
         print(f"[*] Ejecutando: {' '.join(command)}")
         print(f"[*] Esto puede tomar varios minutos dependiendo del objetivo...")
         
-        # Ejecutar nmap
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            timeout=300  # Timeout de 5 minutos
-        )
+        # Ejecutar nmap (timeout de 5 minutos)
+        result = run_nmap_scan(target, scan_type)
         
         if result.returncode != 0:
-            return f"❌ Error ejecutando nmap: {result.stderr}"
+            return ToolMessage.error("nmap_scan_tool", f"❌ Error ejecutando nmap: {result.stderr}")
         
         output = result.stdout
         
@@ -79,30 +125,28 @@ def nmap_scan_tool(target: str, scan_type: str = "basic", output_file: str = Non
                 f.write(f"Objetivo: {target}\n")
                 f.write("=" * 70 + "\n\n")
                 f.write(output)
-            
-            output += f"\n\n📄 Resultados guardados en: {output_file}"
         
-        # Parsear información clave
-        open_ports = re.findall(r'(\d+)/tcp\s+open\s+(\w+)', output)
-        
-        if open_ports:
-            summary = f"\n\n🎯 RESUMEN: Se encontraron {len(open_ports)} puertos abiertos en {target}"
-        else:
-            summary = f"\n\n🎯 RESUMEN: No se encontraron puertos abiertos en {target}"
-        
-        # AÑADIR EL MARCADOR AQUÍ
-        return output + summary + REPORT_MARKER 
+        # El marcador de reporte se añade al renderizar el texto
+        return NmapScanResult(
+            tool="nmap_scan_tool",
+            target=target,
+            scan_type=scan_type,
+            raw_output=output,
+            open_ports=parse_open_ports(output),
+            output_file=output_file,
+            report_required=True
+        )
     
     except subprocess.TimeoutExpired:
-        return "❌ Error: El escaneo excedió el tiempo límite (5 minutos)"
+        return ToolMessage.error("nmap_scan_tool", "❌ Error: El escaneo excedió el tiempo límite (5 minutos)")
     except PermissionError:
-        return "❌ Error: Algunos tipos de escaneo requieren privilegios root/sudo"
+        return ToolMessage.error("nmap_scan_tool", "❌ Error: Algunos tipos de escaneo requieren privilegios root/sudo")
     except Exception as e:
-        return f"❌ Error durante el escaneo: {str(e)}"
+        return ToolMessage.error("nmap_scan_tool", f"❌ Error durante el escaneo: {str(e)}")
 
 
 @function_tool
-def nmap_ping_sweep(network: str) -> str:
+def nmap_ping_sweep(network: str) -> PingSweepResult:
     """
     Realiza un barrido rápido para descubrir hosts activos en una red.
     
@@ -117,31 +161,17 @@ def nmap_ping_sweep(network: str) -> str:
     try:
         print(f"[*] Buscando hosts activos en {network}...")
         
-        result = subprocess.run(
-            ["nmap", "-sn", network],
-            capture_output=True,
-            text=True,
-            timeout=120
-        )
-        
-        if result.returncode != 0:
-            return f"❌ Error: {result.stderr}"
-        
-        # Extraer IPs de hosts activos
-        active_hosts = re.findall(r'Nmap scan report for .*?\(?([\d.]+)\)?', result.stdout)
+        try:
+            active_hosts = run_ping_sweep(network)
+        except RuntimeError as e:
+            return ToolMessage.error("nmap_ping_sweep", f"❌ Error: {str(e)}")
         
-        if active_hosts:
-            output = f"✅ Se encontraron {len(active_hosts)} hosts activos:\n\n"
-            for ip in active_hosts:
-                output += f"  • {ip}\n"
-            return output
-        else:
-            return "ℹ️  No se encontraron hosts activos en la red especificada"
+        return PingSweepResult(tool="nmap_ping_sweep", network=network, hosts=active_hosts)
     
     except subprocess.TimeoutExpired:
-        return "❌ Error: El barrido excedió el tiempo límite"
+        return ToolMessage.error("nmap_ping_sweep", "❌ Error: El barrido excedió el tiempo límite")
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        return ToolMessage.error("nmap_ping_sweep", f"❌ Error: {str(e)}")
 
 
 # Exportar herramientas
@@ -0,0 +1,292 @@
+"""
+Pipeline de reconocimiento: barrido → DNS inverso → WHOIS → escaneo
+
+Ejecuta todas las etapas de perfilado de una red como un grafo de
+dependencias (DAG) concurrente, en lugar de decenas de llamadas
+secuenciales a herramientas individuales.
+"""
+
+import asyncio
+import ipaddress
+import json
+import os
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Any, List, Callable, Awaitable, Optional, Tuple
+
+from cai.sdk.agents import function_tool
+
+from .dns_resolver import AsyncDNSResolver
+from .whois_client import get_whois_client
+from .nmap_tool import run_ping_sweep, run_nmap_scan, parse_open_ports, SCAN_COMMANDS
+from ..core.permissions import PermissionChecker
+from ..models.tool_results import ReconResult, ToolMessage
+
+
+RECON_DIR = "logs/recon"
+
+# Hosts máximos que pasan del barrido al pipeline (RECON_MAX_HOSTS)
+MAX_HOSTS = int(os.getenv("RECON_MAX_HOSTS", "256"))
+
+# Dominios que nunca tienen WHOIS público
+LOCAL_SUFFIXES = ('.local', '.lan', '.home', '.internal', '.localdomain', '.arpa')
+
+# Segundos niveles de registro bajo un ccTLD (co.uk, com.mx, ac.jp...)
+SECOND_LEVEL_SUFFIXES = frozenset({'co', 'com', 'net', 'org', 'gov', 'edu', 'ac'})
+
+
+@dataclass
+class PipelineStage:
+    """
+    Etapa del pipeline que se ejecuta una vez por host.
+
+    Attributes:
+        name: Nombre de la etapa (clave en el registro del host)
+        run: Corutina (host, registro_parcial) -> resultado de la etapa
+        depends_on: Etapas que deben terminar antes para el mismo host
+        concurrency: Ejecuciones simultáneas máximas de esta etapa
+    """
+    name: str
+    run: Callable[[str, Dict[str, Any]], Awaitable[Any]]
+    depends_on: Tuple[str, ...] = ()
+    concurrency: int = 4
+
+
+class ReconPipeline:
+    """
+    Ejecuta etapas por host respetando dependencias y límites de concurrencia.
+
+    Cada host avanza de forma independiente: en cuanto termina su última
+    etapa, su registro combinado se entrega a `on_record` (streaming), sin
+    esperar al resto de hosts.
+    """
+
+    def __init__(self, stages: List[PipelineStage],
+                 on_record: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Inicializa el pipeline.
+
+        Args:
+            stages: Etapas a ejecutar (el orden de la lista no importa)
+            on_record: Callback llamado con cada registro de host terminado
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.on_record = on_record
+        self._validate()
+
+    def _validate(self):
+        """Verifica que las dependencias existan y no haya ciclos"""
+        visiting, done = set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Ciclo de dependencias en la etapa '{name}'")
+            visiting.add(name)
+            for dependency in self.stages[name].depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Etapa desconocida: '{dependency}'")
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    async def _run_host(self, host: str, semaphores: Dict[str, asyncio.Semaphore]) -> Dict[str, Any]:
+        """Ejecuta todas las etapas de un host"""
+        record: Dict[str, Any] = {"host": host, "errors": {}, "timings": {}}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: PipelineStage):
+            if stage.depends_on:
+                await asyncio.gather(*(tasks[d] for d in stage.depends_on))
+
+            async with semaphores[stage.name]:
+                start = time.monotonic()
+                try:
+                    record[stage.name] = await stage.run(host, record)
+                except Exception as e:
+                    record[stage.name] = None
+                    record["errors"][stage.name] = str(e)
+                record["timings"][stage.name] = round(time.monotonic() - start, 3)
+
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.ensure_future(run_stage(stage))
+
+        await asyncio.gather(*tasks.values())
+
+        if self.on_record:
+            self.on_record(record)
+        return record
+
+    async def run(self, hosts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Ejecuta el pipeline sobre una lista de hosts.
+
+        Returns:
+            Registros combinados por host, en el orden de entrada
+        """
+        semaphores = {name: asyncio.Semaphore(stage.concurrency)
+                      for name, stage in self.stages.items()}
+        return list(await asyncio.gather(*(self._run_host(h, semaphores) for h in hosts)))
+
+
+def _whois_target(ip: str, hostnames: List[str]) -> Optional[str]:
+    """Elige qué consultar en WHOIS: el dominio del hostname o la IP pública"""
+    for hostname in hostnames:
+        if hostname.endswith(LOCAL_SUFFIXES) or '.' not in hostname:
+            continue
+        labels = hostname.split('.')
+        # Dominios bajo un segundo nivel de registro (co.uk / com.mx), no www.ibm.de
+        if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2].lower() in SECOND_LEVEL_SUFFIXES:
+            return '.'.join(labels[-3:])
+        return '.'.join(labels[-2:])
+
+    if ipaddress.ip_address(ip).is_global:
+        return ip
+    return None
+
+
+def build_default_stages(resolver: AsyncDNSResolver, scan_type: Optional[str] = "basic",
+                         include_whois: bool = True, dns_concurrency: int = 50,
+                         whois_concurrency: int = 4, scan_concurrency: int = 4) -> List[PipelineStage]:
+    """
+    Construye las etapas estándar: rdns → whois, y scan en paralelo.
+
+    Args:
+        resolver: Resolvedor DNS a usar (el llamador debe cerrarlo)
+        scan_type: Tipo de escaneo nmap por host (None para omitirlo)
+        include_whois: Incluir la etapa WHOIS
+        dns_concurrency: Consultas PTR simultáneas
+        whois_concurrency: Consultas WHOIS simultáneas
+        scan_concurrency: Procesos nmap simultáneos
+    """
+    whois_client = get_whois_client()
+
+    async def rdns_stage(host: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        result = await resolver.reverse(host)
+        return {"hostnames": result["PTR"], "ttl": result["ttl"]}
+
+    async def whois_stage(host: str, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        hostnames = (record.get("rdns") or {}).get("hostnames", [])
+        target = _whois_target(host, hostnames)
+        if not target:
+            return {"skipped": "Sin dominio ni IP pública"}
+        whois_record = await asyncio.to_thread(whois_client.lookup, target)
+        return {
+            "query": target,
+            "registrar": whois_record.registrar,
+            "organization": whois_record.organization,
+            "country": whois_record.country,
+            "creation_date": whois_record.creation_date,
+            "expiration_date": whois_record.expiration_date,
+        }
+
+    async def scan_stage(host: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        result = await asyncio.to_thread(run_nmap_scan, host, scan_type)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or "nmap terminó con error")
+        return {
+            "scan_type": scan_type,
+            "open_ports": [{"port": int(p), "service": s} for p, s in parse_open_ports(result.stdout)]
+        }
+
+    stages = [PipelineStage("rdns", rdns_stage, concurrency=dns_concurrency)]
+    if include_whois:
+        stages.append(PipelineStage("whois", whois_stage, depends_on=("rdns",),
+                                    concurrency=whois_concurrency))
+    if scan_type:
+        stages.append(PipelineStage("scan", scan_stage, concurrency=scan_concurrency))
+    return stages
+
+
+@function_tool
+async def recon_pipeline_tool(network: str, scan_type: str = "basic",
+                              include_whois: bool = True, output_file: str = None) -> ReconResult:
+    """
+    Perfila una red completa en una sola llamada: descubre hosts activos y, para
+    cada uno, ejecuta DNS inverso, WHOIS y escaneo de puertos de forma concurrente.
+
+    Reemplaza la secuencia nmap_ping_sweep → reverse_dns_lookup_tool (por host)
+    → whois_lookup_tool → nmap_scan_tool (por host).
+
+    Esta herramienta es SENSIBLE (ejecuta nmap) y requiere confirmación del usuario.
+
+    Args:
+        network: Red en notación CIDR o host individual (ej: '192.168.1.0/24')
+        scan_type: Escaneo por host: 'basic', 'full', 'stealth', 'service' o 'none'
+        include_whois: Consultar WHOIS de los hosts con dominio o IP pública
+        output_file: Archivo JSONL donde guardar un registro por host (opcional)
+
+    Returns:
+        Resumen por host con hostname, organización y puertos abiertos
+    """
+    scan = None if scan_type == "none" else scan_type
+
+    if scan and scan not in SCAN_COMMANDS:
+        return ToolMessage.error("recon_pipeline_tool", f"❌ Tipo de escaneo inválido: {scan_type}. Usa: basic, full, stealth, service, none")
+
+    if scan == "stealth" and not PermissionChecker.is_root():
+        advice = PermissionChecker.get_permission_advice("nmap_stealth")
+        return ToolMessage.error("recon_pipeline_tool", f"⚠️  El escaneo 'stealth' requiere privilegios root\n\n{advice}")
+
+    if not output_file:
+        os.makedirs(RECON_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = os.path.join(RECON_DIR, f"recon_{timestamp}.jsonl")
+
+    start = time.monotonic()
+
+    try:
+        print(f"[*] Descubriendo hosts activos en {network}...")
+        hosts = await asyncio.to_thread(run_ping_sweep, network)
+    except FileNotFoundError:
+        return ToolMessage.error("recon_pipeline_tool", "❌ Error: Nmap no está instalado. Instálalo con: sudo apt install nmap")
+    except subprocess.TimeoutExpired:
+        return ToolMessage.error("recon_pipeline_tool", "❌ Error: El barrido excedió el tiempo límite")
+    except Exception as e:
+        return ToolMessage.error("recon_pipeline_tool", f"❌ Error en el descubrimiento: {str(e)}")
+
+    if not hosts:
+        return ToolMessage.info("recon_pipeline_tool", "ℹ️  No se encontraron hosts activos en la red especificada")
+
+    skipped = len(hosts) - MAX_HOSTS
+    if skipped > 0:
+        print(f"[!] {len(hosts)} hosts activos: se perfilan los primeros {MAX_HOSTS} (RECON_MAX_HOSTS)")
+        hosts = hosts[:MAX_HOSTS]
+
+    print(f"[*] {len(hosts)} hosts activos. Ejecutando pipeline (rdns → whois, scan)...")
+
+    with open(output_file, 'w', encoding='utf-8') as out:
+        def stream_record(record: Dict[str, Any]):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            ports = len((record.get("scan") or {}).get("open_ports", []))
+            print(f"[+] {record['host']}: listo ({ports} puertos abiertos)")
+
+        resolver = AsyncDNSResolver()
+        pipeline = ReconPipeline(build_default_stages(resolver, scan, include_whois),
+                                 on_record=stream_record)
+        try:
+            records = await pipeline.run(hosts)
+        finally:
+            await resolver.aclose()
+
+    elapsed = time.monotonic() - start
+
+    return ReconResult(
+        tool="recon_pipeline_tool",
+        network=network,
+        records=records,
+        elapsed=elapsed,
+        output_file=output_file,
+        skipped_hosts=max(0, skipped)
+    )
+
+
+# Exportar herramientas
+__all__ = ['recon_pipeline_tool', 'ReconPipeline', 'PipelineStage', 'build_default_stages']
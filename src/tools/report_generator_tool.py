@@ -1,8 +1,11 @@
 # src/tools/report_generator_tool.py (MODIFICADO)
 
 import os
+import re
 from datetime import datetime
-from cai.sdk.agents import function_tool
+from cai.sdk.agents import function_tool, RunContextWrapper
+from ..models.artifact_store import get_artifact_store
+from ..models.tool_results import ReportResult, ToolMessage, get_recent_results, results_to_json
 
 try:
     from src.ui.cli_interface import CLI 
@@ -17,7 +20,8 @@ except ImportError:
 REPORTS_DIR = "logs/reports" # Usamos una subcarpeta dentro de logs/
 
 @function_tool
-def generate_report_tool(report_content_raw: str, analysis_summary: str, source_tool: str = "security_analysis") -> str:
+def generate_report_tool(ctx: RunContextWrapper, report_content_raw: str, analysis_summary: str,
+                         source_tool: str = "security_analysis") -> ReportResult:
     """
     Genera un archivo de reporte TXT, incluyendo el análisis de la IA 
     (que ya contiene la estructura profesional) y el resultado crudo.
@@ -43,6 +47,9 @@ def generate_report_tool(report_content_raw: str, analysis_summary: str, source_
         file_path = os.path.join(REPORTS_DIR, file_name)
 
         # Usar un borde simple para simular el formato profesional en TXT
+        # Datos estructurados de la herramienta de origen en esta conversación
+        structured = [r for r in get_recent_results(ctx) if r.tool.startswith(safe_source_tool)]
+
         REPORT_BORDER = "──────────────────────────────────────────────────────────────────────────────────────────────────────────────────\n"
         
         # Escribir el contenido estructurado
@@ -73,16 +80,32 @@ def generate_report_tool(report_content_raw: str, analysis_summary: str, source_
             f.write("=" * 40 + "\n")
             f.write(report_content_raw.strip())
             
+            # Los resultados compactados solo traen un resumen: adjuntar el output completo
+            store = get_artifact_store()
+            for artifact_id in re.findall(r"artefacto '([\w.-]+)'", report_content_raw):
+                if store.exists(artifact_id):
+                    f.write(f"\n\n--- Output completo ({artifact_id}) ---\n")
+                    f.write(store.read(artifact_id).strip())
+            
+            # -------------------------------------------------------------
+            # SECCIÓN 3: DATOS ESTRUCTURADOS (JSON, sin volver a parsear texto)
+            # -------------------------------------------------------------
+            if structured:
+                f.write("\n\n")
+                f.write("## 8. DATOS ESTRUCTURADOS (JSON)\n")
+                f.write("=" * 40 + "\n")
+                f.write(results_to_json(structured))
+            
             f.write("\n\n" + REPORT_BORDER)
             f.write("| FIN DEL REPORTE COMPLETO |")
             f.write("\n" + REPORT_BORDER)
 
         CLI.print_success(f"Reporte generado exitosamente en: {file_path}")
-        return f"Reporte generado exitosamente en el archivo: {file_path}"
+        return ReportResult(tool="generate_report_tool", file_path=file_path)
     
     except Exception as e:
         error_msg = f"Error al generar el reporte: {e}"
         CLI.print_error(error_msg)
-        return error_msg
+        return ToolMessage.error("generate_report_tool", error_msg)
 # Exportar herramientas
 __all__ = ['generate_report_tool']
\ No newline at end of file
@@ -0,0 +1,438 @@
+"""
+Cliente WHOIS nativo (puerto 43) con seguimiento de referencias y caché en disco
+
+Reemplaza la ejecución del binario `whois` por consultas directas vía socket:
+- Sigue la cadena IANA → registro (TLD/RIR) → registrador
+- Parsea la respuesta UNA sola vez en un WhoisRecord estructurado
+- Guarda los registros en disco con TTL (más corto para "no encontrado" o
+  respuestas incompletas)
+- Permite consultas masivas con límite de frecuencia por servidor
+"""
+
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional, Tuple
+
+
+IANA_SERVER = "whois.iana.org"
+WHOIS_PORT = 43
+
+# Alias de campos WHOIS → campo del registro estructurado
+FIELD_ALIASES = {
+    "registrar": "registrar",
+    "sponsoring registrar": "registrar",
+    "registrar name": "registrar",
+    "creation date": "creation_date",
+    "created": "creation_date",
+    "created on": "creation_date",
+    "registered on": "creation_date",
+    "registration time": "creation_date",
+    "regdate": "creation_date",
+    "registry expiry date": "expiration_date",
+    "registrar registration expiration date": "expiration_date",
+    "expiration date": "expiration_date",
+    "expiry date": "expiration_date",
+    "paid-till": "expiration_date",
+    "updated date": "updated_date",
+    "last-modified": "updated_date",
+    "last updated": "updated_date",
+    "updated": "updated_date",
+    "name server": "name_servers",
+    "nserver": "name_servers",
+    "domain status": "status",
+    "status": "status",
+    "registrant organization": "organization",
+    "org-name": "organization",
+    "orgname": "organization",
+    "organization": "organization",
+    "registrant country": "country",
+    "country": "country",
+    "refer": "referral",
+    "registrar whois server": "referral",
+    "referralserver": "referral",
+    "whois": "referral",
+}
+
+# Campos que se muestran como "información clave" (mismos que la versión con binario)
+KEY_FIELDS = ('registrar', 'creation_date', 'expiration_date', 'updated_date',
+              'name_servers', 'status')
+
+NOT_FOUND_MARKERS = ("No match", "NOT FOUND", "No Data Found", "No entries found")
+
+
+@dataclass
+class WhoisRecord:
+    """Registro WHOIS parseado"""
+    query: str
+    registrar: Optional[str] = None
+    creation_date: Optional[str] = None
+    expiration_date: Optional[str] = None
+    updated_date: Optional[str] = None
+    name_servers: List[str] = field(default_factory=list)
+    status: List[str] = field(default_factory=list)
+    organization: Optional[str] = None
+    country: Optional[str] = None
+    servers: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    key_lines: List[str] = field(default_factory=list)
+    raw: str = ""
+    found: bool = True
+    fetched_at: float = 0.0
+    from_cache: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WhoisRecord":
+        known = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+
+def parse_whois_response(text: str) -> Dict[str, Any]:
+    """
+    Parsea una respuesta WHOIS en un solo recorrido.
+
+    Args:
+        text: Respuesta cruda del servidor
+
+    Returns:
+        Diccionario con los campos de WhoisRecord encontrados, más
+        'referral' (servidor siguiente) y 'key_lines' (líneas relevantes)
+    """
+    fields: Dict[str, Any] = {"name_servers": [], "status": [], "key_lines": []}
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped[0] in '%#>' or ':' not in stripped:
+            continue
+
+        key, _, value = stripped.partition(':')
+        target = FIELD_ALIASES.get(key.strip().lower())
+        value = value.strip()
+
+        if not target or not value:
+            continue
+
+        if target in KEY_FIELDS:
+            fields["key_lines"].append(stripped)
+
+        if target == "name_servers":
+            server = value.split()[0].lower().rstrip('.')
+            if server not in fields["name_servers"]:
+                fields["name_servers"].append(server)
+        elif target == "status":
+            status = value.split()[0]
+            if status not in fields["status"]:
+                fields["status"].append(status)
+        elif target == "referral":
+            fields.setdefault("referral", _normalize_server(value))
+        else:
+            fields.setdefault(target, value)
+
+    return fields
+
+
+def _normalize_server(value: str) -> str:
+    """Normaliza 'whois://host:43' o 'rwhois://host' a solo el host"""
+    server = value.split('://', 1)[-1]
+    return server.split('/', 1)[0].split(':', 1)[0].strip().lower()
+
+
+class WhoisClient:
+    """
+    Cliente WHOIS sobre sockets (RFC 3912).
+
+    Los servidores WHOIS cierran la conexión tras cada respuesta, por lo que
+    en lugar de reutilizar sockets se reutiliza todo lo demás: la dirección
+    resuelta de cada servidor, el servidor de registro de cada TLD (para no
+    volver a preguntar a IANA) y las respuestas completas (caché en disco).
+    """
+
+    def __init__(self, cache_dir: str = "cache/whois", cache_ttl: int = 86400,
+                 negative_ttl: int = 3600, timeout: float = 10.0, min_interval: float = 1.0,
+                 iana_server: str = IANA_SERVER, port: int = WHOIS_PORT,
+                 max_referrals: int = 3):
+        """
+        Inicializa el cliente WHOIS.
+
+        Args:
+            cache_dir: Directorio de la caché en disco (None para desactivarla)
+            cache_ttl: Vigencia de las respuestas en caché (segundos)
+            negative_ttl: Vigencia de los "no encontrado" y de los registros con
+                          referencias fallidas (segundos)
+            timeout: Tiempo de espera de cada consulta
+            min_interval: Intervalo mínimo entre consultas al mismo servidor
+            iana_server: Servidor raíz de referencias
+            port: Puerto WHOIS
+            max_referrals: Máximo de saltos de referencia a seguir
+        """
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.iana_server = iana_server
+        self.port = port
+        self.max_referrals = max_referrals
+
+        self._tld_servers: Dict[str, str] = {}
+        self._addresses: Dict[str, Tuple] = {}
+        self._server_locks: Dict[str, threading.Lock] = {}
+        self._last_query: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Caché en disco
+    # ------------------------------------------------------------------
+
+    def _cache_path(self, query: str) -> str:
+        digest = hashlib.sha256(query.lower().encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _load_cached(self, query: str) -> Optional[WhoisRecord]:
+        """Obtiene un registro vigente de la caché en disco"""
+        if not self.cache_dir:
+            return None
+
+        path = self._cache_path(query)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        complete = data.get("found", True) and not data.get("errors")
+        ttl = self.cache_ttl if complete else self.negative_ttl
+        if time.time() - data.get("fetched_at", 0) > ttl:
+            return None
+
+        record = WhoisRecord.from_dict(data)
+        record.from_cache = True
+        return record
+
+    def _store_cached(self, record: WhoisRecord):
+        """Guarda un registro en disco (escritura atómica)"""
+        if not self.cache_dir:
+            return
+
+        path = self._cache_path(record.query)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(record.to_dict(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[!] No se pudo guardar la caché WHOIS: {e}")
+
+    # ------------------------------------------------------------------
+    # Red
+    # ------------------------------------------------------------------
+
+    def _resolve_server(self, server: str) -> Tuple:
+        """Resuelve (y recuerda) la dirección de un servidor WHOIS"""
+        address = self._addresses.get(server)
+        if address is None:
+            info = socket.getaddrinfo(server, self.port, type=socket.SOCK_STREAM)[0]
+            address = (info[0], info[4])
+            self._addresses[server] = address
+        return address
+
+    def _wait_rate_limit(self, server: str) -> threading.Lock:
+        """Espera el intervalo mínimo del servidor y devuelve su lock"""
+        with self._lock:
+            lock = self._server_locks.setdefault(server, threading.Lock())
+        lock.acquire()
+
+        elapsed = time.monotonic() - self._last_query.get(server, 0)
+        if elapsed < self.min_interval:
+            time.sleep(self.min_interval - elapsed)
+        return lock
+
+    def query_server(self, server: str, query: str) -> str:
+        """
+        Envía una consulta a un servidor WHOIS y devuelve la respuesta cruda.
+
+        Args:
+            server: Host del servidor WHOIS
+            query: Dominio o IP a consultar
+
+        Returns:
+            Texto de la respuesta
+        """
+        # ARIN necesita el prefijo 'n' para consultas de red
+        payload = f"n {query}" if server == "whois.arin.net" else query
+
+        lock = self._wait_rate_limit(server)
+        try:
+            family, address = self._resolve_server(server)
+            chunks = []
+            with socket.socket(family, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(address)
+                sock.sendall(f"{payload}\r\n".encode('utf-8'))
+                while True:
+                    chunk = sock.recv(65536)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+        finally:
+            self._last_query[server] = time.monotonic()
+            lock.release()
+
+        return b"".join(chunks).decode('utf-8', errors='replace')
+
+    def _registry_server_for(self, query: str) -> Optional[str]:
+        """Servidor de registro ya conocido para el TLD de un dominio"""
+        if _is_ip(query):
+            return None
+        return self._tld_servers.get(query.rsplit('.', 1)[-1].lower())
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def lookup(self, query: str, use_cache: bool = True) -> WhoisRecord:
+        """
+        Consulta WHOIS siguiendo las referencias hasta el servidor autoritativo.
+
+        Args:
+            query: Dominio o IP
+            use_cache: Usar la caché en disco
+
+        Si un servidor de la cadena no responde después de haber obtenido datos
+        de otro, se devuelve lo obtenido y el fallo queda en record.errors.
+
+        Returns:
+            WhoisRecord con los campos parseados
+
+        Raises:
+            OSError: Si no se pudo obtener ninguna respuesta con datos
+        """
+        query = query.strip().lower()
+
+        if use_cache:
+            cached = self._load_cached(query)
+            if cached:
+                return cached
+
+        server = self._registry_server_for(query) or self.iana_server
+        servers: List[str] = []
+        responses: List[Tuple[str, str]] = []
+        errors: List[str] = []
+        iana_response = ""
+        merged: Dict[str, Any] = {"name_servers": [], "status": [], "key_lines": []}
+
+        while server and server not in servers and len(servers) <= self.max_referrals:
+            try:
+                response = self.query_server(server, query)
+            except OSError as e:
+                if not responses:
+                    raise
+                errors.append(f"{server}: {e or type(e).__name__}")
+                break
+            servers.append(server)
+
+            parsed = parse_whois_response(response)
+            referral = parsed.pop("referral", None)
+
+            if server == self.iana_server and referral:
+                # IANA solo aporta la referencia (sus datos son del TLD, no del dominio)
+                iana_response = response
+                if not _is_ip(query):
+                    self._tld_servers[query.rsplit('.', 1)[-1]] = referral
+                server = referral
+                continue
+
+            responses.append((server, response))
+
+            # Los datos del servidor más específico tienen prioridad
+            for key, value in parsed.items():
+                if key == "key_lines":
+                    merged[key].extend(line for line in value if line not in merged[key])
+                elif isinstance(value, list):
+                    if value:
+                        merged[key] = value
+                else:
+                    merged[key] = value
+
+            server = referral
+
+        if not responses:
+            # La cadena terminó sin otro servidor: queda solo la respuesta de IANA
+            responses.append((self.iana_server, iana_response))
+
+        # Encontrado si algún servidor devolvió datos (el registrador puede no tenerlos)
+        found = any(text.strip() and not any(m in text for m in NOT_FOUND_MARKERS)
+                    for _, text in responses)
+        if len(responses) == 1:
+            raw = responses[0][1]
+        else:
+            raw = "\n\n".join(f"% Servidor: {name}\n{text.strip()}" for name, text in responses)
+
+        record = WhoisRecord(
+            query=query,
+            servers=servers,
+            errors=errors,
+            raw=raw,
+            found=found,
+            fetched_at=time.time(),
+            **merged
+        )
+
+        self._store_cached(record)
+        return record
+
+    def lookup_many(self, queries: List[str], max_workers: int = 8,
+                    use_cache: bool = True) -> List[Any]:
+        """
+        Consulta muchos dominios/IPs en paralelo.
+
+        El límite por servidor (min_interval) se respeta aunque varias
+        consultas vayan al mismo registro.
+
+        Returns:
+            Lista en el mismo orden: WhoisRecord o la excepción producida
+        """
+        def safe_lookup(query: str):
+            try:
+                return self.lookup(query, use_cache=use_cache)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(safe_lookup, queries))
+
+
+def _is_ip(value: str) -> bool:
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, value)
+            return True
+        except OSError:
+            continue
+    return False
+
+
+# Cliente compartido por las herramientas (conserva referencias y direcciones)
+_default_client: Optional[WhoisClient] = None
+
+
+def get_whois_client() -> WhoisClient:
+    """Obtiene el cliente WHOIS compartido"""
+    global _default_client
+    if _default_client is None:
+        _default_client = WhoisClient()
+    return _default_client
+
+
+__all__ = ['WhoisClient', 'WhoisRecord', 'parse_whois_response', 'get_whois_client']
@@ -3,12 +3,17 @@ Herramienta de consulta WHOIS
 """
 
 from cai.sdk.agents import function_tool
-import subprocess
 import socket
+from .whois_client import get_whois_client
+from .dns_resolver import AsyncDNSResolver, expand_targets, shared_cache
+from ..models.tool_results import (
+    ToolMessage, WhoisResult, BulkWhoisResult, DnsLookupResult, ReverseDnsResult,
+    BulkDnsResult, BulkReverseDnsResult
+)
 
 
 @function_tool
-def whois_lookup_tool(domain: str, save_to_file: str = None) -> str:
+def whois_lookup_tool(domain: str, save_to_file: str = None) -> WhoisResult:
     """
     Consulta información WHOIS de un dominio o dirección IP.
     
@@ -26,65 +31,59 @@ def whois_lookup_tool(domain: str, save_to_file: str = None) -> str:
         Información WHOIS del dominio/IP
     """
     try:
-        # Verificar que whois está instalado
-        try:
-            subprocess.run(['which', 'whois'], check=True, capture_output=True)
-        except subprocess.CalledProcessError:
-            return "❌ Error: whois no está instalado. Instálalo con: sudo apt install whois"
-        
         print(f"[*] Consultando información WHOIS de: {domain}")
         
-        # Ejecutar whois
-        result = subprocess.run(
-            ["whois", domain],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        
-        if result.returncode != 0:
-            return f"❌ Error ejecutando whois: {result.stderr}"
+        record = get_whois_client().lookup(domain)
         
-        output = result.stdout
-        
-        if not output or "No match" in output or "NOT FOUND" in output:
-            return f"ℹ️  No se encontró información WHOIS para: {domain}"
-        
-        # Extraer información clave
-        key_info = []
-        
-        for line in output.split('\n'):
-            line_lower = line.lower()
-            if any(keyword in line_lower for keyword in [
-                'registrar:', 'creation date:', 'expiration date:', 
-                'updated date:', 'name server:', 'status:'
-            ]):
-                key_info.append(line.strip())
+        if not record.found:
+            return ToolMessage.info("whois_lookup_tool", f"ℹ️  No se encontró información WHOIS para: {domain}")
         
         # Guardar en archivo si se especificó
         if save_to_file:
             with open(save_to_file, 'w') as f:
                 f.write(f"Consulta WHOIS para: {domain}\n")
                 f.write("=" * 70 + "\n\n")
-                f.write(output)
-            
-            output += f"\n\n📄 Resultados guardados en: {save_to_file}"
-        
-        # Agregar resumen
-        if key_info:
-            summary = "\n\n📋 INFORMACIÓN CLAVE:\n" + "\n".join(f"  • {info}" for info in key_info[:10])
-            output = summary + "\n\n" + "─" * 70 + "\n\n" + output
+                f.write(record.raw)
         
-        return output
+        # El resumen de campos clave se añade al renderizar el texto
+        return WhoisResult(tool="whois_lookup_tool", domain=domain, record=record, saved_to=save_to_file)
     
-    except subprocess.TimeoutExpired:
-        return "❌ Error: La consulta WHOIS excedió el tiempo límite"
+    except socket.timeout:
+        return ToolMessage.error("whois_lookup_tool", "❌ Error: La consulta WHOIS excedió el tiempo límite")
+    except OSError as e:
+        return ToolMessage.error("whois_lookup_tool", f"❌ Error de conexión con el servidor WHOIS: {str(e)}")
     except Exception as e:
-        return f"❌ Error durante la consulta: {str(e)}"
+        return ToolMessage.error("whois_lookup_tool", f"❌ Error durante la consulta: {str(e)}")
+
+
+@function_tool
+def bulk_whois_lookup_tool(domains: str) -> BulkWhoisResult:
+    """
+    Consulta WHOIS de varios dominios o IPs en paralelo.
+    
+    Respeta un límite de consultas por servidor WHOIS y reutiliza la caché
+    en disco, por lo que repetir consultas es inmediato.
+
+    Args:
+        domains: Dominios o IPs separados por comas o espacios (ej: 'google.com, 8.8.8.8')
+        
+    Returns:
+        Resumen de registrador, fechas y servidores DNS de cada objetivo
+    """
+    targets = domains.replace(',', ' ').split()
+    
+    if not targets:
+        return ToolMessage.error("bulk_whois_lookup_tool", "❌ Error: No se proporcionó ningún dominio")
+    
+    print(f"[*] Consultando WHOIS de {len(targets)} objetivos...")
+    
+    results = get_whois_client().lookup_many(targets)
+    
+    return BulkWhoisResult(tool="bulk_whois_lookup_tool", targets=targets, records=results)
 
 
 @function_tool
-def dns_lookup_tool(domain: str) -> str:
+def dns_lookup_tool(domain: str) -> DnsLookupResult:
     """
     Realiza una consulta DNS para obtener la dirección IP de un dominio.
     
@@ -108,21 +107,16 @@ def dns_lookup_tool(domain: str) -> str:
         except:
             fqdn = domain
         
-        output = f"✅ Resolución DNS exitosa:\n\n"
-        output += f"  🌐 Dominio: {domain}\n"
-        output += f"  📍 IP: {ip_address}\n"
-        output += f"  🔗 FQDN: {fqdn}\n"
-        
-        return output
+        return DnsLookupResult(tool="dns_lookup_tool", domain=domain, ip_address=ip_address, fqdn=fqdn)
     
     except socket.gaierror:
-        return f"❌ Error: No se pudo resolver el dominio '{domain}'. Verifica que existe y que tienes conexión a Internet."
+        return ToolMessage.error("dns_lookup_tool", f"❌ Error: No se pudo resolver el dominio '{domain}'. Verifica que existe y que tienes conexión a Internet.")
     except Exception as e:
-        return f"❌ Error durante la consulta DNS: {str(e)}"
+        return ToolMessage.error("dns_lookup_tool", f"❌ Error durante la consulta DNS: {str(e)}")
 
 
 @function_tool
-def reverse_dns_lookup_tool(ip_address: str) -> str:
+def reverse_dns_lookup_tool(ip_address: str) -> ReverseDnsResult:
     """
     Realiza una consulta DNS inversa para obtener el nombre de dominio de una IP.
 
@@ -138,27 +132,94 @@ def reverse_dns_lookup_tool(ip_address: str) -> str:
         # Validar formato de IP básico
         parts = ip_address.split('.')
         if len(parts) != 4 or not all(p.isdigit() and 0 <= int(p) <= 255 for p in parts):
-            return f"❌ Error: '{ip_address}' no es una dirección IP válida"
+            return ToolMessage.error("reverse_dns_lookup_tool", f"❌ Error: '{ip_address}' no es una dirección IP válida")
         
         # Realizar consulta inversa
         hostname = socket.gethostbyaddr(ip_address)
         
-        output = f"✅ DNS inverso encontrado:\n\n"
-        output += f"  📍 IP: {ip_address}\n"
-        output += f"  🌐 Hostname: {hostname[0]}\n"
-        
-        if hostname[1]:  # Aliases
-            output += f"  🔗 Aliases: {', '.join(hostname[1])}\n"
-        
-        return output
+        return ReverseDnsResult(
+            tool="reverse_dns_lookup_tool",
+            ip_address=ip_address,
+            hostname=hostname[0],
+            aliases=list(hostname[1])
+        )
     
     except socket.herror:
-        return f"ℹ️  No se encontró registro DNS inverso para: {ip_address}"
+        return ToolMessage.info("reverse_dns_lookup_tool", f"ℹ️  No se encontró registro DNS inverso para: {ip_address}")
     except socket.gaierror:
-        return f"❌ Error: '{ip_address}' no es válida o no hay conexión"
+        return ToolMessage.error("reverse_dns_lookup_tool", f"❌ Error: '{ip_address}' no es válida o no hay conexión")
+    except Exception as e:
+        return ToolMessage.error("reverse_dns_lookup_tool", f"❌ Error: {str(e)}")
+
+
+@function_tool
+async def bulk_dns_lookup_tool(domains: str) -> BulkDnsResult:
+    """
+    Resuelve muchos dominios a la vez (registros A e IPv6/AAAA) de forma concurrente.
+    
+    Más eficiente que llamar a dns_lookup_tool por cada dominio. Las respuestas
+    se guardan en caché respetando su TTL.
+
+    Args:
+        domains: Dominios separados por comas o espacios (ej: 'google.com, github.com')
+        
+    Returns:
+        Direcciones IPv4 e IPv6 de cada dominio
+    """
+    try:
+        targets = expand_targets(domains)
+    except ValueError as e:
+        return ToolMessage.error("bulk_dns_lookup_tool", f"❌ Error: {str(e)}")
+    
+    if not targets:
+        return ToolMessage.error("bulk_dns_lookup_tool", "❌ Error: No se proporcionó ningún dominio")
+    
+    print(f"[*] Resolviendo DNS para {len(targets)} dominios...")
+    
+    try:
+        results = await AsyncDNSResolver().resolve_many(targets)
+    except Exception as e:
+        return ToolMessage.error("bulk_dns_lookup_tool", f"❌ Error durante la consulta DNS: {str(e)}")
+    
+    return BulkDnsResult(
+        tool="bulk_dns_lookup_tool",
+        results=results,
+        cache_stats=shared_cache.get_stats()
+    )
+
+
+@function_tool
+async def bulk_reverse_dns_lookup_tool(ip_addresses: str) -> BulkReverseDnsResult:
+    """
+    Realiza consultas DNS inversas (PTR) de muchas IPs a la vez, de forma concurrente.
+    
+    Ideal después de un barrido de red (nmap_ping_sweep): acepta la lista de IPs
+    encontradas o directamente una red en notación CIDR.
+
+    Args:
+        ip_addresses: IPs separadas por comas/espacios o red CIDR (ej: '192.168.1.0/24')
+        
+    Returns:
+        Hostname asociado a cada IP
+    """
+    try:
+        targets = expand_targets(ip_addresses)
+    except ValueError as e:
+        return ToolMessage.error("bulk_reverse_dns_lookup_tool", f"❌ Error: {str(e)}")
+    
+    if not targets:
+        return ToolMessage.error("bulk_reverse_dns_lookup_tool", "❌ Error: No se proporcionó ninguna IP")
+    
+    print(f"[*] Consultando DNS inverso para {len(targets)} IPs...")
+    
+    try:
+        results = await AsyncDNSResolver().reverse_many(targets)
     except Exception as e:
-        return f"❌ Error: {str(e)}"
+        return ToolMessage.error("bulk_reverse_dns_lookup_tool", f"❌ Error durante la consulta DNS inversa: {str(e)}")
+    
+    return BulkReverseDnsResult(tool="bulk_reverse_dns_lookup_tool", results=results)
 
 
 # Exportar herramientas
-__all__ = ['whois_lookup_tool', 'dns_lookup_tool', 'reverse_dns_lookup_tool']
+__all__ = ['whois_lookup_tool', 'bulk_whois_lookup_tool', 'dns_lookup_tool', 'reverse_dns_lookup_tool',
+           'bulk_dns_lookup_tool', 'bulk_reverse_dns_lookup_tool']
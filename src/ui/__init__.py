@@ -6,5 +6,7 @@ from .cli_interface import CLI
 from .prompts import UserPrompts
 from .custom_terminal import CustomCAITerminal, run_custom_cai_terminal
 from .terminal_commands import create_cybersecurity_commands
+from .api_server import ApiServer, run_api_server
 
-__all__ = ['CLI', 'UserPrompts', 'CustomCAITerminal', 'run_custom_cai_terminal', 'create_cybersecurity_commands']
+__all__ = ['CLI', 'UserPrompts', 'CustomCAITerminal', 'run_custom_cai_terminal', 'create_cybersecurity_commands',
+           'ApiServer', 'run_api_server']
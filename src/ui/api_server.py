@@ -0,0 +1,983 @@
+"""
+Servidor HTTP/JSON local para integrar el agente con otras herramientas (SOC)
+
+`python main.py --serve` levanta un servidor HTTP/1.1 sobre asyncio (solo
+biblioteca estándar) que expone:
+
+- GET  /health                     Estado, cola y sesiones activas
+- GET  /tools[?category=]          Herramientas de ToolManager con su esquema
+- GET  /tools/{nombre}             Metadatos de una herramienta
+- POST /tools/{nombre}             Ejecuta una herramienta: {"args": {...}, "confirm": true}
+- GET  /sessions[?limit=&archived=1]   Sesiones guardadas (SessionManager)
+- GET  /sessions/search?q=texto    Búsqueda de texto completo en las sesiones
+- GET  /sessions/{id}[?messages=N] Metadatos y últimos mensajes de una sesión
+- GET  /agent/sessions             Sesiones del agente abiertas en el servidor
+- POST /agent/sessions             Abre una sesión: {"resume": "<session_id>"} opcional
+- DELETE /agent/sessions/{id}      Cierra una sesión
+- POST /agent/query                {"query": "...", "session_id": "...", "stream": true, "confirm": true}
+- GET  /metrics                    Telemetría de herramientas (formato Prometheus)
+
+Las conexiones son keep-alive (HTTP/1.1). Las consultas al agente y las
+ejecuciones de herramientas pasan por una cola con límite de concurrencia
+(SERVE_MAX_CONCURRENT) y de espera (SERVE_QUEUE_SIZE, 503 si se llena); cada
+sesión del agente tiene su propio historial y un lock, así que los turnos de
+una misma sesión se ejecutan en orden. Con "stream": true la respuesta es
+NDJSON con transferencia chunked: un evento JSON por línea (accepted,
+queued, started, delta, tool_call, tool_output, done / error).
+
+Como en la API nadie confirma acciones en mitad de un turno, el agente solo
+recibe las herramientas sensibles (nmap, sniffer, pipeline de reconocimiento)
+en las consultas que envían "confirm": true, igual que POST /tools.
+
+Por defecto escucha solo en 127.0.0.1; con SERVE_TOKEN se exige
+`Authorization: Bearer <token>` en todo salvo /health.
+
+Seguridad: la API permite ejecutar herramientas y consultas con "confirm":
+true, así que sin token cualquiera que alcance el puerto puede lanzar
+escaneos desde esta máquina. Por eso el servidor se niega a arrancar en una
+dirección que no sea de loopback (--host 0.0.0.0, SERVE_HOST) sin
+SERVE_TOKEN, salvo que se pida explícitamente con --insecure
+(SERVE_INSECURE=1).
+"""
+
+import asyncio
+import hmac
+import ipaddress
+import json
+import os
+import re
+import signal
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable, Awaitable, AsyncIterator, Tuple
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from cai.sdk.agents import Runner, RunContextWrapper
+
+from ..core.batch_runner import unattended_agent
+from ..core.context_window import ContextWindowManager
+from ..core.tool_metrics import shared_tool_metrics
+from ..models.session_manager import SessionManager, AmbiguousSessionError
+from .custom_terminal import _text_delta
+
+
+# Configuración por defecto (variables de entorno)
+DEFAULT_HOST = os.getenv("SERVE_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.getenv("SERVE_PORT", "8080"))
+MAX_CONCURRENT = int(os.getenv("SERVE_MAX_CONCURRENT", "4"))
+MAX_QUEUED = int(os.getenv("SERVE_QUEUE_SIZE", "32"))
+MAX_SESSIONS = int(os.getenv("SERVE_MAX_SESSIONS", "100"))
+QUERY_TIMEOUT = float(os.getenv("SERVE_QUERY_TIMEOUT", "600"))
+KEEPALIVE_TIMEOUT = float(os.getenv("SERVE_KEEPALIVE_TIMEOUT", "15"))
+MAX_BODY_BYTES = int(os.getenv("SERVE_MAX_BODY", str(1024 * 1024)))
+ALLOW_INSECURE = os.getenv("SERVE_INSECURE", "0") == "1"
+
+_REASONS = {
+    200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 401: "Unauthorized",
+    403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed", 408: "Request Timeout",
+    409: "Conflict", 413: "Payload Too Large", 422: "Unprocessable Entity",
+    431: "Request Header Fields Too Large", 500: "Internal Server Error",
+    501: "Not Implemented", 503: "Service Unavailable", 504: "Gateway Timeout"
+}
+
+
+# ----------------------------------------------------------------------
+# Capa HTTP
+# ----------------------------------------------------------------------
+
+class HttpError(Exception):
+    """Error que se responde al cliente con su código HTTP"""
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+        super().__init__(message)
+
+
+class HttpRequest:
+    """Petición HTTP ya leída"""
+
+    def __init__(self, method: str, target: str, version: str, headers: Dict[str, str], body: bytes):
+        url = urlsplit(target)
+        self.method = method.upper()
+        self.path = unquote(url.path) or "/"
+        self.query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        self.version = version
+        self.headers = headers
+        self.body = body
+        self.params: Dict[str, str] = {}
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def json(self) -> Dict[str, Any]:
+        """Cuerpo como objeto JSON ({} si está vacío)"""
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except ValueError as e:
+            raise HttpError(400, f"JSON inválido: {e}")
+        if not isinstance(data, dict):
+            raise HttpError(400, "El cuerpo debe ser un objeto JSON")
+        return data
+
+
+class HttpResponse:
+    """Respuesta completa"""
+
+    def __init__(self, status: int = 200, body: bytes = b"",
+                 content_type: str = "application/json; charset=utf-8",
+                 headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.headers = headers or {}
+
+
+class StreamingResponse:
+    """
+    Respuesta con transferencia chunked: un chunk por evento.
+
+    Por defecto cada evento se codifica como una línea NDJSON.
+    """
+
+    def __init__(self, events: AsyncIterator[Any], status: int = 200,
+                 content_type: str = "application/x-ndjson; charset=utf-8",
+                 encode: Optional[Callable[[Any], bytes]] = None):
+        self.events = events
+        self.status = status
+        self.content_type = content_type
+        self.encode = encode or (lambda event: _dumps(event) + b"\n")
+
+
+def _dumps(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def json_response(data: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+    """Respuesta JSON"""
+    return HttpResponse(status, _dumps(data), headers=headers)
+
+
+Handler = Callable[[HttpRequest], Awaitable[Any]]
+
+
+class HttpServer:
+    """
+    Servidor HTTP/1.1 mínimo sobre asyncio.start_server.
+
+    Soporta keep-alive, cuerpos con Content-Length, respuestas chunked y
+    rutas con parámetros (`/tools/{name}`).
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 keepalive_timeout: float = KEEPALIVE_TIMEOUT, max_body: int = MAX_BODY_BYTES,
+                 access_log: bool = True):
+        """
+        Inicializa el servidor.
+
+        Args:
+            host: Dirección de escucha
+            port: Puerto (0 = uno libre)
+            keepalive_timeout: Segundos que una conexión ociosa se mantiene abierta
+            max_body: Tamaño máximo del cuerpo de una petición
+            access_log: Imprimir una línea por petición
+        """
+        self.host = host
+        self.port = port
+        self.keepalive_timeout = keepalive_timeout
+        self.max_body = max_body
+        self.access_log = access_log
+        self.routes: List[Tuple[str, "re.Pattern", Handler]] = []
+        self.before_request: Optional[Callable[[HttpRequest], None]] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: set = set()
+
+    def route(self, method: str, pattern: str, handler: Handler):
+        """
+        Registra una ruta.
+
+        Args:
+            method: Método HTTP
+            pattern: Ruta con parámetros entre llaves, ej: '/tools/{name}'
+            handler: Corrutina que recibe la petición y devuelve una respuesta
+                     (HttpResponse, StreamingResponse o datos para JSON)
+        """
+        regex = re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", pattern.rstrip("/") or "/")
+        self.routes.append((method.upper(), re.compile(f"^{regex}$"), handler))
+
+    def _match(self, request: HttpRequest) -> Handler:
+        """Handler de la petición (404 / 405 si no hay)"""
+        path = request.path.rstrip("/") or "/"
+        allowed = []
+        for method, regex, handler in self.routes:
+            match = regex.match(path)
+            if not match:
+                continue
+            if method == request.method:
+                request.params = match.groupdict()
+                return handler
+            allowed.append(method)
+        if allowed:
+            raise HttpError(405, f"Método no permitido: {request.method}", {"Allow": ", ".join(allowed)})
+        raise HttpError(404, f"Ruta no encontrada: {request.path}")
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Empieza a aceptar conexiones (port=0 elige uno libre)"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Deja de aceptar conexiones y cierra las abiertas"""
+        if self._server is not None:
+            self._server.close()
+        for task in list(self._connections):
+            task.cancel()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def serve_until_signal(self):
+        """Atiende hasta Ctrl+C / SIGTERM"""
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        try:
+            await stop.wait()
+        finally:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.remove_signal_handler(sig)
+                except (NotImplementedError, RuntimeError):
+                    pass
+            await self.close()
+
+    # ------------------------------------------------------------------
+    # Conexiones
+    # ------------------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atiende las peticiones de una conexión mientras sea keep-alive"""
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.keepalive_timeout)
+                except asyncio.TimeoutError:
+                    break
+                except HttpError as e:
+                    await self._write_response(writer, self._error_response(e), keep_alive=False)
+                    break
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+
+                start = time.perf_counter()
+                keep_alive = request.keep_alive
+                try:
+                    if self.before_request:
+                        self.before_request(request)
+                    result = await self._match(request)(request)
+                    response = result if isinstance(result, (HttpResponse, StreamingResponse)) else json_response(result)
+                except HttpError as e:
+                    response = self._error_response(e)
+                except Exception as e:
+                    print(f"[!] Error atendiendo {request.method} {request.path}: {type(e).__name__}: {e}")
+                    response = json_response({"error": "Error interno del servidor"}, 500)
+
+                if isinstance(response, StreamingResponse):
+                    completed = await self._write_stream(writer, response, keep_alive)
+                    keep_alive = keep_alive and completed
+                else:
+                    await self._write_response(writer, response, keep_alive)
+
+                if self.access_log:
+                    print(f"[*] {request.method} {request.path} → {response.status} "
+                          f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[HttpRequest]:
+        """Lee una petición (None si el cliente cerró la conexión)"""
+        try:
+            line = await reader.readline()
+            if not line:
+                return None
+            if not line.strip():
+                # Línea vacía entre peticiones (tolerada por RFC 9112)
+                line = await reader.readline()
+            try:
+                method, target, version = line.decode('latin-1').strip().split(" ", 2)
+            except ValueError:
+                raise HttpError(400, "Línea de petición inválida")
+
+            headers: Dict[str, str] = {}
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b"\n", b""):
+                    break
+                if len(headers) >= 100:
+                    raise HttpError(431, "Demasiadas cabeceras")
+                name, _, value = header.decode('latin-1').partition(":")
+                headers[name.strip().lower()] = value.strip()
+        except ValueError:
+            # Línea más larga que el límite del StreamReader
+            raise HttpError(431, "Cabecera demasiado larga")
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HttpError(501, "Cuerpos chunked no soportados: usa Content-Length")
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HttpError(400, "Content-Length inválido")
+        if length > self.max_body:
+            raise HttpError(413, f"Cuerpo mayor que {self.max_body} bytes")
+
+        body = await reader.readexactly(length) if length > 0 else b""
+        return HttpRequest(method, target, version, headers, body)
+
+    @staticmethod
+    def _error_response(error: HttpError) -> HttpResponse:
+        return json_response({"error": error.message}, error.status, error.headers)
+
+    def _head(self, status: int, content_type: str, headers: Dict[str, str], keep_alive: bool) -> bytes:
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}", f"Content-Type: {content_type}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        if keep_alive:
+            lines += ["Connection: keep-alive", f"Keep-Alive: timeout={int(self.keepalive_timeout)}"]
+        else:
+            lines.append("Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+    async def _write_response(self, writer: asyncio.StreamWriter, response: HttpResponse, keep_alive: bool):
+        headers = {**response.headers, "Content-Length": str(len(response.body))}
+        writer.write(self._head(response.status, response.content_type, headers, keep_alive) + response.body)
+        await writer.drain()
+
+    async def _write_stream(self, writer: asyncio.StreamWriter, response: StreamingResponse,
+                            keep_alive: bool) -> bool:
+        """
+        Escribe una respuesta chunked evento por evento.
+
+        Returns:
+            True si se envió completa; False si el cliente se desconectó
+            (el generador de eventos se cierra y cancela su trabajo)
+        """
+        events = response.events
+        try:
+            writer.write(self._head(response.status, response.content_type,
+                                    {"Transfer-Encoding": "chunked", "Cache-Control": "no-cache"}, keep_alive))
+            async for event in events:
+                data = response.encode(event)
+                writer.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+            return True
+        except ConnectionError:
+            return False
+        finally:
+            await events.aclose()
+
+
+# ----------------------------------------------------------------------
+# Cola de ejecución y sesiones del agente
+# ----------------------------------------------------------------------
+
+class QueueFullError(Exception):
+    """La cola de ejecución no admite más peticiones en espera"""
+
+
+class RequestQueue:
+    """
+    Limita las ejecuciones simultáneas (agente y herramientas) y las que esperan turno.
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT, max_queued: int = MAX_QUEUED):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def must_wait(self) -> bool:
+        """Si una petición nueva tendría que esperar turno"""
+        return self._semaphore.locked()
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Espera un lugar de ejecución.
+
+        Raises:
+            QueueFullError: Si hay que esperar y la cola ya está llena
+        """
+        if self.must_wait and self.waiting >= self.max_queued:
+            self.rejected += 1
+            raise QueueFullError(f"Cola llena ({self.waiting} en espera)")
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+
+class ApiSession:
+    """Sesión del agente abierta en el servidor (historial propio y lock de turnos)"""
+
+    def __init__(self, agent: Any, resumed_from: Optional[str] = None):
+        self.session_id = uuid.uuid4().hex
+        self.agent = agent
+        self.context: Dict[str, Any] = {}
+        self.lock = asyncio.Lock()
+        self.resumed_from = resumed_from
+        self.created_at = datetime.now()
+        self.last_used = time.monotonic()
+        self.turns = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        history = getattr(getattr(self.agent, 'model', None), 'message_history', None)
+        return {
+            "session_id": self.session_id,
+            "created_at": self.created_at.isoformat(timespec='seconds'),
+            "turns": self.turns,
+            "messages": len(history) if history is not None else None,
+            "busy": self.lock.locked(),
+            "resumed_from": self.resumed_from
+        }
+
+
+def _tool_event(event: Any) -> Optional[Dict[str, Any]]:
+    """Evento NDJSON de una llamada o resultado de herramienta (o None)"""
+    if getattr(event, 'type', None) != 'run_item_stream_event':
+        return None
+    item = getattr(event, 'item', None)
+    name = getattr(event, 'name', None)
+    if name == 'tool_called':
+        raw = getattr(item, 'raw_item', None)
+        return {"event": "tool_call", "tool": getattr(raw, 'name', None),
+                "arguments": getattr(raw, 'arguments', None)}
+    if name == 'tool_output':
+        output = str(getattr(item, 'output', ''))
+        return {"event": "tool_output", "output": output[:2000], "truncated": len(output) > 2000}
+    return None
+
+
+# ----------------------------------------------------------------------
+# API
+def is_loopback(host: str) -> bool:
+    """Indica si `host` solo es alcanzable desde esta máquina"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        # Nombres de host, "" (todas las interfaces)...
+        return False
+
+
+def check_bind_address(host: str, token: Optional[str], insecure: bool = ALLOW_INSECURE):
+    """
+    Rechaza exponer la API sin autenticación fuera de loopback.
+
+    Args:
+        host: Dirección de escucha
+        token: Token Bearer configurado (None o vacío = sin autenticación)
+        insecure: Permitirlo de todos modos (--insecure / SERVE_INSECURE=1)
+
+    Raises:
+        ValueError: Si `host` no es de loopback, no hay token y no se pidió insecure
+    """
+    if token or insecure or is_loopback(host):
+        return
+    raise ValueError(
+        f"No se expone la API sin autenticación en {host or 'todas las interfaces'}: "
+        f"define SERVE_TOKEN o usa --insecure (SERVE_INSECURE=1)"
+    )
+
+
+# ----------------------------------------------------------------------
+
+class ApiServer:
+    """
+    API HTTP/JSON sobre el agente, sus herramientas y las sesiones guardadas.
+    """
+
+    def __init__(self, agent: Any, tool_manager: Any, session_manager: Optional[SessionManager] = None,
+                 host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, token: Optional[str] = None,
+                 max_concurrent: int = MAX_CONCURRENT, max_queued: int = MAX_QUEUED,
+                 max_sessions: int = MAX_SESSIONS, query_timeout: float = QUERY_TIMEOUT,
+                 max_turns: int = 20, insecure: bool = ALLOW_INSECURE):
+        """
+        Inicializa la API.
+
+        Args:
+            agent: Agente base (cada sesión usa un clon con su propio historial)
+            tool_manager: ToolManager con las herramientas registradas
+            session_manager: Sesiones guardadas (por defecto, SessionManager())
+            host: Dirección de escucha
+            port: Puerto
+            token: Token Bearer exigido (por defecto SERVE_TOKEN; None = sin autenticación)
+            max_concurrent: Ejecuciones simultáneas
+            max_queued: Ejecuciones en espera antes de responder 503
+            max_sessions: Sesiones del agente abiertas a la vez
+            query_timeout: Segundos máximos por consulta al agente
+            max_turns: Turnos máximos del Runner por consulta
+            insecure: Permitir escuchar fuera de loopback sin token
+
+        Raises:
+            ValueError: Si se pide escuchar fuera de loopback sin token ni insecure
+        """
+        self.token = token if token is not None else os.getenv("SERVE_TOKEN") or None
+        check_bind_address(host, self.token, insecure)
+        self.agent = agent
+        self.tool_manager = tool_manager
+        self.session_manager = session_manager or SessionManager()
+        self.queue = RequestQueue(max_concurrent, max_queued)
+        self.max_sessions = max_sessions
+        self.query_timeout = query_timeout
+        self.max_turns = max_turns
+        self.sessions: Dict[str, ApiSession] = {}
+        self.started_at = time.monotonic()
+
+        # SessionManager usa SQLite y archivos: se atiende en un hilo propio
+        # para no bloquear el event loop (y en orden, sin carreras en el índice)
+        self._session_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-sessions")
+
+        self.http = HttpServer(host, port)
+        self.http.before_request = self._authenticate
+        for method, pattern, handler in (
+            ("GET", "/health", self.health),
+            ("GET", "/tools", self.list_tools),
+            ("GET", "/tools/{name}", self.get_tool),
+            ("POST", "/tools/{name}", self.run_tool),
+            ("GET", "/sessions", self.list_saved_sessions),
+            ("GET", "/sessions/search", self.search_saved_sessions),
+            ("GET", "/sessions/{session_id}", self.get_saved_session),
+            ("GET", "/agent/sessions", self.list_agent_sessions),
+            ("POST", "/agent/sessions", self.create_agent_session),
+            ("DELETE", "/agent/sessions/{session_id}", self.close_agent_session),
+            ("POST", "/agent/query", self.query_agent),
+            ("GET", "/metrics", self.metrics),
+        ):
+            self.http.route(method, pattern, handler)
+
+    def _authenticate(self, request: HttpRequest):
+        if not self.token or request.path == "/health":
+            return
+        expected = f"Bearer {self.token}".encode('utf-8')
+        if not hmac.compare_digest(request.headers.get("authorization", "").encode('utf-8'), expected):
+            raise HttpError(401, "Token inválido o ausente", {"WWW-Authenticate": "Bearer"})
+
+    async def _in_session_thread(self, function: Callable, *args) -> Any:
+        """Ejecuta una operación de SessionManager en su hilo"""
+        return await asyncio.get_running_loop().run_in_executor(self._session_executor, function, *args)
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        await self.http.start()
+
+    async def close(self):
+        await self.http.close()
+        self._session_executor.shutdown(wait=False)
+
+    async def serve(self):
+        """Atiende hasta Ctrl+C / SIGTERM"""
+        await self.start()
+        print(f"[+] API escuchando en http://{self.http.host}:{self.http.port} "
+              f"(concurrencia {self.queue.max_concurrent}, cola {self.queue.max_queued}"
+              f"{', con token' if self.token else ''})")
+        print("[*] Ctrl+C para detener\n")
+        try:
+            await self.http.serve_until_signal()
+        finally:
+            self._session_executor.shutdown(wait=False)
+        print("\n[*] API detenida")
+
+    # ------------------------------------------------------------------
+    # Estado y métricas
+    # ------------------------------------------------------------------
+
+    async def health(self, request: HttpRequest) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "uptime_s": round(time.monotonic() - self.started_at, 1),
+            "queue": self.queue.get_stats(),
+            "agent_sessions": len(self.sessions),
+            "tools": len(self.tool_manager.tools)
+        }
+
+    async def metrics(self, request: HttpRequest) -> HttpResponse:
+        return HttpResponse(200, shared_tool_metrics.to_prometheus().encode('utf-8'),
+                            content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    # ------------------------------------------------------------------
+    # Herramientas
+    # ------------------------------------------------------------------
+
+    def _tool_info(self, name: str) -> Dict[str, Any]:
+        tool = self.tool_manager.get_tool_by_name(name)
+        if tool is None:
+            raise HttpError(404, f"Herramienta '{name}' no encontrada")
+        return {
+            **self.tool_manager.get_tool_info(name),
+            "parameters": getattr(tool, 'params_json_schema', None)
+        }
+
+    async def list_tools(self, request: HttpRequest) -> Dict[str, Any]:
+        category = request.query.get("category")
+        tools = [self._tool_info(meta["name"]) for meta in self.tool_manager.list_tools(category)]
+        return {"tools": tools, "count": len(tools)}
+
+    async def get_tool(self, request: HttpRequest) -> Dict[str, Any]:
+        return self._tool_info(request.params["name"])
+
+    async def run_tool(self, request: HttpRequest) -> Dict[str, Any]:
+        """
+        Ejecuta una herramienta con la misma envoltura que usa el agente
+        (ejecutor por categoría, caché, métricas y compactación).
+
+        Las herramientas sensibles exigen "confirm": true, igual que la
+        confirmación que pide la terminal.
+        """
+        name = request.params["name"]
+        info = self._tool_info(name)
+        body = request.json()
+        args = body.get("args", {})
+        if not isinstance(args, dict):
+            raise HttpError(400, "'args' debe ser un objeto JSON")
+
+        valid, message = self.tool_manager.validate_tool_args(name, args)
+        if not valid:
+            raise HttpError(422, message)
+        if info.get("is_sensitive") and body.get("confirm") is not True:
+            raise HttpError(403, f"'{name}' es una herramienta sensible: envía \"confirm\": true para ejecutarla")
+
+        tool = self.tool_manager.get_tool_by_name(name)
+        start = time.perf_counter()
+        try:
+            async with self.queue.slot():
+                result = await tool.on_invoke_tool(RunContextWrapper(context={}), json.dumps(args))
+        except QueueFullError as e:
+            raise HttpError(503, str(e), {"Retry-After": "5"})
+
+        return {
+            "tool": name,
+            "ok": getattr(result, "ok", True),
+            "output": str(result),
+            "duration_s": round(time.perf_counter() - start, 3)
+        }
+
+    # ------------------------------------------------------------------
+    # Sesiones guardadas (SessionManager)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _int_param(request: HttpRequest, name: str, default: int, maximum: int = 500) -> int:
+        try:
+            return max(0, min(maximum, int(request.query.get(name, default))))
+        except ValueError:
+            raise HttpError(400, f"'{name}' debe ser un número entero")
+
+    async def list_saved_sessions(self, request: HttpRequest) -> Dict[str, Any]:
+        limit = self._int_param(request, "limit", 20)
+        archived = request.query.get("archived", "0").lower() in ("1", "true", "yes")
+        sessions = await self._in_session_thread(self.session_manager.list_sessions, limit, archived)
+        return {"sessions": sessions, "count": len(sessions)}
+
+    async def search_saved_sessions(self, request: HttpRequest) -> Dict[str, Any]:
+        query = request.query.get("q", "").strip()
+        if not query:
+            raise HttpError(400, "Falta el parámetro 'q'")
+        limit = self._int_param(request, "limit", 10)
+        results = await self._in_session_thread(self.session_manager.search_sessions, query, limit)
+        return {"query": query, "results": results, "count": len(results)}
+
+    async def get_saved_session(self, request: HttpRequest) -> Dict[str, Any]:
+        session_id = request.params["session_id"]
+        count = self._int_param(request, "messages", 0)
+
+        def load():
+            view = self.session_manager.open_session(session_id)
+            if view is None or not view.session_info:
+                return None
+            return {"session": view.session_info, "messages": view.tail(count) if count else []}
+
+        try:
+            data = await self._in_session_thread(load)
+        except AmbiguousSessionError as e:
+            raise HttpError(409, f"{e} ({', '.join(e.candidates[:10])})")
+        if data is None:
+            raise HttpError(404, f"Sesión '{session_id}' no encontrada")
+        return data
+
+    # ------------------------------------------------------------------
+    # Sesiones del agente
+    # ------------------------------------------------------------------
+
+    def _get_agent_session(self, session_id: str) -> ApiSession:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HttpError(404, f"Sesión del agente '{session_id}' no encontrada")
+        return session
+
+    async def _open_agent_session(self, resume: Optional[str] = None) -> ApiSession:
+        """
+        Abre una sesión con un clon del agente (historial vacío o el de una sesión guardada).
+
+        Si se alcanzó el máximo de sesiones, cierra la menos usada que esté libre.
+        """
+        if len(self.sessions) >= self.max_sessions:
+            idle = [s for s in self.sessions.values() if not s.lock.locked()]
+            if not idle:
+                raise HttpError(503, "Máximo de sesiones abiertas alcanzado", {"Retry-After": "5"})
+            oldest = min(idle, key=lambda s: s.last_used)
+            del self.sessions[oldest.session_id]
+
+        # Sin herramientas sensibles: cada consulta puede autorizarlas con "confirm" (ver _turn_agent)
+        session = ApiSession(unattended_agent(self.agent, self.tool_manager), resumed_from=resume)
+        if resume:
+            try:
+                injected = await self._in_session_thread(self._inject_history, session, resume)
+            except AmbiguousSessionError as e:
+                raise HttpError(409, f"{e} ({', '.join(e.candidates[:10])})")
+            if injected is None:
+                raise HttpError(404, f"Sesión '{resume}' no encontrada")
+
+        self.sessions[session.session_id] = session
+        return session
+
+    def _inject_history(self, session: ApiSession, resume: str) -> Optional[int]:
+        """Carga el contexto de una sesión guardada en el historial de la sesión (hilo de sesiones)"""
+        view = self.session_manager.open_session(resume)
+        if view is None or not view.session_info:
+            return None
+
+        model = session.agent.model
+        context_window = ContextWindowManager(
+            memory_dir=self.session_manager.memory_dir,
+            keep_turns=int(os.getenv("CONTEXT_KEEP_TURNS", "10")),
+            token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000"))
+        )
+        for message in context_window.build_context(view.session_info['session_id'], view.iter_messages()):
+            if hasattr(model, 'add_to_message_history'):
+                model.add_to_message_history(message)
+            else:
+                model.message_history.append(message)
+        return len(model.message_history)
+
+    async def list_agent_sessions(self, request: HttpRequest) -> Dict[str, Any]:
+        sessions = [s.to_dict() for s in self.sessions.values()]
+        return {"sessions": sessions, "count": len(sessions)}
+
+    async def create_agent_session(self, request: HttpRequest) -> HttpResponse:
+        resume = request.json().get("resume")
+        session = await self._open_agent_session(resume)
+        return json_response(session.to_dict(), 201)
+
+    async def close_agent_session(self, request: HttpRequest) -> Dict[str, Any]:
+        session = self._get_agent_session(request.params["session_id"])
+        if session.lock.locked():
+            raise HttpError(409, "La sesión tiene un turno en curso")
+        del self.sessions[session.session_id]
+        return {"closed": session.session_id}
+
+    async def query_agent(self, request: HttpRequest) -> Any:
+        """
+        Ejecuta una consulta en una sesión (nueva si no se indica session_id).
+
+        Sin "stream" responde al terminar con {'session_id', 'output', ...};
+        con "stream": true responde NDJSON con los eventos del turno. Con
+        "confirm": true el agente puede usar herramientas sensibles en este turno.
+        """
+        body = request.json()
+        query = body.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise HttpError(400, "Falta 'query'")
+
+        session_id = body.get("session_id")
+        session = self._get_agent_session(session_id) if session_id else await self._open_agent_session()
+        stream = bool(body.get("stream", False))
+        agent = self._turn_agent(session, body.get("confirm") is True)
+
+        events = self._query_events(session, agent, query.strip(), stream)
+        if stream:
+            return StreamingResponse(events)
+
+        try:
+            async for event in events:
+                if event["event"] == "done":
+                    return event
+                if event["event"] == "error":
+                    raise HttpError(event["status"], event["error"],
+                                    {"Retry-After": "5"} if event["status"] == 503 else None)
+        finally:
+            await events.aclose()
+        raise HttpError(500, "La consulta terminó sin resultado")
+
+    def _turn_agent(self, session: ApiSession, allow_sensitive: bool) -> Any:
+        """Agente del turno: el de la sesión o, si se autorizó, uno con todas las herramientas y el mismo historial"""
+        if not allow_sensitive:
+            return session.agent
+        return unattended_agent(self.agent, self.tool_manager, allow_sensitive=True, model=session.agent.model)
+
+    async def _query_events(self, session: ApiSession, agent: Any, query: str,
+                            stream: bool) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Ejecuta un turno y produce sus eventos.
+
+        Orden: lock de la sesión (turnos en orden), luego lugar en la cola
+        (concurrencia global). Si el consumidor cierra el generador (cliente
+        desconectado), el turno se cancela.
+        """
+        start = time.perf_counter()
+        yield {"event": "accepted", "session_id": session.session_id}
+        if session.lock.locked():
+            yield {"event": "queued", "reason": "session"}
+
+        async with session.lock:
+            session.last_used = time.monotonic()
+            if self.queue.must_wait:
+                yield {"event": "queued", "reason": "queue", "waiting": self.queue.waiting + 1}
+            try:
+                async with self.queue.slot():
+                    yield {"event": "started"}
+                    output = None
+                    error = None
+                    try:
+                        if stream:
+                            async for event in self._stream_run(session, agent, query, start):
+                                if event["event"] == "done":
+                                    output = event["output"]
+                                else:
+                                    yield event
+                        else:
+                            result = await asyncio.wait_for(
+                                Runner.run(starting_agent=agent, input=query,
+                                           context=session.context, max_turns=self.max_turns),
+                                timeout=self.query_timeout
+                            )
+                            output = str(getattr(result, 'final_output', '') or '')
+                    except asyncio.TimeoutError:
+                        error = (504, f"Tiempo agotado ({self.query_timeout:g}s)")
+                    except Exception as e:
+                        error = (500, f"{type(e).__name__}: {e}")
+            except QueueFullError as e:
+                yield {"event": "error", "status": 503, "error": str(e), "session_id": session.session_id}
+                return
+
+            session.turns += 1
+            session.last_used = time.monotonic()
+
+        duration = round(time.perf_counter() - start, 3)
+        if error:
+            yield {"event": "error", "status": error[0], "error": error[1],
+                   "session_id": session.session_id, "duration_s": duration}
+        else:
+            yield {"event": "done", "session_id": session.session_id, "output": output,
+                   "turn": session.turns, "duration_s": duration}
+
+    async def _stream_run(self, session: ApiSession, agent: Any, query: str,
+                          start: float) -> AsyncIterator[Dict[str, Any]]:
+        """Eventos de Runner.run_streamed (delta, tool_call, tool_output) y 'done' al final"""
+        result = Runner.run_streamed(starting_agent=agent, input=query,
+                                     context=session.context, max_turns=self.max_turns)
+        iterator = result.stream_events().__aiter__()
+        completed = False
+        try:
+            while True:
+                remaining = self.query_timeout - (time.perf_counter() - start)
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    event = await asyncio.wait_for(iterator.__anext__(), remaining)
+                except StopAsyncIteration:
+                    break
+                delta = _text_delta(event)
+                if delta:
+                    yield {"event": "delta", "text": delta}
+                    continue
+                tool_event = _tool_event(event)
+                if tool_event:
+                    yield tool_event
+            completed = True
+            yield {"event": "done", "output": str(getattr(result, 'final_output', '') or '')}
+        finally:
+            if not completed and hasattr(result, 'cancel'):
+                result.cancel()
+
+
+def run_api_server(agent: Any, tool_manager: Any, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                   insecure: bool = ALLOW_INSECURE):
+    """
+    Función de conveniencia para `main.py --serve`.
+
+    Args:
+        agent: Agente de CAI a usar
+        tool_manager: ToolManager con las herramientas registradas
+        host: Dirección de escucha
+        port: Puerto
+        insecure: Permitir escuchar fuera de loopback sin token
+    """
+    asyncio.run(ApiServer(agent, tool_manager, host=host, port=port, insecure=insecure).serve())
+
+
+__all__ = [
+    'ApiServer', 'ApiSession', 'RequestQueue', 'QueueFullError', 'HttpServer', 'HttpRequest',
+    'HttpResponse', 'StreamingResponse', 'HttpError', 'json_response', 'run_api_server',
+    'check_bind_address', 'is_loopback'
+]
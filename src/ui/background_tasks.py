@@ -0,0 +1,231 @@
+"""
+Tareas en segundo plano de la terminal asíncrona
+
+Con la terminal en modo asyncio (ver CustomCAITerminal.run_async), estas
+tareas corren en el mismo event loop que el agente, mientras el usuario
+sigue escribiendo consultas:
+
+- /follow <archivo>: sigue un log (como `tail -f`) y guarda las últimas
+  líneas en un buffer circular.
+- /capture [interfaz]: captura paquetes sin límite guardando solo los
+  últimos resúmenes en un buffer circular (scapy AsyncSniffer).
+
+Cada tarea tiene un ID corto; /bg las lista, `/bg show <id> [n]` muestra su
+buffer y `/bg stop <id>` la detiene.
+"""
+
+import asyncio
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+
+# Elementos que guarda cada buffer circular (BG_BUFFER_SIZE)
+DEFAULT_BUFFER_SIZE = int(os.getenv("BG_BUFFER_SIZE", "1000"))
+
+
+class RingBuffer:
+    """
+    Buffer circular de líneas (conserva las últimas N) seguro entre hilos.
+    """
+
+    def __init__(self, max_items: int = DEFAULT_BUFFER_SIZE):
+        self._items: deque = deque(maxlen=max_items)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def append(self, item: str):
+        with self._lock:
+            self._items.append(item)
+            self.total += 1
+
+    def tail(self, count: int = 20) -> List[str]:
+        """Últimos `count` elementos"""
+        with self._lock:
+            items = list(self._items)
+        return items[-count:] if count else items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class BackgroundTask:
+    """Tarea en segundo plano con su buffer"""
+
+    def __init__(self, task_id: int, kind: str, target: str, buffer: RingBuffer):
+        self.task_id = task_id
+        self.kind = kind
+        self.target = target
+        self.buffer = buffer
+        self.started_at = datetime.now()
+        self.task: Optional[asyncio.Task] = None
+        self.error: Optional[str] = None
+
+    @property
+    def status(self) -> str:
+        if self.task is None or not self.task.done():
+            return "activa"
+        if self.error:
+            return "error"
+        return "detenida"
+
+
+class BackgroundTaskManager:
+    """
+    Lanza y controla tareas en el event loop de la terminal.
+    """
+
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.tasks: Dict[int, BackgroundTask] = {}
+        self._next_id = 1
+
+    def start(self, kind: str, target: str,
+              factory: Callable[[RingBuffer], Awaitable[None]]) -> BackgroundTask:
+        """
+        Lanza una tarea en el event loop actual.
+
+        Args:
+            kind: Tipo de tarea ('follow', 'capture')
+            target: Archivo o interfaz
+            factory: Función que recibe el buffer y devuelve la corrutina
+
+        Raises:
+            RuntimeError: Si no hay un event loop en ejecución (terminal síncrona)
+        """
+        loop = asyncio.get_running_loop()
+        bg = BackgroundTask(self._next_id, kind, target, RingBuffer(self.buffer_size))
+        self._next_id += 1
+
+        async def runner():
+            try:
+                await factory(bg.buffer)
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                bg.error = str(e)
+                print(f"\n[!] Tarea #{bg.task_id} ({kind} {target}) terminó con error: {e}")
+
+        bg.task = loop.create_task(runner(), name=f"bg-{bg.task_id}-{kind}")
+        self.tasks[bg.task_id] = bg
+        return bg
+
+    def get(self, task_id: int) -> Optional[BackgroundTask]:
+        return self.tasks.get(task_id)
+
+    def stop(self, task_id: int) -> bool:
+        """Cancela una tarea; False si no existe o ya terminó"""
+        bg = self.tasks.get(task_id)
+        if bg is None or bg.task is None or bg.task.done():
+            return False
+        bg.task.cancel()
+        return True
+
+    async def stop_all(self):
+        """Cancela todas las tareas y espera a que terminen"""
+        pending = [bg.task for bg in self.tasks.values() if bg.task and not bg.task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def list_tasks(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": bg.task_id,
+                "kind": bg.kind,
+                "target": bg.target,
+                "status": bg.status,
+                "started_at": bg.started_at.strftime("%H:%M:%S"),
+                "buffered": len(bg.buffer),
+                "total": bg.buffer.total,
+                "error": bg.error
+            }
+            for bg in self.tasks.values()
+        ]
+
+
+# ----------------------------------------------------------------------
+# Tareas disponibles
+# ----------------------------------------------------------------------
+
+async def follow_log(path: str, buffer: RingBuffer, poll_interval: float = 0.5):
+    """
+    Sigue un archivo desde su final (como `tail -f`), tolerando rotación y truncado.
+
+    Args:
+        path: Archivo a seguir
+        buffer: Buffer donde guardar las líneas nuevas
+        poll_interval: Segundos entre lecturas cuando no hay datos nuevos
+    """
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"No existe el archivo: {path}")
+
+    f = open(path, 'r', encoding='utf-8', errors='replace')
+    try:
+        f.seek(0, os.SEEK_END)
+        inode = os.fstat(f.fileno()).st_ino
+        partial = ""
+        while True:
+            chunk = f.readline()
+            if chunk:
+                partial += chunk
+                if partial.endswith("\n"):
+                    buffer.append(partial.rstrip("\n"))
+                    partial = ""
+                continue
+
+            await asyncio.sleep(poll_interval)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.st_ino != inode:
+                # Rotado: seguir el archivo nuevo desde el principio
+                f.close()
+                f = open(path, 'r', encoding='utf-8', errors='replace')
+                inode = os.fstat(f.fileno()).st_ino
+            elif stat.st_size < f.tell():
+                # Truncado
+                f.seek(0)
+    finally:
+        f.close()
+
+
+async def capture_packets(interface: Optional[str], buffer: RingBuffer, bpf_filter: Optional[str] = None):
+    """
+    Captura paquetes sin límite guardando sus resúmenes en el buffer circular.
+
+    Args:
+        interface: Interfaz (None = la predeterminada de scapy)
+        buffer: Buffer donde guardar los resúmenes
+        bpf_filter: Filtro BPF opcional
+    """
+    from ..core.permissions import PermissionChecker
+
+    can_capture, message = PermissionChecker.can_capture_packets()
+    if not can_capture:
+        raise PermissionError(message)
+
+    # scapy tarda en importarse: solo cuando se usa
+    from scapy.all import AsyncSniffer
+
+    sniffer = AsyncSniffer(iface=interface, filter=bpf_filter, store=False,
+                           prn=lambda pkt: buffer.append(pkt.summary()))
+    sniffer.start()
+    try:
+        while True:
+            await asyncio.sleep(1)
+            if not sniffer.running:
+                raise RuntimeError("La captura se detuvo inesperadamente")
+    finally:
+        if sniffer.running:
+            sniffer.stop()
+
+
+__all__ = [
+    'BackgroundTaskManager', 'BackgroundTask', 'RingBuffer',
+    'follow_log', 'capture_packets', 'DEFAULT_BUFFER_SIZE'
+]
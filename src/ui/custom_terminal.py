@@ -2,8 +2,17 @@
 Terminal personalizada basada en CAI CLI
 Extiende la funcionalidad de cai.cli con características personalizadas
 Implementa un loop personalizado que intercepta comandos antes de CAI
+
+Por defecto el loop corre sobre asyncio (run_async): el agente se ejecuta con
+Runner.run / Runner.run_streamed, Ctrl+C cancela solo el turno en curso y las
+tareas en segundo plano (/follow, /capture) comparten el event loop. Con
+TERMINAL_MODE=sync se usa el loop original con Runner.run_sync.
 """
 
+import asyncio
+import os
+import signal
+import threading
 from typing import Optional, Dict, Any
 from datetime import datetime
 from math import inf
@@ -17,6 +26,8 @@ from ..ui import terminal_display
 from ..ui.session_commands import SessionCommands
 from ..ui.terminal_commands import CommandHandler
 from ..models.session_manager import SessionManager
+from ..ui.background_tasks import BackgroundTaskManager
+from ..core.tracing import start_session_trace, instrument_method
 
 
 class CustomCAITerminal:
@@ -42,17 +53,41 @@ class CustomCAITerminal:
         self.show_custom_banner = show_custom_banner
         self.show_permissions = show_permissions
         self.context_variables = {}
+        # Modo asíncrono: mostrar el texto a medida que llega (Runner.run_streamed)
+        self.stream_tokens = os.getenv("STREAM_TOKENS", "0") == "1"
         
         # Inicializar componentes modulares
         session_manager = SessionManager()
         self.session_commands = SessionCommands(session_manager, agent)
-        self.command_handler = CommandHandler(agent, self.session_commands, custom_commands)
+        self.background = BackgroundTaskManager()
+        self.command_handler = CommandHandler(agent, self.session_commands, custom_commands,
+                                              background=self.background)
         
         # Si se proporciona un session_id, cargar el contexto
         if session_id:
             self.session_commands.load_session_context(session_id)
             self.session_commands.current_session_id = session_id
         
+        # Trazas por turno en logs/traces/ (TRACE_TURNS=0 las desactiva)
+        self.tracer = start_session_trace(session_id or f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self._instrument_tracing()
+    
+    def _instrument_tracing(self):
+        """Registra como spans las llamadas al modelo y el guardado del log de CAI"""
+        if not self.tracer.enabled:
+            return
+        
+        model = getattr(self.agent, 'model', None)
+        if model is not None:
+            instrument_method(model, 'get_response', 'model.request', 'model')
+            instrument_method(model, 'stream_response', 'model.stream', 'model')
+        
+        try:
+            from cai.cli import get_session_recorder
+            instrument_method(get_session_recorder(), 'rec_training_data', 'persistence.session_log', 'persistence')
+        except Exception:
+            # Sin recorder de CAI: la persistencia queda dentro del span del modelo
+            pass
     
     def get_user_input(self) -> Optional[str]:
         """Obtiene input del usuario con prompt personalizado"""
@@ -67,81 +102,262 @@ class CustomCAITerminal:
             return None
     
     def _sync_history_from_agent(self):
-        """Sincroniza conversation_history desde agent.model.message_history para mantener consistencia"""
+        """
+        Sincroniza conversation_history desde agent.model.message_history para mantener consistencia.
+        
+        Solo procesa los mensajes nuevos desde la última sincronización (marca de agua),
+        así que el costo por turno depende de los mensajes nuevos y no del largo de la sesión.
+        """
         try:
             if hasattr(self.agent, 'model') and hasattr(self.agent.model, 'message_history'):
-                # Actualizar nuestro historial local con el del agente (es la fuente de verdad)
+                commands = self.session_commands
                 agent_history = self.agent.model.message_history
                 
-                # Solo sincronizar si hay diferencia de longitud
-                if len(agent_history) != len(self.session_commands.conversation_history):
-                    self.session_commands.conversation_history = [
-                        {
-                            'role': msg.get('role', 'unknown'),
-                            'content': msg.get('content', ''),
-                            'timestamp': msg.get('timestamp', datetime.now().isoformat())
-                        }
-                        for msg in agent_history
-                        if msg.get('role') in ['user', 'assistant']  # Solo user y assistant, no tool messages
-                    ]
+                # El historial del agente se reemplazó (p. ej. /load): retomar desde la base
+                if commands.agent_history_synced > len(agent_history):
+                    commands.agent_history_synced = commands.agent_history_base
+                
+                new_messages = agent_history[commands.agent_history_synced:]
+                if not new_messages:
+                    return
+                
+                # Mensajes agregados localmente en este turno: el agente es la fuente de verdad,
+                # pero se conservan sus timestamps originales
+                pending = commands.conversation_history[commands.local_history_synced:]
+                
+                synced = []
+                for msg in new_messages:
+                    role = msg.get('role')
+                    if role not in ['user', 'assistant']:  # Solo user y assistant, no tool messages
+                        continue
+                    # El contenido puede venir como lista de partes (texto, imágenes...)
+                    content = _message_text(msg.get('content'))
+                    timestamp = msg.get('timestamp')
+                    if not timestamp:
+                        match = next((i for i, local in enumerate(pending)
+                                      if local['role'] == role and local['content'] == content.strip()), None)
+                        timestamp = pending.pop(match)['timestamp'] if match is not None else datetime.now().isoformat()
+                    synced.append({'role': role, 'content': content, 'timestamp': timestamp})
+                
+                commands.conversation_history[commands.local_history_synced:] = synced
+                commands.agent_history_synced = len(agent_history)
+                commands.local_history_synced = len(commands.conversation_history)
         except Exception as e:
-            # Fallar silenciosamente para no interrumpir el flujo
-            pass
+            # No interrumpir el flujo, pero dejar rastro del problema
+            if os.getenv('DEBUG'):
+                print(f"[!] No se pudo sincronizar el historial: {e}")
     
     
     def run_agent_query(self, query: str):
         """Ejecuta una consulta en el agente de CAI (el historial ya está en agent.model.message_history)"""
-        try:
-            # Agregar el nuevo mensaje del usuario a nuestro tracking local
+        with self.tracer.span("turn", cat="turn", turn=self.session_commands.turn_count + 1,
+                              query_chars=len(query)) as turn_span:
+            try:
+                self._begin_turn(query)
+                
+                # NOTA: No necesitamos pasar el historial completo aquí.
+                # El agente ya tiene el historial en agent.model.message_history.
+                # Runner.run_sync() automáticamente añade el nuevo mensaje al historial interno.
+                # Las llamadas al modelo y las herramientas quedan como spans hijos.
+                with self.tracer.span("agent.run", cat="agent"):
+                    response = Runner.run_sync(
+                        starting_agent=self.agent,
+                        input=query,
+                        context=self.context_variables,
+                        max_turns=20
+                    )
+                
+                self._finish_turn(response, turn_span)
+                    
+            except Exception as e:
+                turn_span["error"] = f"{type(e).__name__}: {e}"
+                CLI.print_error(f"Error al ejecutar consulta: {e}")
+                import traceback
+                traceback.print_exc()
+    
+    def _begin_turn(self, query: str):
+        """Registra el mensaje del usuario antes de llamar al agente"""
+        # Agregar el nuevo mensaje del usuario a nuestro tracking local
+        with self.tracer.span("input", cat="input"):
             self.session_commands.add_user_message(query)
+        
+        print()  # Línea en blanco antes de la respuesta
+    
+    def _finish_turn(self, response: Any, turn_span: Dict[str, Any]):
+        """Guarda la respuesta del agente y sincroniza el historial"""
+        # Extraer contenido de la respuesta
+        assistant_response = ""
+        
+        # NO imprimir aquí - CAI ya muestra la respuesta en su cuadro
+        # Solo extraer para guardar en historial
+        if hasattr(response, 'final_output') and response.final_output:
+            assistant_response = str(response.final_output)
+        elif hasattr(response, 'messages') and response.messages:
+            for message in response.messages:
+                if hasattr(message, 'content') and message.content:
+                    assistant_response += message.content + "\n"
+        elif hasattr(response, 'output') and response.output:
+            assistant_response = response.output
+        
+        turn_span["response_chars"] = len(assistant_response)
+        
+        # Agregar respuesta del asistente a nuestro tracking local y
+        # sincronizar nuestro historial local con el del agente
+        with self.tracer.span("history.sync", cat="history"):
+            self.session_commands.add_assistant_message(assistant_response)
+            self._sync_history_from_agent()
+        
+        print()  # Línea en blanco después de la respuesta
+        
+        # Actualizar contexto si es necesario
+        if hasattr(response, 'context'):
+            self.context_variables = response.context or {}
+    
+    # ------------------------------------------------------------------
+    # Modo asíncrono
+    # ------------------------------------------------------------------
+    
+    async def run_agent_query_async(self, query: str):
+        """
+        Versión asíncrona de run_agent_query (Runner.run / Runner.run_streamed).
+        
+        Se puede cancelar (Ctrl+C durante el turno): el historial conserva lo
+        que el agente alcanzó a producir y la terminal sigue disponible.
+        """
+        with self.tracer.span("turn", cat="turn", turn=self.session_commands.turn_count + 1,
+                              query_chars=len(query)) as turn_span:
+            try:
+                self._begin_turn(query)
+                
+                with self.tracer.span("agent.run", cat="agent", streamed=self.stream_tokens):
+                    response = await self._run_agent_async(query)
+                
+                self._finish_turn(response, turn_span)
             
-            print()  # Línea en blanco antes de la respuesta
-            
-            # NOTA: No necesitamos pasar el historial completo aquí.
-            # El agente ya tiene el historial en agent.model.message_history.
-            # Runner.run_sync() automáticamente añade el nuevo mensaje al historial interno.
-            response = Runner.run_sync(
+            except asyncio.CancelledError:
+                turn_span["cancelled"] = True
+                print()
+                CLI.print_warning("Turno cancelado")
+                with self.tracer.span("history.sync", cat="history"):
+                    self._sync_history_from_agent()
+                print()
+            except Exception as e:
+                turn_span["error"] = f"{type(e).__name__}: {e}"
+                CLI.print_error(f"Error al ejecutar consulta: {e}")
+                import traceback
+                traceback.print_exc()
+    
+    async def _run_agent_async(self, query: str) -> Any:
+        """Ejecuta el agente en el event loop (con streaming si STREAM_TOKENS=1)"""
+        if not self.stream_tokens:
+            return await Runner.run(
                 starting_agent=self.agent,
                 input=query,
                 context=self.context_variables,
                 max_turns=20
             )
-            
-            # Extraer contenido de la respuesta
-            assistant_response = ""
-            
-            # NO imprimir aquí - CAI ya muestra la respuesta en su cuadro
-            # Solo extraer para guardar en historial
-            if hasattr(response, 'final_output') and response.final_output:
-                assistant_response = response.final_output
-            elif hasattr(response, 'messages') and response.messages:
-                for message in response.messages:
-                    if hasattr(message, 'content') and message.content:
-                        assistant_response += message.content + "\n"
-            elif hasattr(response, 'output') and response.output:
-                assistant_response = response.output
-            
-            # Agregar respuesta del asistente a nuestro tracking local
-            self.session_commands.add_assistant_message(assistant_response)
-            
-            # Sincronizar nuestro historial local con el del agente para mantener consistencia
-            self._sync_history_from_agent()
-            
-            print()  # Línea en blanco después de la respuesta
-            
-            # Actualizar contexto si es necesario
-            if hasattr(response, 'context'):
-                self.context_variables = response.context or {}
-                
-        except Exception as e:
-            CLI.print_error(f"Error al ejecutar consulta: {e}")
-            import traceback
-            traceback.print_exc()
+        
+        result = Runner.run_streamed(
+            starting_agent=self.agent,
+            input=query,
+            context=self.context_variables,
+            max_turns=20
+        )
+        try:
+            async for event in result.stream_events():
+                delta = _text_delta(event)
+                if delta:
+                    print(delta, end="", flush=True)
+        except asyncio.CancelledError:
+            if hasattr(result, 'cancel'):
+                result.cancel()
+            raise
+        print()
+        return result
     
+    def _read_input_async(self) -> "asyncio.Future":
+        """
+        Lee la siguiente línea sin bloquear el event loop.
+        
+        El hilo lector es daemon: si la terminal se cierra con el input
+        pendiente, no impide la salida del proceso.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def set_result(value):
+            if not future.done():
+                future.set_result(value)
+        
+        def reader():
+            value = self.get_user_input()
+            loop.call_soon_threadsafe(set_result, value)
+        
+        threading.Thread(target=reader, name="terminal-input", daemon=True).start()
+        return future
+    
+    async def _run_cancellable(self, coro):
+        """Ejecuta un turno que Ctrl+C cancela (sin cerrar la terminal)"""
+        loop = asyncio.get_running_loop()
+        task = loop.create_task(coro)
+        previous = signal.getsignal(signal.SIGINT)
+        
+        def cancel_turn(signum, frame):
+            loop.call_soon_threadsafe(task.cancel)
+        
+        signal.signal(signal.SIGINT, cancel_turn)
+        try:
+            await task
+        finally:
+            signal.signal(signal.SIGINT, previous)
+    
+    async def run_async(self, max_turns: float = inf):
+        """
+        Loop principal sobre asyncio.
+        
+        La lectura del input corre en un hilo, así que el event loop queda libre
+        para las tareas en segundo plano (/follow, /capture) mientras se espera.
+        
+        Args:
+            max_turns: Número máximo de turnos
+        """
+        terminal_display.display_startup_info(self.show_custom_banner, self.show_permissions)
+        
+        print("\n💡 Escribe /help para ver comandos disponibles")
+        print("💡 Ctrl+C durante una respuesta cancela el turno")
+        print("💡 Escribe /exit para salir\n")
+        
+        try:
+            while self.session_commands.turn_count < max_turns:
+                try:
+                    user_input = await self._read_input_async()
+                except asyncio.CancelledError:
+                    break
+                
+                if user_input is None:
+                    break
+                
+                if not user_input:
+                    continue
+                
+                result = self.command_handler.handle_command(user_input)
+                
+                if result is None:  # Salir
+                    break
+                elif result is True:  # Comando manejado
+                    continue
+                
+                await self._run_cancellable(self.run_agent_query_async(user_input))
+                self.session_commands.turn_count += 1
+        finally:
+            await self.background.stop_all()
+            self.tracer.close()
+        
+        terminal_display.display_goodbye()
     
     def run(self, max_turns: float = inf):
         """
-        Ejecuta el loop principal de la terminal personalizada.
+        Ejecuta el loop principal de la terminal personalizada (modo síncrono).
         
         Args:
             max_turns: Número máximo de turnos
@@ -175,18 +391,41 @@ class CustomCAITerminal:
             self.run_agent_query(user_input)
             self.session_commands.turn_count += 1
         
+        self.tracer.close()
+        
         # Mensaje de despedida
         terminal_display.display_goodbye()
 
 
+def _message_text(content: Any) -> str:
+    """Texto de un mensaje del historial (string o lista de partes)"""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content or "")
+
+
+def _text_delta(event: Any) -> str:
+    """Texto nuevo de un evento de Runner.run_streamed (o '' si no es un delta de texto)"""
+    if getattr(event, 'type', None) != 'raw_response_event':
+        return ""
+    data = getattr(event, 'data', None)
+    if getattr(data, 'type', None) == 'response.output_text.delta':
+        return getattr(data, 'delta', '') or ""
+    return ""
+
+
 def run_custom_cai_terminal(agent: Agent, **kwargs):
     """
     Función de conveniencia para ejecutar la terminal personalizada.
     
+    Usa el loop asíncrono salvo que TERMINAL_MODE=sync.
+    
     Args:
         agent: Agente de CAI a usar
         **kwargs: Argumentos adicionales para CustomCAITerminal
     """
     terminal = CustomCAITerminal(agent, **kwargs)
-    terminal.run()
-
+    if os.getenv("TERMINAL_MODE", "async").lower() == "sync":
+        terminal.run()
+    else:
+        asyncio.run(terminal.run_async())
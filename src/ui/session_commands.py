@@ -8,8 +8,10 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 from ..ui.cli_interface import CLI
-from ..models.session_manager import SessionManager
+from ..models.session_manager import SessionManager, AmbiguousSessionError
+from ..models.session_view import SessionView
 from ..core.permissions import PermissionChecker
+from ..core.context_window import ContextWindowManager
 
 
 class SessionCommands:
@@ -19,31 +21,58 @@ class SessionCommands:
         self.session_manager = session_manager
         self.agent = agent
         self.current_session_id: Optional[str] = None
+        # Mensajes de esta ejecución; los de una sesión cargada se leen de session_view
         self.conversation_history: List[Dict[str, str]] = []
+        self.session_view: Optional[SessionView] = None
+        # Mensajes de agent.model.message_history que vienen de la sesión cargada
+        self.agent_history_base: int = 0
+        # Marcas de agua de la sincronización incremental con el historial del agente
+        self.agent_history_synced: int = 0
+        self.local_history_synced: int = 0
+        self.history_page_size: int = 20
         self.turn_count: int = 0
+        # Historial inyectado al reanudar: últimos K turnos literales + resúmenes de los anteriores
+        self.context_window = ContextWindowManager(
+            memory_dir=session_manager.memory_dir,
+            keep_turns=int(os.getenv("CONTEXT_KEEP_TURNS", "10")),
+            token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000"))
+        )
     
     def load_session_context(self, session_id: str) -> bool:
         """Carga el contexto de una sesión anterior y REUTILIZA su session_id en CAI"""
         print(f"\n🔄 Cargando sesión: {session_id}...")
         
-        session_data = self.session_manager.load_session(session_id)
+        try:
+            session_view = self.session_manager.open_session(session_id)
+        except AmbiguousSessionError as e:
+            CLI.print_error(str(e))
+            print("Sesiones que coinciden:")
+            for candidate in e.candidates[:10]:
+                print(f"   • {candidate}")
+            print("💡 Usa más caracteres del ID para elegir una\n")
+            return False
         
-        if not session_data:
+        if not session_view or not session_view.session_info:
             CLI.print_error(f"No se pudo cargar la sesión: {session_id}")
             return False
         
-        # Cargar mensajes en el historial local
-        self.conversation_history = session_data.get('messages', [])
+        # El historial cargado se lee bajo demanda desde el log (no se copia a memoria).
+        # Se fija en el tamaño actual: CAI seguirá escribiendo en el mismo log y esos
+        # mensajes nuevos ya se cuentan en conversation_history.
+        session_view.freeze()
+        self.session_view = session_view
+        self.conversation_history = []
+        info = session_view.session_info
         
         # IMPORTANTE: Cambiar el session_id de CAI para reutilizar la sesión
-        self._reuse_cai_session(session_id, session_data['session_info']['filepath'])
+        self._reuse_cai_session(session_id, info['filepath'])
         
         # Inyectar el historial en el modelo del agente
         self._inject_history_to_agent()
         
-        CLI.print_success(f"✓ Sesión cargada: {len(self.conversation_history)} mensajes")
-        print(f"📅 Creada: {session_data['session_info']['start_time']}")
-        print(f"📝 Último mensaje: {session_data['session_info']['last_activity']}")
+        CLI.print_success(f"✓ Sesión cargada: {info['total_interactions']} mensajes")
+        print(f"📅 Creada: {info['start_time']}")
+        print(f"📝 Último mensaje: {info['last_activity']}")
         print()
         return True
     
@@ -98,27 +127,30 @@ class SessionCommands:
     
     def _inject_history_to_agent(self):
         """Inyecta el historial de conversación directamente en el modelo del agente"""
-        if not self.conversation_history:
+        if not self.session_view and not self.conversation_history:
             return
         
+        # Leer los mensajes en streaming desde el log de la sesión cargada
+        messages = self.session_view.iter_messages() if self.session_view else self.conversation_history
+        session_id = self.session_view.session_info.get('session_id') if self.session_view else None
+        
         # Limpiar el historial actual del agente
         if hasattr(self.agent, 'model') and hasattr(self.agent.model, 'message_history'):
             self.agent.model.message_history.clear()
             
-            # Inyectar cada mensaje del historial cargado
-            for msg in self.conversation_history:
-                # Saltar mensajes sin contenido válido
-                content = msg.get('content')
-                if content is None:
-                    continue
-                    
-                message_entry = {
-                    'role': msg['role'],
-                    'content': content
-                }
+            # Turnos recientes literales; los anteriores, como resúmenes cacheados
+            for message_entry in self.context_window.build_context(session_id or "local", messages):
                 self.agent.model.add_to_message_history(message_entry)
             
-            print(f"💉 Historial inyectado al modelo del agente: {len(self.conversation_history)} mensajes")
+            self.agent_history_base = len(self.agent.model.message_history)
+            self.agent_history_synced = self.agent_history_base
+            self.local_history_synced = len(self.conversation_history)
+            stats = self.context_window.get_stats()
+            print(f"💉 Historial inyectado al modelo del agente: {self.agent_history_base} mensajes")
+            if stats.get('summarized_turns'):
+                print(f"📋 {stats['summarized_turns']} turnos antiguos resumidos, "
+                      f"{stats['verbatim_turns']} recientes literales "
+                      f"(~{stats['injected_tokens']} tokens, ~{stats['tokens_saved']} ahorrados por llamada)")
     
     def display_sessions(self):
         """Muestra lista de sesiones guardadas"""
@@ -140,11 +172,12 @@ class SessionCommands:
         if self.load_session_context(session_id):
             self.current_session_id = session_id
             
-            # Mostrar resumen del historial cargado
-            if self.conversation_history:
+            # Mostrar resumen del historial cargado (lectura inversa del log)
+            recent_messages = self.session_view.tail(5) if self.session_view else []
+            if recent_messages:
                 print("📝 Resumen de la conversación anterior:")
                 print("-" * 70)
-                for i, msg in enumerate(self.conversation_history[-5:], 1):  # Últimos 5 mensajes
+                for i, msg in enumerate(recent_messages, 1):  # Últimos 5 mensajes
                     role = "👤 Usuario" if msg['role'] == 'user' else "🤖 Asistente"
                     
                     # Manejar content que puede ser None (mensajes con solo tool calls)
@@ -175,6 +208,46 @@ class SessionCommands:
                 print("-" * 70)
                 print("✅ Puedes continuar la conversación desde donde la dejaste\n")
     
+    def retention_command(self, arg: str = ""):
+        """Muestra (o aplica con 'apply') la política de retención de sesiones"""
+        retention = self.session_manager.retention
+        dry_run = arg.strip().lower() != 'apply'
+        
+        report = retention.apply(dry_run=dry_run)
+        actions = report['actions']
+        policy = retention.policy
+        
+        print("\n" + "="*70)
+        print("🗄️  RETENCIÓN DE SESIONES" + (" (simulación)" if dry_run else ""))
+        print("="*70)
+        print(f"\n📏 Política: archivar tras {policy.archive_after_days} días, "
+              f"borrar tras {policy.delete_after_days or '∞'} días, "
+              f"máx. {policy.max_hot_mb:g} MB sin comprimir, "
+              f"{policy.keep_recent} sesiones recientes protegidas\n")
+        
+        if not actions:
+            print("✅ Ninguna sesión requiere cambios\n")
+            return
+        
+        icons = {'archive': '📦', 'delete': '🗑️ '}
+        for action in actions:
+            # Las sesiones locales (session_AAAAMMDD_HHMMSS) se identifican por su fecha completa
+            name = action['session_id'] if 'paths' in action else action['session_id'][:12]
+            print(f"{icons[action['action']]} {name:<24} "
+                  f"{action['size'] / 1024:>9.1f} KB  {action['age_days']:>6} días  → {action['reason']}")
+        
+        to_archive = sum(1 for a in actions if a['action'] == 'archive')
+        to_delete = len(actions) - to_archive
+        if dry_run:
+            print(f"\n📋 Se archivarían {to_archive} y se borrarían {to_delete} sesiones")
+            print("💡 Usa '/retention apply' para aplicar la política\n")
+        else:
+            CLI.print_success(f"Archivadas: {report['archived']}, borradas: {report['deleted']}, "
+                              f"liberados: {report['bytes_freed'] / (1024 * 1024):.1f} MB")
+            for error in report['errors']:
+                CLI.print_error(error)
+            print()
+    
     def search_sessions_command(self, query: str):
         """Busca sesiones por contenido"""
         if not query:
@@ -187,22 +260,63 @@ class SessionCommands:
         
         if results:
             self.session_manager.print_sessions_table(results)
+            
+            # Fragmentos donde aparece el texto (el más relevante por sesión)
+            role_labels = {'user': '👤', 'assistant': '🤖', 'tool': '🔧'}
+            for idx, session in enumerate(results, 1):
+                if session.get('snippet'):
+                    icon = role_labels.get(session.get('match_role'), '•')
+                    snippet = " ".join(session['snippet'].split())
+                    print(f"{idx:<4} {icon} {snippet}  ({session.get('matches', 1)} coincidencias)")
+            print()
         else:
             print("📭 No se encontraron sesiones con ese contenido\n")
     
-    def display_current_history(self):
-        """Muestra el historial de la sesión actual"""
+    def _get_history_page(self, page: Optional[int]) -> tuple:
+        """
+        Obtiene una página del historial combinado (sesión cargada + mensajes nuevos).
+        
+        Returns:
+            (mensajes, número_del_primero, página, total_páginas, total_mensajes)
+        """
+        loaded = len(self.session_view) if self.session_view else 0
+        total = loaded + len(self.conversation_history)
+        page_size = self.history_page_size
+        total_pages = max(1, -(-total // page_size))
+        
+        # Por defecto, la última página (lo más reciente)
+        page = total_pages if page is None else min(max(1, page), total_pages)
+        start = (page - 1) * page_size
+        stop = min(start + page_size, total)
+        
+        messages = []
+        if start < loaded:
+            messages.extend(self.session_view.get_messages(start, min(stop, loaded)))
+        if stop > loaded:
+            messages.extend(self.conversation_history[max(0, start - loaded):stop - loaded])
+        
+        return messages, start + 1, page, total_pages, total
+    
+    def display_current_history(self, page: Optional[int] = None):
+        """
+        Muestra una página del historial de la sesión actual.
+        
+        Args:
+            page: Número de página (por defecto, la última)
+        """
         print("\n" + "="*70)
         print("📝 HISTORIAL DE LA SESIÓN ACTUAL")
         print("="*70)
         
-        if not self.conversation_history:
+        messages, first_number, page, total_pages, total = self._get_history_page(page)
+        
+        if not total:
             print("\n📭 No hay historial en esta sesión aún\n")
             return
         
-        print(f"\nTotal de mensajes: {len(self.conversation_history)}\n")
+        print(f"\nTotal de mensajes: {total} (página {page}/{total_pages})\n")
         
-        for i, msg in enumerate(self.conversation_history, 1):
+        for i, msg in enumerate(messages, first_number):
             role_emoji = "👤" if msg['role'] == 'user' else "🤖"
             role_name = "Usuario" if msg['role'] == 'user' else "Asistente"
             timestamp = msg.get('timestamp', 'unknown')
@@ -227,6 +341,8 @@ class SessionCommands:
             print(f"{role_emoji} [{i}] {role_name} ({timestamp}):")
             print(f"   {content_display}\n")
         
+        if total_pages > 1:
+            print(f"💡 Usa '/history <página>' para ver otras páginas (1-{total_pages})")
         print("="*70 + "\n")
     
     def display_session_info(self):
@@ -235,15 +351,19 @@ class SessionCommands:
         print("📊 INFORMACIÓN DE LA SESIÓN ACTUAL")
         print("="*70)
         
+        info = None
+        
         # Información básica
         if self.current_session_id:
             print(f"\n🆔 Session ID: {self.current_session_id}")
             print("📝 Estado: Sesión cargada (reanudada)")
             
-            # Intentar cargar información completa de la sesión
-            session_data = self.session_manager.load_session(self.current_session_id)
-            if session_data and session_data.get('session_info'):
-                info = session_data['session_info']
+            # Metadatos desde el índice (no se vuelve a leer el log completo)
+            try:
+                info = self.session_manager.get_session_info(self.current_session_id)
+            except AmbiguousSessionError:
+                info = None
+            if info:
                 print(f"📅 Creada: {info.get('start_time', 'unknown')}")
                 print(f"🕐 Última actividad: {info.get('last_activity', 'unknown')}")
                 print(f"👤 Usuario: {info.get('user', 'unknown')}")
@@ -256,15 +376,28 @@ class SessionCommands:
         
         # Estadísticas de mensajes
         print(f"\n💬 Estadísticas de Conversación:")
-        total_messages = len(self.conversation_history)
         user_msgs = sum(1 for m in self.conversation_history if m['role'] == 'user')
         assistant_msgs = sum(1 for m in self.conversation_history if m['role'] == 'assistant')
         
+        # Mensajes de la sesión cargada: los de la vista fijada al cargarla (el log
+        # sigue creciendo con los nuevos, que ya están en conversation_history)
+        if self.session_view:
+            loaded = self.session_view.role_counts()
+            user_msgs += loaded['user']
+            assistant_msgs += loaded['assistant']
+        total_messages = user_msgs + assistant_msgs
+        
         print(f"   • Total de mensajes: {total_messages}")
         print(f"   • Mensajes del usuario: {user_msgs}")
         print(f"   • Respuestas del asistente: {assistant_msgs}")
         print(f"   • Turnos de conversación: {self.turn_count}")
         
+        context_stats = self.context_window.get_stats()
+        if context_stats.get('summarized_turns'):
+            print(f"   • Contexto reanudado: ~{context_stats['injected_tokens']} tokens "
+                  f"(~{context_stats['tokens_saved']} ahorrados por llamada, "
+                  f"{context_stats['summarized_turns']} turnos resumidos)")
+        
         # Información del sistema
         print(f"\n🖥️  Sistema:")
         print(f"   • Usuario actual: {os.getenv('USER', 'unknown')}")
@@ -282,11 +415,8 @@ class SessionCommands:
         print(f"\n📁 Archivos:")
         print(f"   • Logs: logs/")
         print(f"   • Memoria: memory/")
-        if self.current_session_id:
-            if os.path.exists('logs'):
-                log_files = [f for f in os.listdir('logs') if self.current_session_id[:8] in f]
-                if log_files:
-                    print(f"   • Archivos de esta sesión: {len(log_files)}")
+        if self.current_session_id and info:
+            print(f"   • Log de esta sesión: {info['filepath']} ({info.get('size', 0) / 1024:.1f} KB)")
         
         # Costos (si está disponible)
         try:
@@ -0,0 +1,172 @@
+"""
+LLM de prueba con API compatible con OpenAI (/v1/chat/completions)
+
+Permite ejecutar y probar `main.py --serve` (o la terminal) sin un
+proveedor real ni costo de API:
+
+    python -m src.ui.stub_llm --port 8090
+    OPENAI_BASE_URL=http://127.0.0.1:8090/v1 OPENAI_API_BASE=http://127.0.0.1:8090/v1 \\
+        CAI_MODEL=openai/stub python main.py --serve
+
+Respuestas:
+- Mensaje del usuario normal: responde con STUB_LLM_REPLY + el mensaje.
+- `/tool <nombre> {json}`: pide esa herramienta (si el cliente la ofreció)
+  con esos argumentos; al recibir el resultado responde con un resumen.
+
+STUB_LLM_DELAY (segundos) agrega una demora por respuesta para probar la
+cola y los timeouts. Soporta respuestas completas y en streaming (SSE).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from typing import List, Dict, Any, AsyncIterator
+
+from .api_server import HttpServer, HttpRequest, HttpError, StreamingResponse, json_response
+
+
+REPLY_PREFIX = os.getenv("STUB_LLM_REPLY", "Respuesta de prueba: ")
+
+_TOOL_COMMAND = re.compile(r"^/tool\s+(\S+)\s*(\{.*\})?\s*$", re.DOTALL)
+
+
+def _text(content: Any) -> str:
+    """Texto de un mensaje (string o lista de partes)"""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content or "")
+
+
+def plan_reply(messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Decide la respuesta del stub.
+
+    Returns:
+        {'content': str} o {'tool_call': {'name', 'arguments'}}
+    """
+    if not messages:
+        return {"content": REPLY_PREFIX.strip()}
+
+    last = messages[-1]
+    if last.get("role") == "tool":
+        output = _text(last.get("content"))
+        return {"content": f"Resultado de la herramienta: {output[:500]}"}
+
+    text = _text(last.get("content")).strip()
+    match = _TOOL_COMMAND.match(text)
+    offered = {tool.get("function", {}).get("name") for tool in tools or []}
+    if match and match.group(1) in offered:
+        return {"tool_call": {"name": match.group(1), "arguments": match.group(2) or "{}"}}
+    return {"content": f"{REPLY_PREFIX}{text}"}
+
+
+class StubLLM:
+    """Servidor del LLM de prueba"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8090, delay: float = 0.0):
+        self.delay = delay
+        self.requests = 0
+        self.http = HttpServer(host, port, access_log=False)
+        self.http.route("GET", "/v1/models", self.models)
+        self.http.route("POST", "/v1/chat/completions", self.chat_completions)
+
+    async def models(self, request: HttpRequest) -> Dict[str, Any]:
+        return {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "local"}]}
+
+    async def chat_completions(self, request: HttpRequest) -> Any:
+        body = request.json()
+        messages = body.get("messages")
+        if not isinstance(messages, list):
+            raise HttpError(400, "Falta 'messages'")
+
+        self.requests += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+        reply = plan_reply(messages, body.get("tools", []))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        model = body.get("model", "stub")
+        if body.get("stream"):
+            return StreamingResponse(
+                self._chunks(completion_id, model, reply),
+                content_type="text/event-stream",
+                encode=lambda chunk: b"data: " + (chunk.encode('utf-8') if isinstance(chunk, str)
+                                                  else json.dumps(chunk, ensure_ascii=False).encode('utf-8')) + b"\n\n"
+            )
+
+        message: Dict[str, Any] = {"role": "assistant", "content": reply.get("content")}
+        if "tool_call" in reply:
+            message["tool_calls"] = [self._tool_call(reply["tool_call"])]
+        prompt_tokens = sum(len(_text(m.get("content")).split()) for m in messages)
+        completion_tokens = len((reply.get("content") or "").split())
+        return json_response({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if "tool_call" in reply else "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    @staticmethod
+    def _tool_call(call: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            "id": f"call_{uuid.uuid4().hex[:24]}",
+            "type": "function",
+            "function": {"name": call["name"], "arguments": call["arguments"]}
+        }
+
+    async def _chunks(self, completion_id: str, model: str, reply: Dict[str, Any]) -> AsyncIterator[Any]:
+        """Chunks SSE de chat.completion.chunk (el contenido palabra por palabra)"""
+        def chunk(delta: Dict[str, Any], finish_reason: Any = None) -> Dict[str, Any]:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+
+        yield chunk({"role": "assistant", "content": ""})
+        if "tool_call" in reply:
+            yield chunk({"tool_calls": [{"index": 0, **self._tool_call(reply["tool_call"])}]})
+            yield chunk({}, "tool_calls")
+        else:
+            for word in re.findall(r"\S+\s*", reply["content"]):
+                yield chunk({"content": word})
+            yield chunk({}, "stop")
+        yield "[DONE]"
+
+    async def serve(self):
+        await self.http.start()
+        print(f"[+] LLM de prueba en http://{self.http.host}:{self.http.port}/v1 (modelo 'stub')")
+        await self.http.serve_until_signal()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LLM de prueba compatible con OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--delay", type=float, default=float(os.getenv("STUB_LLM_DELAY", "0")),
+                        help="Demora por respuesta en segundos (env: STUB_LLM_DELAY)")
+    args = parser.parse_args(argv)
+    asyncio.run(StubLLM(args.host, args.port, args.delay).serve())
+
+
+if __name__ == "__main__":
+    main()
+
+
+__all__ = ['StubLLM', 'plan_reply']
@@ -8,12 +8,14 @@ from typing import Optional, Dict, Any, Callable
 from ..ui.cli_interface import CLI
 from ..ui import terminal_display
 from ..core.permissions import PermissionChecker
+from ..ui.background_tasks import follow_log, capture_packets
 
 
 class CommandHandler:
     """Manejador centralizado de comandos de terminal"""
     
-    def __init__(self, agent, session_commands, custom_commands: Dict[str, Callable] = None):
+    def __init__(self, agent, session_commands, custom_commands: Dict[str, Callable] = None,
+                 background=None):
         """
         Inicializa el manejador de comandos.
         
@@ -21,10 +23,12 @@ class CommandHandler:
             agent: Agente de CAI
             session_commands: Instancia de SessionCommands
             custom_commands: Diccionario de comandos personalizados adicionales
+            background: BackgroundTaskManager de la terminal (tareas en segundo plano)
         """
         self.agent = agent
         self.session_commands = session_commands
         self.custom_commands = custom_commands or {}
+        self.background = background
     
     def handle_command(self, user_input: str) -> Optional[bool]:
         """
@@ -70,6 +74,15 @@ class CommandHandler:
             terminal_display.display_costs()
             return True
         
+        # Telemetría de herramientas (o exportación a Prometheus)
+        if cmd_lower.split()[0] in ['/metrics', '/metricas']:
+            parts = cmd.split(maxsplit=2)
+            if len(parts) > 1 and parts[1].lower() == 'export':
+                terminal_display.export_metrics(parts[2] if len(parts) > 2 else None)
+            else:
+                terminal_display.display_metrics()
+            return True
+        
         # Tools
         if cmd_lower in ['/tools', '/herramientas']:
             terminal_display.display_tools()
@@ -80,6 +93,11 @@ class CommandHandler:
             terminal_display.display_examples()
             return True
         
+        # Tareas en segundo plano (terminal asíncrona)
+        if cmd_lower.split()[0] in ['/bg', '/follow', '/capture']:
+            self.handle_background_command(cmd)
+            return True
+        
         # === COMANDOS DE SESIONES ===
         
         # Listar sesiones
@@ -93,15 +111,24 @@ class CommandHandler:
             self.session_commands.load_session_command(session_id)
             return True
         
+        # Retención de sesiones (simulación o 'apply')
+        if cmd_lower.split()[0] in ['/retention', '/retencion']:
+            self.session_commands.retention_command(cmd_lower[len(cmd_lower.split()[0]):])
+            return True
+        
         # Buscar sesiones
         if cmd_lower.startswith('/search '):
             query = cmd[8:].strip()
             self.session_commands.search_sessions_command(query)
             return True
         
-        # Ver historial actual
-        if cmd_lower in ['/history', '/historial']:
-            self.session_commands.display_current_history()
+        # Ver historial actual (opcionalmente una página: /history 3)
+        if cmd_lower.split()[0] in ['/history', '/historial']:
+            arg = cmd_lower.split()[1] if len(cmd_lower.split()) > 1 else None
+            if arg and not arg.isdigit():
+                CLI.print_error("Uso: /history [página]")
+                return True
+            self.session_commands.display_current_history(int(arg) if arg else None)
             return True
         
         # Info de sesión actual
@@ -120,6 +147,60 @@ class CommandHandler:
         
         # No es un comando personalizado, enviar al agente
         return False
+    
+    def handle_background_command(self, cmd: str):
+        """
+        /follow <archivo>, /capture [interfaz] [filtro BPF], /bg [show|stop <id> [n]]
+        """
+        parts = cmd.split()
+        name = parts[0].lower()
+        
+        if self.background is None:
+            CLI.print_error("Tareas en segundo plano no disponibles en esta terminal")
+            return
+        
+        if name == '/bg':
+            if len(parts) == 1:
+                terminal_display.display_background_tasks(self.background.list_tasks())
+                return
+            action = parts[1].lower()
+            if action not in ('show', 'stop') or len(parts) < 3 or not parts[2].isdigit():
+                CLI.print_error("Uso: /bg [show <id> [líneas] | stop <id>]")
+                return
+            task_id = int(parts[2])
+            if action == 'stop':
+                if self.background.stop(task_id):
+                    CLI.print_success(f"Tarea #{task_id} detenida")
+                else:
+                    CLI.print_error(f"No hay una tarea activa con ID {task_id}")
+                return
+            bg = self.background.get(task_id)
+            if bg is None:
+                CLI.print_error(f"No existe la tarea #{task_id}")
+                return
+            count = int(parts[3]) if len(parts) > 3 and parts[3].isdigit() else 20
+            terminal_display.display_background_buffer(bg, count)
+            return
+        
+        try:
+            if name == '/follow':
+                if len(parts) < 2:
+                    CLI.print_error("Uso: /follow <archivo>")
+                    return
+                path = cmd.split(maxsplit=1)[1].strip()
+                bg = self.background.start('follow', path, lambda buffer: follow_log(path, buffer))
+            else:
+                interface = parts[1] if len(parts) > 1 else None
+                bpf_filter = " ".join(parts[2:]) or None
+                bg = self.background.start(
+                    'capture', interface or 'predeterminada',
+                    lambda buffer: capture_packets(interface, buffer, bpf_filter)
+                )
+        except RuntimeError:
+            CLI.print_error("Las tareas en segundo plano requieren la terminal asíncrona (TERMINAL_MODE=async)")
+            return
+        
+        CLI.print_success(f"Tarea #{bg.task_id} iniciada ({bg.kind} {bg.target}); /bg show {bg.task_id} para ver su buffer")
 
 
 # Funciones de conveniencia para crear comandos personalizados
@@ -7,6 +7,8 @@ import os
 from cai.util import COST_TRACKER
 from ..ui.cli_interface import CLI
 from ..core.permissions import PermissionChecker
+from ..core.tool_cache import shared_tool_cache
+from ..core.tool_metrics import shared_tool_metrics
 
 
 def display_startup_info(show_custom_banner: bool = True, show_permissions: bool = True):
@@ -40,12 +42,19 @@ def display_help(custom_commands: dict = None):
     print("  /status         - Estado del sistema y sesión")
     print("  /clear          - Limpiar pantalla")
     print("  /cost           - Ver costos de API")
+    print("  /metrics        - Telemetría de herramientas ('export [archivo]' a Prometheus)")
     print("\n🔄 Gestión de Sesiones:")
     print("  /sessions       - Listar sesiones guardadas")
     print("  /load <id>      - Reanudar una sesión anterior")
     print("  /search <texto> - Buscar sesiones por contenido")
-    print("  /history        - Ver historial de la sesión actual")
+    print("  /history [pág]  - Ver historial de la sesión actual (paginado)")
     print("  /info           - Información de la sesión actual")
+    print("  /retention      - Archivar/borrar sesiones antiguas ('apply' para aplicar)")
+    print("\n⏳ Segundo Plano (terminal asíncrona):")
+    print("  /follow <arch>  - Seguir un log en un buffer circular")
+    print("  /capture [if]   - Capturar paquetes en un buffer circular")
+    print("  /bg             - Listar tareas ('show <id> [n]', 'stop <id>')")
+    print("  Ctrl+C          - Cancelar la respuesta en curso")
     print("\n🚪 Salir:")
     print("  /exit, /quit    - Salir")
     
@@ -92,9 +101,96 @@ def display_status(agent, turn_count: int):
         tool_count = len(agent.tools)
         print(f"🛠️  Herramientas: {tool_count} registradas")
     
+    cache_stats = shared_tool_cache.get_stats()
+    if cache_stats["by_tool"]:
+        print(f"\n🗃️  Caché de herramientas: {cache_stats['hit_ratio']:.0%} de aciertos "
+              f"({cache_stats['memory_hits']} memoria, {cache_stats['disk_hits']} disco, "
+              f"{cache_stats['misses']} fallos)")
+        for name, counters in sorted(cache_stats["by_tool"].items()):
+            hits = counters["memory_hits"] + counters["disk_hits"]
+            print(f"   • {name:<28} {counters['hit_ratio']:>4.0%} ({hits}/{hits + counters['misses']})")
+    
     print("\n" + "="*70 + "\n")
 
 
+def _format_bytes(size: int) -> str:
+    """Tamaño legible (B, KB, MB)"""
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def display_metrics():
+    """Muestra la telemetría de ejecución de cada herramienta"""
+    print("\n" + "="*70)
+    print("📈 TELEMETRÍA DE HERRAMIENTAS")
+    print("="*70)
+    
+    stats = shared_tool_metrics.get_stats()
+    if not stats:
+        print("\nℹ️  Aún no se ejecutó ninguna herramienta en esta sesión")
+        print("\n" + "="*70 + "\n")
+        return
+    
+    wall_time = sum(item["total_s"] for item in stats)
+    print(f"\n⏱️  Tiempo total en herramientas: {wall_time:.2f}s\n")
+    print(f"{'Herramienta':<28} {'Llamadas':>8} {'Total':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'Error':>6} {'Caché':>6}")
+    print("-" * 90)
+    for item in stats:
+        share = item["total_s"] / wall_time if wall_time else 0.0
+        print(f"{item['tool']:<28} {item['calls']:>8} {item['total_s']:>7.2f}s "
+              f"{item['p50_ms']:>6.0f}ms {item['p90_ms']:>6.0f}ms {item['p99_ms']:>6.0f}ms "
+              f"{item['error_rate']:>6.0%} {item['cache_hits']:>6}  ({share:.0%})")
+    
+    print("\n📦 Bytes de entrada / salida:")
+    for item in stats:
+        print(f"   • {item['tool']:<28} {_format_bytes(item['bytes_in']):>10} / {_format_bytes(item['bytes_out'])}")
+    
+    print("\n💡 /metrics export [archivo] guarda las métricas en formato Prometheus")
+    print("\n" + "="*70 + "\n")
+
+
+def export_metrics(path: str = None):
+    """Exporta la telemetría de herramientas en formato de texto de Prometheus"""
+    try:
+        written = shared_tool_metrics.export_prometheus(path) if path else shared_tool_metrics.export_prometheus()
+        CLI.print_success(f"Métricas exportadas a: {written}")
+    except OSError as e:
+        CLI.print_error(f"No se pudieron exportar las métricas: {e}")
+
+
+def display_background_tasks(tasks: list):
+    """Lista las tareas en segundo plano"""
+    if not tasks:
+        print("\nℹ️  No hay tareas en segundo plano (usa /follow o /capture)\n")
+        return
+    
+    print(f"\n{'ID':>4}  {'Tipo':<8} {'Objetivo':<30} {'Estado':<9} {'Inicio':<9} {'Buffer':>12}")
+    print("-" * 80)
+    for task in tasks:
+        buffered = f"{task['buffered']}/{task['total']}"
+        print(f"{task['id']:>4}  {task['kind']:<8} {task['target'][:30]:<30} {task['status']:<9} "
+              f"{task['started_at']:<9} {buffered:>12}")
+        if task['error']:
+            print(f"      ❌ {task['error']}")
+    print()
+
+
+def display_background_buffer(task, count: int = 20):
+    """Muestra las últimas líneas del buffer de una tarea"""
+    lines = task.buffer.tail(count)
+    print(f"\n📜 Tarea #{task.task_id} ({task.kind} {task.target}) - {task.status}, "
+          f"últimas {len(lines)} de {task.buffer.total}:")
+    print("-" * 70)
+    for line in lines:
+        print(f"  {line}")
+    if not lines:
+        print("  (sin datos todavía)")
+    print()
+
+
 def display_costs():
     """Muestra costos de API con explicación del cálculo"""
     try:
@@ -145,11 +241,16 @@ def display_tools():
         ("network_sniffer", "Captura de paquetes de red", "Requiere sudo"),
         ("nmap_scan", "Escaneo de puertos y servicios", "Básico: no sudo"),
         ("nmap_ping_sweep", "Descubrimiento de hosts", "No requiere sudo"),
+        ("recon_pipeline", "Perfilado completo de una red", "Básico: no sudo"),
         ("whois_lookup", "Información de dominios", "No requiere sudo"),
+        ("bulk_whois", "WHOIS masivo en paralelo", "No requiere sudo"),
         ("dns_lookup", "Resolución DNS", "No requiere sudo"),
         ("reverse_dns", "DNS inverso", "No requiere sudo"),
+        ("bulk_dns", "Resolución DNS masiva (A/AAAA)", "No requiere sudo"),
+        ("bulk_reverse_dns", "DNS inverso masivo / CIDR", "No requiere sudo"),
         ("analyze_log", "Análisis de logs", "Logs sistema: sudo"),
         ("tail_log", "Monitoreo de logs", "Logs sistema: sudo"),
+        ("read_artifact", "Paginar outputs compactados", "No requiere sudo"),
     ]
     
     for name, desc, perm in tools:
@@ -0,0 +1,135 @@
+"""
+Pruebas de la API local: servidor HTTP (keep-alive, cola con 503, streaming) y dirección de escucha
+
+    python -m unittest test_api_server
+"""
+
+import asyncio
+import http.client
+import json
+import threading
+import unittest
+
+try:
+    from src.ui.api_server import (
+        HttpServer, HttpError, RequestQueue, QueueFullError, StreamingResponse, json_response,
+        check_bind_address, is_loopback
+    )
+except ImportError:  # src.ui necesita CAI instalado
+    HttpServer = None
+
+
+@unittest.skipIf(HttpServer is None, "requiere CAI instalado")
+class HttpServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+        self.queue = RequestQueue(max_concurrent=1, max_queued=0)
+        self.release = asyncio.Event()
+        self.server = HttpServer("127.0.0.1", 0, access_log=False)
+        self.server.route("GET", "/ping", self.ping)
+        self.server.route("POST", "/slow", self.slow)
+        self.server.route("GET", "/stream", self.stream)
+        self.call(self.server.start())
+
+    def tearDown(self):
+        self.call(self.server.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+
+    def call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(10)
+
+    def connect(self) -> http.client.HTTPConnection:
+        return http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=10)
+
+    # Handlers ----------------------------------------------------------
+
+    async def ping(self, request):
+        return {"pong": True}
+
+    async def slow(self, request):
+        try:
+            async with self.queue.slot():
+                await self.release.wait()
+        except QueueFullError as e:
+            raise HttpError(503, str(e), {"Retry-After": "5"})
+        return json_response({"done": True})
+
+    async def stream(self, request):
+        async def events():
+            for i in range(3):
+                yield {"n": i}
+                await asyncio.sleep(0)
+        return StreamingResponse(events())
+
+    # Pruebas -----------------------------------------------------------
+
+    def test_keep_alive_reuses_the_connection(self):
+        conn = self.connect()
+        conn.request("GET", "/ping")
+        first = conn.getresponse()
+        self.assertEqual(json.loads(first.read()), {"pong": True})
+        sock = conn.sock
+
+        conn.request("GET", "/ping")
+        second = conn.getresponse()
+        self.assertEqual(second.status, 200)
+        second.read()
+        self.assertIs(conn.sock, sock)
+        conn.close()
+
+    def test_full_queue_returns_503(self):
+        busy = self.connect()
+        busy.request("POST", "/slow", body=b"{}")
+        while self.queue.active == 0:
+            threading.Event().wait(0.01)
+
+        rejected = self.connect()
+        rejected.request("POST", "/slow", body=b"{}")
+        response = rejected.getresponse()
+        self.assertEqual(response.status, 503)
+        self.assertEqual(response.getheader("Retry-After"), "5")
+        response.read()
+
+        self.loop.call_soon_threadsafe(self.release.set)
+        self.assertEqual(busy.getresponse().status, 200)
+        self.assertEqual(self.queue.get_stats()["rejected"], 1)
+        busy.close()
+        rejected.close()
+
+    def test_streaming_response_is_chunked_ndjson(self):
+        conn = self.connect()
+        conn.request("GET", "/stream")
+        response = conn.getresponse()
+        self.assertEqual(response.getheader("Transfer-Encoding"), "chunked")
+        lines = [json.loads(line) for line in response.read().splitlines()]
+        self.assertEqual(lines, [{"n": 0}, {"n": 1}, {"n": 2}])
+        conn.close()
+
+
+@unittest.skipIf(HttpServer is None, "requiere CAI instalado")
+class BindAddressTest(unittest.TestCase):
+
+    def test_loopback_addresses(self):
+        for host in ("127.0.0.1", "127.0.0.2", "::1", "localhost"):
+            self.assertTrue(is_loopback(host), host)
+        for host in ("0.0.0.0", "", "::", "192.168.1.10", "api.example.com"):
+            self.assertFalse(is_loopback(host), host)
+
+    def test_public_address_requires_a_token_or_insecure(self):
+        check_bind_address("127.0.0.1", None, insecure=False)
+        check_bind_address("0.0.0.0", "secreto", insecure=False)
+        check_bind_address("0.0.0.0", None, insecure=True)
+        with self.assertRaises(ValueError):
+            check_bind_address("0.0.0.0", None, insecure=False)
+        with self.assertRaises(ValueError):
+            check_bind_address("192.168.1.10", "", insecure=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
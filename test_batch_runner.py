@@ -0,0 +1,121 @@
+"""
+Pruebas del modo por lotes (archivo de consultas, filtrado de herramientas y workers)
+
+    python -m unittest test_batch_runner
+"""
+
+import asyncio
+import json
+import os
+import unittest
+from unittest import mock
+
+from test_support import TempDirTest
+
+try:
+    from cai.sdk.agents import Agent, FunctionTool
+    from src.core import batch_runner
+    from src.core.batch_runner import BatchRunner, load_queries, unattended_agent
+    from src.core.tool_cache import ToolResultCache
+    from src.core.tool_manager import ToolManager
+except ImportError:  # src.core necesita CAI instalado
+    batch_runner = None
+
+
+async def _noop(ctx, input_json):
+    return "ok"
+
+
+def make_tool(name: str) -> "FunctionTool":
+    return FunctionTool(name=name, description=name, params_json_schema={"type": "object", "properties": {}},
+                        on_invoke_tool=_noop)
+
+
+class _FlakyRunner:
+    """Runner de prueba: 'falla una vez' falla el primer intento, 'falla' todos"""
+
+    calls = []
+
+    @classmethod
+    async def run(cls, starting_agent, input, max_turns):
+        cls.calls.append((input, [t.name for t in starting_agent.tools]))
+        attempts = sum(1 for query, _ in cls.calls if query == input)
+        if input == "falla" or (input == "falla una vez" and attempts == 1):
+            raise RuntimeError("error del modelo")
+        return mock.Mock(final_output=f"respuesta a {input}")
+
+
+@unittest.skipIf(batch_runner is None, "requiere CAI instalado")
+class LoadQueriesTest(TempDirTest):
+
+    def write(self, text: str) -> str:
+        path = os.path.join(self.dir, "consultas.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_plain_json_and_comment_lines(self):
+        path = self.write("# inventario\nescanea 10.0.0.1\n\n"
+                          '{"id": "dns-1", "query": "resuelve example.com"}\n')
+        queries = load_queries(path)
+        self.assertEqual([(q.query_id, q.query, q.line) for q in queries],
+                         [("1", "escanea 10.0.0.1", 2), ("dns-1", "resuelve example.com", 4)])
+
+    def test_template_and_invalid_json(self):
+        queries = load_queries(self.write("10.0.0.1\n10.0.0.2\n"), template="perfila {item}")
+        self.assertEqual([q.query for q in queries], ["perfila 10.0.0.1", "perfila 10.0.0.2"])
+        with self.assertRaises(ValueError):
+            load_queries(self.write('{"query": \n'))
+
+
+@unittest.skipIf(batch_runner is None, "requiere CAI instalado")
+class BatchRunnerTest(TempDirTest):
+
+    def setUp(self):
+        super().setUp()
+        self.agent = Agent(name="test", tools=[])
+        self.manager = ToolManager(self.agent, cache=ToolResultCache(cache_dir=None))
+        self.manager.register_tool(make_tool("nmap_scan_tool"), {"is_sensitive": True})
+        self.manager.register_tool(make_tool("dns_lookup_tool"), {"is_sensitive": False})
+        self.agent.tools.append(make_tool("cai_builtin_tool"))  # Sin metadatos: se trata como sensible
+
+    def test_unattended_agent_hides_sensitive_tools(self):
+        agent = unattended_agent(self.agent, self.manager)
+        self.assertEqual([t.name for t in agent.tools], ["dns_lookup_tool"])
+        self.assertEqual(len(self.agent.tools), 3)
+        self.assertIn("nmap_scan_tool, cai_builtin_tool", agent.instructions(None, agent))
+
+        allowed = unattended_agent(self.agent, self.manager, allow_sensitive=True)
+        self.assertEqual(len(allowed.tools), 3)
+
+    def test_run_retries_and_records_every_query(self):
+        _FlakyRunner.calls = []
+        queries = load_queries(self.write_queries(["hola", "falla una vez", "falla"]))
+        output = os.path.join(self.dir, "out", "resultados.jsonl")
+
+        async def no_wait(delay):
+            pass
+
+        with mock.patch.object(batch_runner, "Runner", _FlakyRunner), \
+                mock.patch.object(batch_runner.asyncio, "sleep", no_wait):
+            summary = asyncio.run(BatchRunner(self.agent, self.manager, workers=2, retries=1).run(queries, output))
+
+        self.assertEqual((summary["total"], summary["ok"], summary["failed"]), (3, 2, 1))
+        with open(output, encoding='utf-8') as f:
+            records = {r["query"]: r for r in map(json.loads, f)}
+        self.assertEqual(records["hola"]["output"], "respuesta a hola")
+        self.assertEqual(len(records["falla una vez"]["attempts"]), 2)
+        self.assertEqual(records["falla"]["status"], "error")
+        self.assertIn("error del modelo", records["falla"]["error"])
+        # Sin --allow-sensitive, ninguna ejecución recibió herramientas sensibles
+        self.assertTrue(all(tools == ["dns_lookup_tool"] for _, tools in _FlakyRunner.calls))
+
+    def write_queries(self, queries) -> str:
+        path = os.path.join(self.dir, "consultas.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(queries) + "\n")
+        return path
+
+
+if __name__ == "__main__":
+    unittest.main()
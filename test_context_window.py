@@ -0,0 +1,36 @@
+"""
+Pruebas de la inyección de historial con presupuesto de tokens
+
+    python -m unittest test_context_window
+"""
+
+import unittest
+
+from test_support import TempDirTest
+
+try:
+    from src.core.context_window import ContextWindowManager
+    from src.core.output_compactor import estimate_tokens
+except ImportError:  # src.core necesita CAI instalado
+    ContextWindowManager = None
+
+
+@unittest.skipIf(ContextWindowManager is None, "requiere CAI instalado")
+class ContextWindowTest(TempDirTest):
+
+    def test_injected_history_stays_within_budget(self):
+        manager = ContextWindowManager(memory_dir=self.dir, keep_turns=4, token_budget=1500, span_turns=5)
+        messages = []
+        for i in range(60):
+            messages.append({"role": "user", "content": f"escanea el host 10.0.0.{i} " + "detalle " * 40})
+            messages.append({"role": "assistant", "content": f"el host 10.0.0.{i} tiene 22/tcp abierto " + "x" * 300})
+
+        history = manager.build_context("s1", messages)
+        self.assertLessEqual(sum(estimate_tokens(m["content"]) for m in history), 1500)
+        # El último turno se conserva literal
+        self.assertEqual(history[-1], messages[-1])
+        self.assertGreater(manager.last_stats["summarized_turns"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
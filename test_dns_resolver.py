@@ -0,0 +1,68 @@
+"""
+Pruebas del resolvedor DNS asíncrono (sin red real: servidor UDP local de prueba)
+
+    python -m unittest test_dns_resolver
+"""
+
+import asyncio
+import struct
+import unittest
+
+from src.tools.dns_resolver import AsyncDNSResolver, DNSCache
+
+
+class _StubDNS(asyncio.DatagramProtocol):
+    """Servidor DNS de prueba: responde 1.2.3.4 a toda consulta A y vacío al resto"""
+
+    def __init__(self):
+        self.clients = set()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.clients.add(addr)
+        question = data[12:]
+        record_type = struct.unpack("!H", question[-4:-2])[0]
+        if record_type == 1:
+            answer = b"\xc0\x0c" + struct.pack("!HHIH", 1, 1, 300, 4) + bytes([1, 2, 3, 4])
+            header = struct.pack("!HHHHH", 0x8180, 1, 1, 0, 0)
+        else:
+            answer = b""
+            header = struct.pack("!HHHHH", 0x8180, 1, 0, 0, 0)
+        self.transport.sendto(data[:2] + header + question + answer, addr)
+
+
+class DNSResolverTest(unittest.TestCase):
+
+    def test_concurrent_queries_share_one_socket(self):
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            transport, stub = await loop.create_datagram_endpoint(_StubDNS, local_addr=('127.0.0.1', 0))
+            port = transport.get_extra_info('sockname')[1]
+            resolver = AsyncDNSResolver(nameservers=[('127.0.0.1', port)], cache=DNSCache(),
+                                        use_system_fallback=False)
+            try:
+                results = await resolver.resolve_many([f"host{i}.example" for i in range(50)])
+            finally:
+                await resolver.aclose()
+                transport.close()
+            return results, stub.clients
+
+        results, clients = asyncio.run(scenario())
+        self.assertEqual(len(results), 50)
+        self.assertTrue(all(r["A"] == ["1.2.3.4"] for r in results))
+        # Todas las consultas (A y AAAA) salieron del mismo socket UDP
+        self.assertEqual(len(clients), 1)
+
+    def test_without_nameservers_returns_an_error_answer(self):
+        cache = DNSCache()
+        resolver = AsyncDNSResolver(nameservers=[], cache=cache, use_system_fallback=False)
+        answer = asyncio.run(resolver.resolve("example.com"))
+        self.assertFalse(answer.ok)
+        self.assertEqual(answer.values, [])
+        self.assertIsNone(cache.get("example.com", "A"))
+
+
+if __name__ == "__main__":
+    unittest.main()
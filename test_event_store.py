@@ -0,0 +1,53 @@
+"""
+Pruebas del registro único de eventos de una sesión
+
+    python -m unittest test_event_store
+"""
+
+import os
+import unittest
+
+from src.models.event_store import EventStore, EventKind
+from test_support import TempDirTest
+
+
+class EventStoreTest(TempDirTest):
+
+    def test_recovers_from_torn_last_line(self):
+        path = os.path.join(self.dir, "events.jsonl")
+        store = EventStore(path, "s1")
+        for i in range(3):
+            store.append(EventKind.MESSAGE, {"n": i})
+        store.close()
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"seq": 4, "kind": "mess')  # Escritura cortada por un corte de luz
+
+        store = EventStore(path, "s1")
+        self.assertEqual(store.last_seq, 3)
+        event = store.append(EventKind.MESSAGE, {"n": 3})
+        self.assertEqual(event["seq"], 4)
+        self.assertEqual([e["data"]["n"] for e in store.iter_events()], [0, 1, 2, 3])
+        store.close()
+
+    def test_append_records_data_as_of_the_call(self):
+        path = os.path.join(self.dir, "events.jsonl")
+        store = EventStore(path, "s1")
+        data = {"hosts": ["10.0.0.1"]}
+        store.append(EventKind.ACTION, data)
+        data["hosts"].append("10.0.0.2")  # Cambio posterior del llamador
+        self.assertTrue(store.flush())
+        self.assertEqual([e["data"] for e in store.iter_events()], [{"hosts": ["10.0.0.1"]}])
+        store.close()
+
+    def test_unserializable_data_is_rejected_by_append(self):
+        store = EventStore(os.path.join(self.dir, "events.jsonl"), "s1")
+        data = {}
+        data["self"] = data
+        with self.assertRaises(ValueError):
+            store.append(EventKind.ACTION, data)
+        self.assertEqual(store.last_seq, 0)
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Pruebas del escritor JSONL en segundo plano
+
+    python -m unittest test_jsonl_writer
+"""
+
+import json
+import os
+import unittest
+
+from src.models.jsonl_writer import BackgroundJSONLWriter
+from test_support import TempDirTest
+
+
+class _Unserializable:
+    def __str__(self):
+        raise RuntimeError("no se puede convertir")
+
+
+class JSONLWriterTest(TempDirTest):
+
+    def test_flush_writes_everything_queued(self):
+        path = os.path.join(self.dir, "out.jsonl")
+        writer = BackgroundJSONLWriter(path, batch_size=8)
+        for i in range(100):
+            writer.write({"n": i})
+        self.assertTrue(writer.flush())
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)["n"] for line in f], list(range(100)))
+        writer.close()
+
+    def test_write_error_does_not_block_flush(self):
+        path = os.path.join(self.dir, "out.jsonl")
+        os.mkdir(path)  # No se puede abrir como archivo
+        writer = BackgroundJSONLWriter(path)
+        writer.write({"n": 1})
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertIsInstance(writer.last_error, OSError)
+        self.assertEqual(writer.stats["dropped"], 1)
+
+        os.rmdir(path)
+        writer.write({"n": 2})
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertIsNone(writer.last_error)
+        writer.close()
+
+    def test_bad_record_is_dropped_without_stopping_the_thread(self):
+        path = os.path.join(self.dir, "out.jsonl")
+        writer = BackgroundJSONLWriter(path)
+        writer.write({"bad": _Unserializable()})
+        writer.write('{"n": 1}')
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(writer.stats["dropped"], 1)
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line) for line in f], [{"n": 1}])
+        writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
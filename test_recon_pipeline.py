@@ -0,0 +1,61 @@
+"""
+Pruebas del pipeline de reconocimiento: barrido de hosts, límite de objetivos y WHOIS
+
+    python -m unittest test_recon_pipeline
+"""
+
+import unittest
+
+from src.tools.dns_resolver import expand_targets
+
+try:
+    from src.tools.nmap_tool import parse_ping_sweep
+    from src.tools.recon_pipeline_tool import _whois_target
+except ImportError:  # nmap_tool necesita CAI instalado
+    parse_ping_sweep = None
+
+
+class ExpandTargetsTest(unittest.TestCase):
+
+    def test_caps_large_networks(self):
+        self.assertEqual(len(expand_targets("10.0.0.0/30")), 2)
+        with self.assertRaises(ValueError):
+            expand_targets("10.0.0.0/8", max_hosts=1024)
+
+
+@unittest.skipIf(parse_ping_sweep is None, "requiere CAI instalado")
+class PingSweepParserTest(unittest.TestCase):
+
+    def test_named_and_bare_hosts(self):
+        output = (
+            "Starting Nmap 7.94 ( https://nmap.org )\n"
+            "Nmap scan report for router.lan (192.168.1.1)\n"
+            "Host is up (0.0010s latency).\n"
+            "Nmap scan report for 192.168.1.20\n"
+            "Host is up (0.0020s latency).\n"
+            "Nmap done: 256 IP addresses (2 hosts up) scanned in 2.10 seconds\n"
+        )
+        self.assertEqual(parse_ping_sweep(output), ["192.168.1.1", "192.168.1.20"])
+
+
+@unittest.skipIf(parse_ping_sweep is None, "requiere CAI instalado")
+class WhoisTargetTest(unittest.TestCase):
+
+    def test_registrable_domain(self):
+        expected = {
+            "www.ibm.de": "ibm.de",
+            "mail.abc.io": "abc.io",
+            "www.bbc.co.uk": "bbc.co.uk",
+            "shop.example.com.mx": "example.com.mx",
+            "a.b.example.com": "example.com",
+        }
+        for hostname, domain in expected.items():
+            self.assertEqual(_whois_target("10.0.0.1", [hostname]), domain)
+
+    def test_local_names_fall_back_to_public_ip(self):
+        self.assertEqual(_whois_target("8.8.8.8", ["router.lan"]), "8.8.8.8")
+        self.assertIsNone(_whois_target("192.168.1.1", ["router.lan"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
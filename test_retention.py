@@ -0,0 +1,43 @@
+"""
+Pruebas de la política de retención y archivado de sesiones
+
+    python -m unittest test_retention
+"""
+
+import os
+import time
+import unittest
+
+from src.models.retention import RetentionPolicy
+from src.models.session_manager import SessionManager
+from test_support import TempDirTest, write_log, log_name
+
+DAY = 24 * 60 * 60
+
+
+class RetentionPlanTest(TempDirTest):
+
+    def test_dry_run_plans_without_touching_files(self):
+        logs_dir = os.path.join(self.dir, "logs")
+        memory_dir = os.path.join(self.dir, "memory")
+        os.makedirs(logs_dir)
+        os.makedirs(memory_dir)
+        now = time.time()
+        write_log(os.path.join(logs_dir, log_name("old-1")), ["hola"] * 4, mtime=now - 90 * DAY)
+        write_log(os.path.join(logs_dir, log_name("new-2")), ["hola"] * 4, mtime=now - DAY)
+        write_log(os.path.join(logs_dir, "session_20260101_120000.jsonl"), ["hola"], mtime=now - 400 * DAY)
+
+        manager = SessionManager(logs_dir, memory_dir)
+        manager.retention.policy = RetentionPolicy(archive_after_days=30, delete_after_days=365,
+                                                   max_hot_mb=0, keep_recent=0)
+        before = sorted(os.listdir(logs_dir))
+        report = manager.retention.apply(dry_run=True)
+
+        planned = {a["filename"]: a["action"] for a in report["actions"]}
+        self.assertEqual(planned, {log_name("old-1"): "archive", "session_20260101_120000": "delete"})
+        self.assertEqual(sorted(os.listdir(logs_dir)), before)
+        self.assertEqual(report["archived"] + report["deleted"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""
+Pruebas del índice SQLite de sesiones y su búsqueda de texto completo
+
+    python -m unittest test_session_index
+"""
+
+import os
+import unittest
+
+from src.models.session_index import SessionIndex
+from test_support import TempDirTest, write_log, log_name
+
+
+class SessionIndexTest(TempDirTest):
+
+    def setUp(self):
+        super().setUp()
+        self.index = SessionIndex(self.dir)
+        self.first = os.path.join(self.dir, log_name("aaaa-1"))
+        self.second = os.path.join(self.dir, log_name("bbbb-2"))
+        write_log(self.first, ["escanea 10.0.0.5", "el puerto 22/tcp está abierto"])
+        write_log(self.second, ["consulta el whois de example.com", "registrador: Example"])
+
+    def tearDown(self):
+        self.index.close()
+        super().tearDown()
+
+    def test_refresh_only_reindexes_changed_logs(self):
+        self.assertEqual(self.index.refresh(), 2)
+        self.assertEqual(self.index.refresh(), 0)
+
+        write_log(self.first, ["revisa el servicio ssh vulnerable"])
+        self.assertEqual(self.index.refresh(), 1)
+        self.assertEqual(self.index.get(os.path.basename(self.first))["user_messages"], 2)
+
+    def test_search_ranks_and_limits(self):
+        write_log(self.first, ["revisa el servicio ssh vulnerable"])
+        self.index.refresh()
+
+        results = self.index.search("ssh vulnerable")
+        self.assertEqual([r["session_id"] for r in results], ["aaaa-1"])
+        self.assertEqual(results[0]["matches"], 1)
+        self.assertEqual(self.index.search("inexistente"), [])
+        self.assertEqual(len(self.index.search("el", limit=1)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+"""
+Pruebas de la vista paginada de una sesión guardada
+
+    python -m unittest test_session_view
+"""
+
+import os
+import unittest
+
+from src.models.session_view import SessionView
+from test_support import TempDirTest, write_log, log_name
+
+
+class SessionViewTest(TempDirTest):
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.dir, log_name("cccc-3"))
+        write_log(self.path, [f"mensaje {i}" for i in range(45)])
+
+    def test_paging_and_tail(self):
+        view = SessionView(self.path)
+        self.assertEqual(len(view), 45)
+        self.assertEqual(view.total_pages(20), 3)
+        self.assertEqual([m["content"] for m in view.page(3, 20)], [f"mensaje {i}" for i in range(40, 45)])
+        self.assertEqual([m["content"] for m in view.tail(3)], ["mensaje 42", "mensaje 43", "mensaje 44"])
+
+    def test_frozen_view_ignores_appended_messages(self):
+        view = SessionView(self.path)
+        view.freeze()
+        write_log(self.path, ["nuevo 1", "nuevo 2"])
+        self.assertEqual(len(view), 45)
+        self.assertEqual(view.tail(1)[0]["content"], "mensaje 44")
+        self.assertEqual(view.role_counts(), {"user": 23, "assistant": 22})
+        self.assertEqual(len(SessionView(self.path)), 47)
+
+
+if __name__ == "__main__":
+    unittest.main()
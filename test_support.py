@@ -0,0 +1,35 @@
+"""
+Utilidades compartidas por las pruebas (no contiene pruebas)
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TempDirTest(unittest.TestCase):
+    """Prueba con un directorio temporal propio en self.dir"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def write_log(path: str, messages, mtime: float = None):
+    """Agrega mensajes alternados usuario/asistente a un log con el formato de CAI"""
+    with open(path, 'a', encoding='utf-8') as f:
+        for i, content in enumerate(messages):
+            event = "user_message" if i % 2 == 0 else "assistant_message"
+            f.write(json.dumps({"event": event, "content": content,
+                                "timestamp": f"2026-01-01T00:00:{i % 60:02d}"}) + "\n")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def log_name(session_id: str) -> str:
+    """Nombre de log de CAI para una sesión"""
+    return f"cai_{session_id}_2026-01-01T00:00:00_tester_linux_6.1_127.0.0.1.jsonl"
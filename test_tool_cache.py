@@ -0,0 +1,71 @@
+"""
+Pruebas de la memoización de resultados de herramientas
+
+    python -m unittest test_tool_cache
+"""
+
+import json
+import os
+import unittest
+
+from src.models.tool_results import DnsLookupResult, ToolMessage
+from test_support import TempDirTest
+
+try:
+    from src.core.tool_cache import ToolResultCache
+except ImportError:  # src.core necesita CAI instalado
+    ToolResultCache = None
+
+WHOIS_METADATA = {"cacheable": True, "cache_bypass_fields": ["save_to_file"]}
+
+
+@unittest.skipIf(ToolResultCache is None, "requiere CAI instalado")
+class ToolResultCacheTest(TempDirTest):
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = os.path.join(self.dir, "cache")
+        self.cache = ToolResultCache(cache_dir=self.cache_dir)
+
+    def test_side_effect_arguments_bypass_the_cache(self):
+        plain = self.cache.make_key("whois_lookup_tool", json.dumps({"domain": "example.com"}), WHOIS_METADATA)
+        saving = self.cache.make_key("whois_lookup_tool",
+                                     json.dumps({"domain": "example.com", "save_to_file": True}),
+                                     WHOIS_METADATA)
+        self.assertIsNotNone(plain)
+        self.assertIsNone(saving)
+
+    def test_file_arguments_are_part_of_the_key(self):
+        path = os.path.join(self.dir, "auth.log")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("Failed password for root\n")
+        metadata = {"cacheable": True, "cache_file_fields": ["log_file_path"]}
+        args = json.dumps({"log_file_path": path})
+
+        before = self.cache.make_key("analyze_log_tool", args, metadata)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("Accepted password for admin\n")
+        self.assertNotEqual(self.cache.make_key("analyze_log_tool", args, metadata), before)
+        self.assertIsNone(self.cache.make_key("analyze_log_tool", json.dumps({"log_file_path": "/no/existe"}),
+                                              metadata))
+
+    def test_disk_entries_restore_the_structured_result(self):
+        result = DnsLookupResult(tool="dns_lookup_tool", domain="example.com",
+                                 ip_address="93.184.216.34", fqdn="example.com")
+        key = self.cache.make_key("dns_lookup_tool", json.dumps({"domain": "example.com"}), {})
+        self.cache.put("dns_lookup_tool", key, result, ttl=60)
+
+        restored = ToolResultCache(cache_dir=self.cache_dir).get("dns_lookup_tool", key)
+        self.assertIsInstance(restored, DnsLookupResult)
+        self.assertEqual(restored.to_dict(), result.to_dict())
+        self.assertEqual(str(restored), str(result))
+
+    def test_failed_results_are_not_stored(self):
+        key = self.cache.make_key("dns_lookup_tool", json.dumps({"domain": "example.invalid"}), {})
+        self.cache.put("dns_lookup_tool", key, ToolMessage.error("dns_lookup_tool", "❌ Error"))
+        self.assertIsNone(self.cache.get("dns_lookup_tool", key))
+        self.assertEqual(os.listdir(self.dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
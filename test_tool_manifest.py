@@ -0,0 +1,71 @@
+"""
+Pruebas del registro perezoso de herramientas desde el manifiesto
+
+    python -m unittest test_tool_manifest
+"""
+
+import asyncio
+import json
+import os
+import unittest
+
+from test_support import TempDirTest
+
+try:
+    from cai.sdk.agents import Agent, RunContextWrapper
+    from src.core.tool_cache import ToolResultCache
+    from src.core.tool_manager import ToolManager
+    from src.core.tool_manifest import TOOL_SPECS, load_manifest, source_digest
+except ImportError:  # src.core necesita CAI instalado
+    ToolManager = None
+
+TOOL = "read_artifact_tool"
+
+
+@unittest.skipIf(ToolManager is None, "requiere CAI instalado")
+class ManifestRegistrationTest(TempDirTest):
+
+    def setUp(self):
+        super().setUp()
+        self.manifest = os.path.join(self.dir, "manifest.json")
+        self.specs = [spec for spec in TOOL_SPECS if spec["name"] == TOOL]
+
+    def register(self) -> "ToolManager":
+        manager = ToolManager(Agent(name="test", tools=[]), cache=ToolResultCache(cache_dir=None))
+        manager.register_from_manifest(self.specs, manifest_path=self.manifest)
+        return manager
+
+    def test_missing_entry_is_imported_and_saved(self):
+        manager = self.register()
+        self.assertIn(TOOL, manager.loaded_tools)
+        entry = load_manifest(self.manifest)[TOOL]
+        self.assertEqual(entry["source_sha1"], source_digest("artifact_tool"))
+        self.assertEqual(entry["params_json_schema"], manager.loaded_tools[TOOL].params_json_schema)
+
+    def test_current_entry_defers_the_import_until_invoked(self):
+        self.register()
+        manager = self.register()
+        self.assertEqual(manager.loaded_tools, {})
+        self.assertIn(TOOL, manager.tools)
+
+        result = asyncio.run(manager.tools[TOOL].on_invoke_tool(
+            RunContextWrapper(context={}), json.dumps({"artifact_id": "inexistente"})
+        ))
+        self.assertIn(TOOL, manager.loaded_tools)
+        self.assertIn("inexistente", str(result))
+
+    def test_changed_source_invalidates_the_entry(self):
+        self.register()
+        with open(self.manifest, encoding='utf-8') as f:
+            data = json.load(f)
+        data["tools"][TOOL]["source_sha1"] = "otro"
+        with open(self.manifest, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+        manager = self.register()
+        self.assertIn(TOOL, manager.loaded_tools)
+        self.assertEqual(load_manifest(self.manifest)[TOOL]["source_sha1"], source_digest("artifact_tool"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Pruebas del registro de herramientas por nombre y la validación de argumentos
+
+    python -m unittest test_tool_registry
+"""
+
+import unittest
+
+try:
+    from cai.sdk.agents import Agent, FunctionTool
+    from src.core.tool_cache import ToolResultCache
+    from src.core.tool_manager import ToolManager
+except ImportError:  # src.core necesita CAI instalado
+    ToolManager = None
+
+
+async def _noop(ctx, input_json):
+    return "ok"
+
+
+def make_tool(name: str) -> "FunctionTool":
+    """FunctionTool con un parámetro requerido y dos opcionales"""
+    return FunctionTool(
+        name=name,
+        description=f"Herramienta de prueba {name}",
+        params_json_schema={
+            "type": "object",
+            "properties": {
+                "target": {"type": "string"},
+                "ports": {"type": "integer", "default": 100},
+                "verbose": {"anyOf": [{"type": "boolean"}, {"type": "null"}], "default": None},
+            },
+            "required": ["target", "ports", "verbose"],
+            "additionalProperties": False,
+        },
+        on_invoke_tool=_noop,
+    )
+
+
+@unittest.skipIf(ToolManager is None, "requiere CAI instalado")
+class ToolRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.agent = Agent(name="test", tools=[])
+        self.manager = ToolManager(self.agent, cache=ToolResultCache(cache_dir=None))
+        self.manager.register_tool(make_tool("scan"), {"category": "network", "is_sensitive": True})
+        self.manager.register_tool(make_tool("lookup"), {"category": "reconnaissance"})
+
+    def test_lookup_by_name_and_registration_order(self):
+        self.assertIs(self.manager.get_tool_by_name("scan"), self.agent.tools[0])
+        self.assertEqual([t.name for t in self.manager.custom_tools], ["scan", "lookup"])
+        self.assertEqual(self.manager.get_sensitive_tools(), ["scan"])
+        self.assertEqual([t["name"] for t in self.manager.list_tools("reconnaissance")], ["lookup"])
+
+    def test_duplicate_names_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.manager.register_tool(make_tool("scan"))
+        self.assertEqual(len(self.agent.tools), 2)
+
+    def test_arguments_are_validated_against_the_signature(self):
+        validate = self.manager.validate_tool_args
+        self.assertTrue(validate("scan", {"target": "10.0.0.1"})[0])
+        self.assertTrue(validate("scan", {"target": "10.0.0.1", "verbose": None})[0])
+        self.assertFalse(validate("scan", {})[0])
+        self.assertFalse(validate("scan", {"target": "10.0.0.1", "ports": "100"})[0])
+        self.assertFalse(validate("scan", {"target": "10.0.0.1", "ports": True})[0])
+        self.assertFalse(validate("scan", {"target": "10.0.0.1", "extra": 1})[0])
+        self.assertFalse(validate("missing", {})[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Pruebas de las trazas de turnos (spans de métodos instrumentados)
+
+    python -m unittest test_tracing
+"""
+
+import asyncio
+import json
+import os
+import unittest
+from unittest import mock
+
+from test_support import TempDirTest
+
+try:
+    from src.core import tracing
+except ImportError:  # src.core necesita CAI instalado
+    tracing = None
+
+
+class _Model:
+    async def stream_response(self, chunks: int):
+        for i in range(chunks):
+            await asyncio.sleep(0.05)
+            yield i
+
+    async def get_response(self):
+        await asyncio.sleep(0.05)
+        return "ok"
+
+
+@unittest.skipIf(tracing is None, "requiere CAI instalado")
+class InstrumentMethodTest(TempDirTest):
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.dir, "trace.json")
+        self.tracer = tracing.Tracer(self.path)
+        patcher = mock.patch.object(tracing, "_tracer", self.tracer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def spans(self):
+        self.tracer.close()
+        with open(self.path, encoding='utf-8') as f:
+            events = [json.loads(line.rstrip().rstrip(',')) for line in f.readlines()[1:]]
+        return {e["name"]: e for e in events if e["ph"] == "X"}
+
+    def test_async_generator_span_covers_the_whole_stream(self):
+        model = _Model()
+        self.assertTrue(tracing.instrument_method(model, "stream_response", "model.stream", "model"))
+        self.assertFalse(tracing.instrument_method(model, "stream_response", "model.stream", "model"))
+
+        async def consume():
+            return [item async for item in model.stream_response(3)]
+
+        self.assertEqual(asyncio.run(consume()), [0, 1, 2])
+        self.assertGreaterEqual(self.spans()["model.stream"]["dur"], 150_000)
+
+    def test_coroutine_span_covers_the_await(self):
+        model = _Model()
+        tracing.instrument_method(model, "get_response", "model.response", "model")
+        self.assertEqual(asyncio.run(model.get_response()), "ok")
+        self.assertGreaterEqual(self.spans()["model.response"]["dur"], 50_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Pruebas del cliente WHOIS nativo (sin red real: servidor TCP local de prueba)
+
+    python -m unittest test_whois_client
+"""
+
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from src.tools.whois_client import WhoisClient
+
+
+class _StubWhois:
+    """Servidor WHOIS TCP de prueba con una respuesta fija"""
+
+    def __init__(self, reply: str):
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen()
+        self.port = self.sock.getsockname()[1]
+        self.reply = reply.encode('utf-8')
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            with conn:
+                conn.recv(1024)
+                conn.sendall(self.reply)
+
+    def close(self):
+        self.sock.close()
+
+
+class WhoisClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.registry = _StubWhois(
+            "Domain Name: EXAMPLE.COM\n"
+            "Registrar: Example Registrar\n"
+            "Registrar WHOIS Server: whois.registrar.test\n"
+            "Name Server: NS1.EXAMPLE.COM\n"
+        )
+        self.client = WhoisClient(cache_dir=self.cache_dir, port=self.registry.port, timeout=1,
+                                  min_interval=0, iana_server="whois.iana.test")
+        # Registro conocido para .com; el registrador apunta a un puerto cerrado
+        self.client._tld_servers["com"] = "whois.registry.test"
+        self.client._addresses["whois.registry.test"] = (socket.AF_INET, ('127.0.0.1', self.registry.port))
+        closed = socket.socket()
+        closed.bind(('127.0.0.1', 0))
+        self.client._addresses["whois.registrar.test"] = (socket.AF_INET, closed.getsockname())
+        closed.close()
+
+    def tearDown(self):
+        self.registry.close()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_failed_referral_keeps_registry_data(self):
+        record = self.client.lookup("example.com")
+        self.assertTrue(record.found)
+        self.assertEqual(record.registrar, "Example Registrar")
+        self.assertEqual(record.name_servers, ["ns1.example.com"])
+        self.assertEqual(record.servers, ["whois.registry.test"])
+        self.assertEqual(len(record.errors), 1)
+        self.assertTrue(record.errors[0].startswith("whois.registrar.test"))
+
+    def test_incomplete_records_use_the_short_ttl(self):
+        self.client.lookup("example.com")
+        self.assertTrue(self.client.lookup("example.com").from_cache)
+        self.client.negative_ttl = -1
+        self.assertFalse(self.client.lookup("example.com").from_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()